@@ -0,0 +1,181 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+"""Size and speed of the Files table with text and with split file ids.
+
+Fills one database with the schema version 1 table (file ids as base64
+text, UNIQUE) and one with the current table (file ids split into their
+parts), with the same indexed rows, then reads them back the way
+iter_pending_files() does. Run from the repository root (with the bot's
+.env in place):
+
+    python -m benchmarks.file_id_storage [rows]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from pyrogram.file_id import FileId, FileType, ThumbnailSource
+
+from clonebot.db.clone_sql import (
+    CLONE_CHUNK_SIZE,
+    FILE_COLUMNS,
+    FILES_INDEXES,
+    FILES_TABLE,
+    FILES_TABLE_V1,
+    STORED_COLUMNS,
+    FileData,
+    FileRecord,
+    pack_file,
+    unpack_file,
+)
+from clonebot.utils.file_support import unpack_new_file_id
+
+BATCH = 100
+
+
+def make_file_id(photo):
+    parts = dict(
+        dc_id=4,
+        media_id=random.getrandbits(63),
+        access_hash=random.getrandbits(64) - 2**63,
+        file_reference=os.urandom(29),
+    )
+    if photo:
+        return FileId(
+            file_type=FileType.PHOTO,
+            volume_id=0,
+            thumbnail_source=ThumbnailSource.THUMBNAIL,
+            thumbnail_file_type=FileType.PHOTO,
+            thumbnail_size="y",
+            local_id=0,
+            **parts,
+        ).encode()
+    return FileId(file_type=FileType.VIDEO, **parts).encode()
+
+
+def make_rows(count):
+    """A channel as /index saves it: a third photos (named by their file
+    id), a third named documents, a tenth text messages, bot and user
+    workers (the bot stores ids without file reference)."""
+    random.seed(0)
+    rows = []
+    for i in range(count):
+        worker = "bot" if i % 2 else "user"
+        if i % 10 == 0:
+            file_id = f"-1001234567890_{i}"
+            rows.append(
+                FileData(
+                    file_name=f"message_-1001234567890_{i}",
+                    file_id=file_id,
+                    from_channel="-1001234567890",
+                    file_type="messages",
+                    message_id=i,
+                    worker=worker,
+                    caption=f"text {i}",
+                )
+            )
+            continue
+        photo = i % 3 == 0
+        file_id = make_file_id(photo)
+        if worker == "bot":
+            file_id = unpack_new_file_id(file_id)[0]
+        file_name = file_id if photo else f"Episode {i}.mkv"
+        rows.append(
+            FileData(
+                file_name=file_name,
+                file_id=file_id,
+                from_channel="-1001234567890",
+                file_type="photo" if photo else "document",
+                message_id=i,
+                worker=worker,
+                caption=None if i % 3 else f"caption {i}",
+            )
+        )
+    return rows
+
+
+def fill(path, create, columns, rows, pack):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    for statement in create:
+        db.execute(statement)
+    insert = (
+        f"INSERT OR IGNORE INTO Files ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+    started = time.perf_counter()
+    for start in range(0, len(rows), BATCH):
+        db.executemany(insert, [pack(row) for row in rows[start : start + BATCH]])
+        db.commit()
+    elapsed = time.perf_counter() - started
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.execute("VACUUM")
+    db.close()
+    return elapsed
+
+
+def read(path, columns, load):
+    db = sqlite3.connect(path)
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        rows = db.execute(
+            f"SELECT id, {', '.join(columns)} FROM Files WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, CLONE_CHUNK_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            load(row)
+        last_id = rows[-1][0]
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def measure(name, path, create, columns, rows, pack, load):
+    inserted = fill(path, create, columns, rows, pack)
+    loaded = read(path, columns, load)
+    size = os.path.getsize(path)
+    count = len(rows)
+    print(
+        f"{name:<6} {size / 2**20:8.1f} MiB  {size / count:6.0f} B/row"
+        f"  insert {inserted / count * 1e6:6.2f} µs/row  read {loaded / count * 1e6:6.2f} µs/row"
+    )
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows = make_rows(count)
+    print(f"{count:,} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        text = measure(
+            "text",
+            os.path.join(tmp, "text.db"),
+            [FILES_TABLE_V1.format(name="Files"), FILES_INDEXES[0]],
+            FILE_COLUMNS,
+            rows,
+            tuple,
+            lambda row: FileRecord(*row),
+        )
+        split = measure(
+            "split",
+            os.path.join(tmp, "split.db"),
+            [FILES_TABLE.format(name="Files"), *FILES_INDEXES],
+            STORED_COLUMNS,
+            rows,
+            pack_file,
+            unpack_file,
+        )
+    print(f"size   {split / text:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
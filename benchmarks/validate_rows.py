@@ -0,0 +1,98 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+"""Per-row cost of validating indexed Files rows.
+
+Compares the marshmallow Schema.load() loop save_data_batch used to run
+with the compiled FileData validator, in batches of 100 like /index.
+Run from the repository root (with the bot's .env in place):
+
+    python -m benchmarks.validate_rows [rows]
+
+marshmallow is optional; without it only the validator is measured.
+"""
+
+import sys
+import time
+
+from clonebot.db.records import file_validator
+
+BATCH = 100
+
+
+def make_rows(count):
+    return [
+        {
+            "file_name": f"file_{i}.mkv",
+            "file_id": f"BQACAgUAAx0CZ{i:012d}",
+            "from_channel": "-1001234567890",
+            "file_type": "document",
+            "message_id": i,
+            "use": "clone",
+            "worker": "bot",
+            "caption": None if i % 3 else f"caption {i}",
+            "media_group_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def marshmallow_loop():
+    try:
+        from marshmallow import Schema, ValidationError, fields
+    except ImportError:
+        return None
+
+    class Data(Schema):
+        file_name = fields.Str()
+        file_id = fields.Str(required=True)
+        from_channel = fields.Str()
+        file_type = fields.Str()
+        message_id = fields.Int()
+        use = fields.Str(load_default="clone")
+        worker = fields.Str()
+        caption = fields.Str(allow_none=True)
+        media_group_id = fields.Str(allow_none=True)
+
+    def validate(batch):
+        schema = Data()
+        valid = []
+        for data in batch:
+            try:
+                schema.load(data)
+                valid.append(data)
+            except ValidationError:
+                pass
+        return valid
+
+    return validate
+
+
+def measure(name, validate, rows):
+    started = time.perf_counter()
+    for start in range(0, len(rows), BATCH):
+        validate(rows[start : start + BATCH])
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<12} {elapsed:8.2f} s  {elapsed / len(rows) * 1e6:8.2f} µs/row"
+        f"  {len(rows) / elapsed:12,.0f} rows/s"
+    )
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = make_rows(count)
+    print(f"{count:,} rows, batches of {BATCH}")
+    compiled = measure("compiled", file_validator.load_many, rows)
+    validate = marshmallow_loop()
+    if validate is None:
+        print("marshmallow is not installed, skipped")
+        return
+    before = measure("marshmallow", validate, rows)
+    print(f"speedup      {before / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
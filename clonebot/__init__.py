@@ -14,12 +14,59 @@ APP_ID = os.environ.get("APP_ID", "")
 API_HASH = os.environ.get("API_HASH", "")
 SESSION = os.environ.get("SESSION", "")
 BOT_TOKEN = os.environ.get("BOT_TOKEN", "")
+BOT_TOKENS = os.environ.get("BOT_TOKENS", "").split()
+SESSIONS = os.environ.get("SESSIONS", "").split()
 OWNER_ID = int(os.environ.get("OWNER_ID", ""))
 ADMINS = [
     int(user) if pattern.search(user) else user
     for user in os.environ.get("ADMINS", "").split()
 ] + [OWNER_ID]
 
+# clone engine
+CLONE_IN_FLIGHT = int(os.environ.get("CLONE_IN_FLIGHT", "4"))
+CLONE_CHAT_RATE = float(os.environ.get("CLONE_CHAT_RATE", "1"))
+CLONE_BOT_RATE = float(os.environ.get("CLONE_BOT_RATE", "25"))
+CLONE_USER_RATE = float(os.environ.get("CLONE_USER_RATE", "1"))
+# user lane pacing: "sends:pause" second ranges, see utils/pacing.py
+CLONE_USER_PACING = os.environ.get(
+    "CLONE_USER_PACING",
+    "10000-15300:2000-3000,5000-6000:1500-2000,1500-2000:1000-1200,250-300:250-500",
+)
+CLONE_USER_DELAY = os.environ.get("CLONE_USER_DELAY", "3-8")
+CLONE_POOL_MAX_ERRORS = int(os.environ.get("CLONE_POOL_MAX_ERRORS", "5"))
+CLONE_POOL_BENCH = int(os.environ.get("CLONE_POOL_BENCH", "60"))
+CLONE_DISTRIBUTION = os.environ.get("CLONE_DISTRIBUTION", "sequential").lower()
+CLONE_BATCH_SIZE = min(int(os.environ.get("CLONE_BATCH_SIZE", "100")), 100)
+CLONE_JOURNAL_BATCH = int(os.environ.get("CLONE_JOURNAL_BATCH", "100"))
+CLONE_JOURNAL_INTERVAL = int(os.environ.get("CLONE_JOURNAL_INTERVAL_MS", "1000")) / 1000
+# retries of failed clone sends: attempts, first/longest backoff in seconds
+CLONE_RETRY_MAX = int(os.environ.get("CLONE_RETRY_MAX", "5"))
+CLONE_RETRY_BASE = float(os.environ.get("CLONE_RETRY_BASE", "30"))
+CLONE_RETRY_CAP = float(os.environ.get("CLONE_RETRY_CAP", "3600"))
+# minimum seconds between two edits of a progress message
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", "10"))
+# Prometheus text file with the bot metrics, rewritten every METRICS_INTERVAL seconds
+METRICS_FILE = os.environ.get("METRICS_FILE", "metrics.prom")
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "15"))
+
+# SQLite: reader connections per database, page cache and memory map in MiB
+DB_READERS = int(os.environ.get("DB_READERS", "2"))
+DB_CACHE_MB = int(os.environ.get("DB_CACHE_MB", "32"))
+DB_MMAP_MB = int(os.environ.get("DB_MMAP_MB", "256"))
+
+# run mode: "live" talks to Telegram, "simulate" runs offline (utils/simulator.py)
+RUN_MODE = os.environ.get("RUN_MODE", "live").lower()
+SIM_MESSAGES = int(os.environ.get("SIM_MESSAGES", "10000"))
+SIM_DESTINATIONS = int(os.environ.get("SIM_DESTINATIONS", "1"))
+SIM_BOTS = int(os.environ.get("SIM_BOTS", "1"))
+SIM_USERS = int(os.environ.get("SIM_USERS", "0"))
+SIM_LATENCY_MS = int(os.environ.get("SIM_LATENCY_MS", "50"))
+SIM_FLOOD_RATE = float(os.environ.get("SIM_FLOOD_RATE", "0"))
+SIM_FLOOD_SECONDS = int(os.environ.get("SIM_FLOOD_SECONDS", "5"))
+SIM_RATE = int(os.environ.get("SIM_RATE", "0"))
+SIM_SEED = int(os.environ.get("SIM_SEED", "0"))
+SIM_RESUME = os.environ.get("SIM_RESUME", "").lower() in ("1", "true", "yes")
+
 # logging Conf
 logging.config.fileConfig(fname="config.ini", disable_existing_loggers=False)
 LOGGER = logging.getLogger(__name__)
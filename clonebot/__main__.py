@@ -8,10 +8,24 @@ from pyrogram import Client, __version__, idle  # noqa: E402
 from pyrogram.raw.all import layer  # noqa: E402
 from pyropatch import flood_handler, pyropatch  # noqa: E402, F401
 
-from clonebot import API_HASH, APP_ID, BOT_TOKEN, SESSION  # noqa: E402
+from clonebot import (  # noqa: E402
+    API_HASH,
+    APP_ID,
+    BOT_TOKEN,
+    BOT_TOKENS,
+    RUN_MODE,
+    SESSION,
+    SESSIONS,
+)
+from clonebot.db.connection import close_databases, open_databases  # noqa: E402
+from clonebot.utils.jobs import job_manager  # noqa: E402
+from clonebot.utils.metrics import metrics  # noqa: E402
 
 bot = None
 user = None
+# every client clone sends may use: bot/user first, then the extra accounts
+bots = []
+users = []
 
 
 async def main():
@@ -32,6 +46,26 @@ async def main():
             session_string=SESSION,
             plugins=plugins,
         )
+    extra = [
+        Client(
+            name=f"clonebot_{i}",
+            api_id=APP_ID,
+            api_hash=API_HASH,
+            bot_token=token,
+        )
+        for i, token in enumerate(BOT_TOKENS, 2)
+    ]
+    bots.extend([bot] + extra)
+    users.extend([user] if user else [])
+    for i, session in enumerate(SESSIONS, 2):
+        client = Client(
+            name=f"user_clonebot_{i}",
+            api_id=APP_ID,
+            api_hash=API_HASH,
+            session_string=session,
+        )
+        users.append(client)
+        extra.append(client)
     async with bot:
         print(
             f"{bot.me.first_name} - @{bot.me.username} - Pyrogram v{__version__} (Layer {layer}) - Bot Started..."
@@ -42,14 +76,52 @@ async def main():
                 f"{user.me.first_name} - @{user.me.username} - Pyrogram v{__version__} (Layer {layer}) - User Started..."
             )
 
+        for client in extra:
+            await client.start()
+            print(
+                f"{client.me.first_name} - @{client.me.username} - Pool Client Started..."
+            )
+
+        await open_databases()
+        metrics.start()
+        # imported once the plugins are loaded, they import the clients from here
+        from clonebot.plugins.clone import get_retry_worker, start_retry_worker
+
+        await start_retry_worker()
         await idle()
+        await job_manager.stop()
+        await get_retry_worker().stop()
+        await metrics.stop()
 
         await bot.stop()
         print(f"{bot.me.first_name} - @{bot.me.username} - Bot Stopped !!!")
         if user:
             await user.stop()
             print(f"{user.me.first_name} - @{user.me.username}- User Stopped !!!")
+        for client in extra:
+            await client.stop()
+
+
+async def simulate():
+    global bot, user
+    from clonebot.utils.simulator import create_clients, run_simulation
+
+    bots.extend(create_clients())
+    bot = bots[0]
+    users.extend(create_clients(users=True))
+    user = users[0] if users else None
+    await open_databases()
+    metrics.start()
+    try:
+        await run_simulation(bot, bots, users)
+    finally:
+        await job_manager.stop()
+    await metrics.stop()
 
 
 loop = asyncio.get_event_loop()
-loop.run_until_complete(main())
+try:
+    loop.run_until_complete(simulate() if RUN_MODE == "simulate" else main())
+finally:
+    # the SQLite connection threads would keep the process alive
+    loop.run_until_complete(close_databases())
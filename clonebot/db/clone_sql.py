@@ -2,215 +2,710 @@
 #
 # This file is part of clonebot.
 
-import asyncio
+import sqlite3
+import time
 from collections import namedtuple
-from contextlib import asynccontextmanager
 
-import aiosqlite
-from marshmallow import Schema, ValidationError, fields
+from clonebot import LOGGER, RUN_MODE
+from clonebot.db.connection import Database
+from clonebot.db.records import FileData, channel_validator, file_validator
+from clonebot.utils.file_support import join_file_id, split_file_id
 
-from clonebot import LOGGER
+CLONE_DB = "sim_clone.db" if RUN_MODE == "simulate" else "clone.db"
+CLONE_CHUNK_SIZE = 500
+# rows per multi-row INSERT, 15 parameters each, below SQLite's 999 limit
+INSERT_CHUNK_SIZE = 60
+RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
 
-CLONE_DB = "clone.db"
+FileRecord = namedtuple(
+    "FileRecord",
+    [
+        "rowid",
+        "file_name",
+        "file_id",
+        "from_channel",
+        "file_type",
+        "message_id",
+        "use",
+        "worker",
+        "caption",
+        "media_group_id",
+    ],
+)
 
+ChannelRecord = namedtuple(
+    "ChannelRecord",
+    [
+        "channel_id",
+        "channel_number",
+        "pending_files",
+        "processed_files",
+        "status",
+        "start_rowid",
+        "end_rowid",
+        "job_id",
+    ],
+)
 
-class Data(Schema):
-    file_name = fields.Str()
-    file_id = fields.Str(required=True)
-    from_channel = fields.Str()
-    file_type = fields.Str()
-    message_id = fields.Int()
-    use = fields.Str(load_default="clone")
-    worker = fields.Str()
-    caption = fields.Str(allow_none=True)
+JobRecord = namedtuple(
+    "JobRecord",
+    [
+        "id",
+        "state",
+        "sources",
+        "start_rowid",
+        "end_rowid",
+        "failed",
+        "error",
+        "created_at",
+        "updated_at",
+    ],
+)
 
+FailedRecord = namedtuple(
+    "FailedRecord",
+    [
+        "id",
+        "file_rowid",
+        "file_name",
+        "file_id",
+        "from_channel",
+        "file_type",
+        "message_id",
+        "use",
+        "worker",
+        "caption",
+        "media_group_id",
+        "channel_id",
+        "job_id",
+        "error",
+        "attempts",
+        "next_retry",
+        "failed_at",
+    ],
+)
 
-class ChannelData(Schema):
-    channel_id = fields.Str(required=True)
-    channel_number = fields.Int(required=True)
-    pending_files = fields.Int(required=True)
-    processed_files = fields.Int(load_default=0)
-    status = fields.Str(load_default="pending")
 
+class SaveResult(namedtuple("SaveResult", ["inserted", "duplicates", "invalid"])):
+    """Outcome of save_data_batch() for every row it was given.
 
-@asynccontextmanager
-async def get_db_connection():
-    conn = await aiosqlite.connect(CLONE_DB)
-    try:
-        yield conn
-        await conn.commit()
-    finally:
-        await conn.close()
+    ``inserted`` holds the FileData of the saved rows, ``duplicates``
+    (FileData, (from_channel, message_id)) pairs of rows whose file was
+    saved before, by that message (None if it is unknown), and ``invalid``
+    (row, error) pairs of the rows that could not be saved.
+    """
 
+    __slots__ = ()
 
-async def init_db():
-    async with get_db_connection() as db:
-        await db.execute(
-            """CREATE TABLE IF NOT EXISTS Files (
+    @property
+    def saved(self):
+        return len(self.inserted)
+
+    @property
+    def skipped(self):
+        return len(self.duplicates) + len(self.invalid)
+
+
+FILE_COLUMNS = (
+    "file_name",
+    "file_id",
+    "from_channel",
+    "file_type",
+    "message_id",
+    "use",
+    "worker",
+    "caption",
+    "media_group_id",
+)
+
+# the Files table of schema versions 1-4, file ids stored as text;
+# AUTOINCREMENT: ids of deleted rows are never handed out again, clone
+# jobs own the Files rows by id range
+FILES_TABLE_V1 = """CREATE TABLE IF NOT EXISTS {name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_name TEXT,
+                    file_id TEXT UNIQUE,
+                    from_channel TEXT,
+                    file_type TEXT,
+                    message_id INTEGER,
+                    use TEXT DEFAULT 'clone',
+                    worker TEXT,
+                    caption TEXT,
+                    media_group_id TEXT
+                )"""
+
+# Files as stored from schema version 5 on: a file id is kept as the parts
+# split_file_id() returns and rebuilt when the row is read. file_id only
+# holds ids that do not split; messages rows store no id at all, theirs is
+# "{from_channel}_{message_id}". A file_name that starts with the file id
+# (photos, unnamed documents) is stored with NAME_IS_FILE_ID instead.
+FILES_TABLE = """CREATE TABLE IF NOT EXISTS {name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_name TEXT,
+                    from_channel TEXT,
+                    file_type TEXT,
+                    message_id INTEGER,
+                    use TEXT DEFAULT 'clone',
+                    worker TEXT,
+                    caption TEXT,
+                    media_group_id TEXT,
+                    file_id TEXT,
+                    id_type INTEGER,
+                    dc_id INTEGER,
+                    media_id INTEGER,
+                    access_hash INTEGER,
+                    file_reference BLOB,
+                    file_extra BLOB
+                )"""
+
+# files_source finds the rows of a message; the unique ones keep one row per
+# file id, as the UNIQUE file_id column of FILES_TABLE_V1 did
+FILES_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS files_source ON Files (from_channel, message_id)",
+    """CREATE UNIQUE INDEX IF NOT EXISTS files_media ON Files (media_id, file_reference)
+       WHERE media_id IS NOT NULL""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS files_file_id ON Files (file_id)
+       WHERE file_id IS NOT NULL""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS files_message ON Files (from_channel, message_id)
+       WHERE media_id IS NULL AND file_id IS NULL""",
+)
+
+STORED_COLUMNS = (
+    "file_name",
+    "from_channel",
+    "file_type",
+    "message_id",
+    "use",
+    "worker",
+    "caption",
+    "media_group_id",
+    "file_id",
+    "id_type",
+    "dc_id",
+    "media_id",
+    "access_hash",
+    "file_reference",
+    "file_extra",
+)
+NAME_IS_FILE_ID = "\x00"
+# what makes a Files row unique, see FILES_INDEXES and file_key()
+KEY_COLUMNS = ("file_id", "media_id", "file_reference", "from_channel", "message_id")
+KEY_INDEXES = tuple(STORED_COLUMNS.index(column) for column in KEY_COLUMNS)
+
+
+def stored_file_id(file_id):
+    """(file_id, id_type, dc_id, media_id, access_hash, file_reference,
+    file_extra) to store for ``file_id``."""
+    parts = split_file_id(file_id)
+    if parts is None:
+        return (file_id, None, None, None, None, None, None)
+    return (None,) + parts
+
+
+def pack_file(record):
+    """The STORED_COLUMNS values of a FileData record."""
+    file_id = record.file_id
+    file_name = record.file_name
+    if file_name and file_id and file_name.startswith(file_id):
+        file_name = NAME_IS_FILE_ID + file_name[len(file_id) :]
+    if file_id == f"{record.from_channel}_{record.message_id}":
+        stored = (None,) * 7
+    else:
+        stored = stored_file_id(file_id)
+    return (
+        file_name,
+        record.from_channel,
+        record.file_type,
+        record.message_id,
+        record.use,
+        record.worker,
+        record.caption,
+        record.media_group_id,
+    ) + stored
+
+
+def unpack_file(row):
+    """The FileRecord of an ``id`` + STORED_COLUMNS row."""
+    (
+        rowid,
+        file_name,
+        from_channel,
+        file_type,
+        message_id,
+        use,
+        worker,
+        caption,
+        media_group_id,
+        file_id,
+        id_type,
+        *parts,
+    ) = row
+    if file_id is None:
+        if id_type is None:
+            file_id = f"{from_channel}_{message_id}"
+        else:
+            file_id = join_file_id(id_type, *parts)
+    if file_name and file_name[0] == NAME_IS_FILE_ID:
+        file_name = file_id + file_name[1:]
+    return FileRecord(
+        rowid,
+        file_name,
+        file_id,
+        from_channel,
+        file_type,
+        message_id,
+        use,
+        worker,
+        caption,
+        media_group_id,
+    )
+
+
+def file_key(file_id, media_id, file_reference, from_channel, message_id):
+    """The unique key of a row from its KEY_COLUMNS values: the text file
+    id, (media_id, file_reference) or, for messages, the source message."""
+    if file_id is not None:
+        return file_id
+    if media_id is not None:
+        return (media_id, file_reference)
+    return (from_channel, message_id)
+
+
+def get_db_connection():
+    """The writer connection, as a transaction committed when the block ends."""
+    return clone_db.transaction()
+
+
+def get_db_reader():
+    """A read-only connection, for queries that write nothing."""
+    return clone_db.read()
+
+
+async def create_tables(db):
+    """Schema version 1: the tables as they were before versioned
+    migrations, upgrading the files of every older release in place."""
+    await db.execute(FILES_TABLE_V1.format(name="Files"))
+
+    async with db.execute("PRAGMA table_info(Files)") as cursor:
+        columns = [row[1] for row in await cursor.fetchall()]
+    async with db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'Files'"
+    ) as cursor:
+        files_sql = (await cursor.fetchone())[0]
+    if "AUTOINCREMENT" not in files_sql.upper():
+        await migrate_files_table(db, columns)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS files_source ON Files (from_channel, message_id)"
+    )
+
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS Channels (
+                                channel_id TEXT PRIMARY KEY,
+                                channel_number INTEGER,
+                                pending_files INTEGER,
+                                processed_files INTEGER DEFAULT 0,
+                                status TEXT DEFAULT 'pending',
+                                start_rowid INTEGER,
+                                end_rowid INTEGER,
+                                job_id INTEGER
+                            )"""
+    )
+
+    async with db.execute("PRAGMA table_info(Channels)") as cursor:
+        columns = [row[1] for row in await cursor.fetchall()]
+    for column in ("start_rowid", "end_rowid", "job_id"):
+        if column not in columns:
+            await db.execute(f"ALTER TABLE Channels ADD COLUMN {column} INTEGER")
+
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS Jobs (
+                                id INTEGER PRIMARY KEY,
+                                state TEXT DEFAULT 'pending',
+                                sources TEXT,
+                                start_rowid INTEGER DEFAULT 0,
+                                end_rowid INTEGER,
+                                failed INTEGER DEFAULT 0,
+                                error TEXT,
+                                created_at REAL,
+                                updated_at REAL
+                            )"""
+    )
+
+    # media and source messages already sent to each destination
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS SentMedia (
+                                chat_id INTEGER,
+                                from_channel TEXT,
+                                message_id INTEGER,
+                                media_id INTEGER,
+                                PRIMARY KEY (chat_id, from_channel, message_id)
+                            ) WITHOUT ROWID"""
+    )
+
+    # dead letters: rows whose clone failed, with the caption that was sent
+    # and the destination channel; next_retry is NULL once retries gave up
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS FailedFiles (
+                                id INTEGER PRIMARY KEY,
+                                file_rowid INTEGER,
                                 file_name TEXT,
-                                file_id TEXT PRIMARY KEY,
+                                file_id TEXT,
                                 from_channel TEXT,
                                 file_type TEXT,
                                 message_id INTEGER,
-                                use TEXT DEFAULT 'clone',
+                                use TEXT,
                                 worker TEXT,
-                                caption TEXT
+                                caption TEXT,
+                                media_group_id TEXT,
+                                channel_id TEXT,
+                                job_id INTEGER,
+                                error TEXT,
+                                attempts INTEGER DEFAULT 1,
+                                next_retry REAL,
+                                failed_at REAL
+                            )"""
+    )
+
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS CloneCursor (
+                                id INTEGER PRIMARY KEY DEFAULT 1,
+                                last_rowid INTEGER DEFAULT 0
                             )"""
+    )
+
+
+async def migrate_files_table(db, columns):
+    """Rebuild an older Files table with the schema of version 1.
+
+    A table keyed on the TEXT file_id has its rows copied in
+    (from_channel, message_id) order, so the new integer ids follow the
+    source order; channel ranges and clone cursors refer to the old rowids
+    and are reset, they are assigned again on the next clone. A table with
+    integer ids but without AUTOINCREMENT keeps its ids, and the id
+    sequence starts above every id a clone job has claimed.
+    """
+    await db.execute(FILES_TABLE_V1.format(name="Files_new"))
+    if "id" in columns:
+        copied = ", ".join(("id",) + FILE_COLUMNS)
+        await db.execute(
+            f"INSERT INTO Files_new ({copied}) SELECT {copied} FROM Files"
         )
-        
+    else:
+        copied = ", ".join(column for column in FILE_COLUMNS if column in columns)
         await db.execute(
-            """CREATE TABLE IF NOT EXISTS Channels (
-                                channel_id TEXT PRIMARY KEY,
-                                channel_number INTEGER,
-                                pending_files INTEGER,
-                                processed_files INTEGER DEFAULT 0,
-                                status TEXT DEFAULT 'pending'
-                            )"""
+            f"""INSERT OR IGNORE INTO Files_new ({copied})
+                SELECT {copied} FROM Files ORDER BY from_channel, message_id"""
         )
+    await db.execute("DROP TABLE Files")
+    await db.execute("ALTER TABLE Files_new RENAME TO Files")
+    if "id" in columns:
+        async with db.execute("SELECT COALESCE(MAX(id), 0) FROM Files") as cursor:
+            seq = (await cursor.fetchone())[0]
+        async with db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'Jobs'"
+        ) as cursor:
+            if await cursor.fetchone():
+                async with db.execute(
+                    "SELECT COALESCE(MAX(end_rowid), 0) FROM Jobs"
+                ) as jobs:
+                    seq = max(seq, (await jobs.fetchone())[0])
+        await db.execute("DELETE FROM sqlite_sequence WHERE name = 'Files'")
+        await db.execute(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES ('Files', ?)", (seq,)
+        )
+        LOGGER.info("Migrated Files table to never reuse ids")
+        return
+    async with db.execute("PRAGMA table_info(Channels)") as cursor:
+        if "start_rowid" in [row[1] for row in await cursor.fetchall()]:
+            await db.execute("UPDATE Channels SET start_rowid = NULL, end_rowid = NULL")
+    await db.execute("DROP TABLE IF EXISTS CloneCursor")
+    LOGGER.info("Migrated Files table to integer ids in source order")
 
 
-async def save_data(
-    file_name, file_id, from_channel, message_id, worker, caption, file_type
-):
+async def split_file_ids(db):
+    """Schema version 5: rebuild Files with the file ids split into their
+    parts (FILES_TABLE), keeping the row ids and the id sequence.
 
-    await init_db()
-    
-    data_schema = Data()
-    try:
-        data_schema.load(
-            {
-                "file_name": file_name,
-                "file_id": file_id,
-                "from_channel": from_channel,
-                "file_type": file_type,
-                "message_id": message_id,
-                "use": "clone",
-                "worker": worker,
-                "caption": caption,
-            }
+    Rows whose text ids differ but that hold the same file (the same media
+    under another access_hash, or ids the bots stored without file
+    reference) are one row from now on: the first one is kept.
+    """
+    await db.execute(FILES_TABLE.format(name="Files_new"))
+    for index in FILES_INDEXES:
+        if "UNIQUE" in index:
+            await db.execute(index.replace(" ON Files ", " ON Files_new "))
+    last_id = 0
+    dropped = 0
+    while True:
+        async with db.execute(
+            f"""SELECT id, {", ".join(FILE_COLUMNS)} FROM Files
+               WHERE id > ? ORDER BY id LIMIT ?""",
+            (last_id, CLONE_CHUNK_SIZE),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            break
+        cursor = await db.executemany(
+            f"""INSERT OR IGNORE INTO Files_new (id, {", ".join(STORED_COLUMNS)})
+                VALUES ({", ".join("?" * (len(STORED_COLUMNS) + 1))})""",
+            [(row[0],) + pack_file(FileData(*row[1:])) for row in rows],
         )
-    except ValidationError as e:
-        LOGGER.error(
-            "Validation error occurred while saving file in Database. Error: %s", e
+        dropped += len(rows) - cursor.rowcount
+        last_id = rows[-1][0]
+    async with db.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'Files'"
+    ) as cursor:
+        row = await cursor.fetchone()
+    await db.execute("DROP TABLE Files")
+    await db.execute("ALTER TABLE Files_new RENAME TO Files")
+    if row is not None:
+        await db.execute("DELETE FROM sqlite_sequence WHERE name = 'Files'")
+        await db.execute(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES ('Files', ?)", row
         )
-        return False
+    for index in FILES_INDEXES:
+        await db.execute(index)
+    if dropped:
+        LOGGER.warning(
+            "Dropped %s Files rows that hold the same file as an earlier row", dropped
+        )
+    LOGGER.info("Migrated Files table to split file ids")
 
-    try:
-        async with get_db_connection() as db:
-            await db.execute(
-                """INSERT INTO Files (file_name, file_id, from_channel, file_type, message_id, use, worker, caption)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    file_name,
-                    file_id,
-                    from_channel,
-                    file_type,
-                    message_id,
-                    "clone",
-                    worker,
-                    caption,
-                ),
-            )
-            LOGGER.info("File/Message saved to Database: %s", file_name)
-            return True
-    except aiosqlite.IntegrityError:
-        LOGGER.info("File/Message is already saved in Database: %s", file_name)
-        return False
+
+# schema versions of clone.db, see Database; append new ones, never edit old ones
+MIGRATIONS = (
+    create_tables,
+    """CREATE TABLE IF NOT EXISTS CustomCaption (
+        id INTEGER PRIMARY KEY DEFAULT 1,
+        caption_html TEXT
+    )""",
+    # RetryWorker polls for due rows
+    "CREATE INDEX IF NOT EXISTS failed_retry ON FailedFiles (next_retry)",
+    # jobs look up their channels
+    "CREATE INDEX IF NOT EXISTS channels_job ON Channels (job_id, channel_number)",
+    split_file_ids,
+    # SentIndex looks sent media up by id
+    "CREATE INDEX IF NOT EXISTS sent_media ON SentMedia (chat_id, media_id)",
+)
+
+clone_db = Database(CLONE_DB, migrations=MIGRATIONS)
 
 
 async def save_data_batch(data_list):
+    """Insert Files rows, skipping the ones whose file_id is already saved.
+
+    Returns a SaveResult with the outcome of every row. The inserted rows
+    are told apart by the RETURNING clause of one multi-row INSERT (or by
+    changes() per row on SQLite before 3.35) and the duplicates are looked
+    up by their file_key(), so the cost depends on the batch, not the table.
+    """
     if not data_list:
-        return 0, 0
-    
+        return SaveResult([], [], [])
+
+    valid, errors = file_validator.load_many(data_list)
+    invalid = []
+    for data, messages in errors:
+        LOGGER.error(
+            "Validation error occurred while saving file in Database. Error: %s",
+            messages,
+        )
+        invalid.append((data, str(messages)))
+
+    if not valid:
+        return SaveResult([], [], invalid)
 
-    await init_db()
-    
-    data_schema = Data()
-    valid_data = []
-    validation_errors = 0
-    
-    for data in data_list:
-        try:
-            data_schema.load(data)
-            valid_data.append((
-                data["file_name"],
-                data["file_id"], 
-                data["from_channel"],
-                data["file_type"],
-                data["message_id"],
-                "clone",
-                data["worker"],
-                data["caption"]
-            ))
-        except ValidationError as e:
-            LOGGER.error(
-                "Validation error occurred while saving file in Database. Error: %s", e
-            )
-            validation_errors += 1
-    
-    if not valid_data:
-        return 0, len(data_list)
-    
-    saved_count = 0
-    skipped_count = validation_errors
-    
     try:
         async with get_db_connection() as db:
-            cursor = await db.execute("SELECT COUNT(*) FROM Files")
-            result = await cursor.fetchone()
-            count_before = result[0] if result else 0
-            
-            await db.executemany(
-                """INSERT OR IGNORE INTO Files (file_name, file_id, from_channel, file_type, message_id, use, worker, caption)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                valid_data
-            )
-            
-            cursor = await db.execute("SELECT COUNT(*) FROM Files")
-            result = await cursor.fetchone()
-            count_after = result[0] if result else 0
-            
-            saved_count = count_after - count_before
-            skipped_count += len(valid_data) - saved_count
-            
-            LOGGER.info(f"Batch saved {saved_count} files/messages to Database, skipped {skipped_count}")
-            return saved_count, skipped_count
-            
+            inserted = []
+            duplicates = []
+            for start in range(0, len(valid), INSERT_CHUNK_SIZE):
+                chunk = valid[start : start + INSERT_CHUNK_SIZE]
+                stored = [pack_file(record) for record in chunk]
+                if RETURNING:
+                    new_keys = await insert_returning(db, stored)
+                else:
+                    new_keys = await insert_each(db, stored)
+                for record, values in zip(chunk, stored):
+                    key = file_key(*(values[index] for index in KEY_INDEXES))
+                    if key in new_keys:
+                        new_keys.discard(key)
+                        inserted.append(record)
+                    else:
+                        duplicates.append((record, key))
+
+            existing = await get_file_sources(db, [key for record, key in duplicates])
+            duplicates = [(record, existing.get(key)) for record, key in duplicates]
     except Exception as e:
         LOGGER.error(f"Error during batch save: {e}")
-        return 0, len(data_list)
+        return SaveResult(
+            [], [], invalid + [(record._asdict(), str(e)) for record in valid]
+        )
+
+    result = SaveResult(inserted, duplicates, invalid)
+    LOGGER.info(
+        "Batch saved %s files/messages to Database, skipped %s",
+        result.saved,
+        result.skipped,
+    )
+    return result
 
 
-async def get_search_results():
+async def insert_returning(db, chunk):
+    """file_key()s of the STORED_COLUMNS rows of ``chunk`` one INSERT OR
+    IGNORE added."""
+    row = "(" + ", ".join("?" * len(STORED_COLUMNS)) + ")"
+    async with db.execute(
+        f"""INSERT OR IGNORE INTO Files ({", ".join(STORED_COLUMNS)})
+            VALUES {", ".join([row] * len(chunk))} RETURNING {", ".join(KEY_COLUMNS)}""",
+        [value for values in chunk for value in values],
+    ) as cursor:
+        return {file_key(*row) for row in await cursor.fetchall()}
 
-    await init_db()
-    
-    FileRecord = namedtuple(
-        "FileRecord",
-        [
-            "file_name",
-            "file_id",
-            "from_channel",
-            "file_type",
-            "message_id",
-            "use",
-            "worker",
-            "caption",
-        ],
+
+async def insert_each(db, chunk):
+    """insert_returning() for SQLite without RETURNING: changes() per row."""
+    new_keys = set()
+    for values in chunk:
+        cursor = await db.execute(
+            f"""INSERT OR IGNORE INTO Files ({", ".join(STORED_COLUMNS)})
+                VALUES ({", ".join("?" * len(STORED_COLUMNS))})""",
+            values,
+        )
+        if cursor.rowcount > 0:
+            new_keys.add(file_key(*(values[index] for index in KEY_INDEXES)))
+    return new_keys
+
+
+async def get_file_sources(db, keys):
+    """{key: (from_channel, message_id)} of the saved rows among the
+    file_key()s ``keys``."""
+    sources = {}
+    file_ids, media_ids = set(), set()
+    for key in set(keys):
+        if isinstance(key, str):
+            file_ids.add(key)
+        elif isinstance(key[0], int):
+            media_ids.add(key[0])
+        else:
+            # a messages row is only a duplicate of itself
+            sources[key] = key
+    queries = (
+        ("file_id", list(file_ids), lambda row: row[2]),
+        ("media_id", list(media_ids), lambda row: (row[3], row[4])),
     )
-    async with get_db_connection() as db:
-        async with db.execute("SELECT * FROM Files") as cursor:
-            rows = await cursor.fetchall()
-            messages = [FileRecord(*row) for row in rows]
-            return messages
+    for column, values, key_of in queries:
+        for start in range(0, len(values), INSERT_CHUNK_SIZE):
+            chunk = values[start : start + INSERT_CHUNK_SIZE]
+            async with db.execute(
+                f"""SELECT from_channel, message_id, file_id, media_id, file_reference
+                    FROM Files WHERE {column} IN ({", ".join("?" * len(chunk))})""",
+                chunk,
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    sources[key_of(row)] = (row[0], row[1])
+    return sources
 
 
-async def count_documents():
+async def get_clone_cursor(cursor_id=1):
+    async with get_db_reader() as db:
+        async with db.execute(
+            "SELECT last_rowid FROM CloneCursor WHERE id = ?", (cursor_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
 
-    await init_db()
-    
-    async with get_db_connection() as db:
-        async with db.execute("SELECT COUNT(*) FROM Files") as cursor:
+
+async def iter_pending_files(
+    chunk_size=CLONE_CHUNK_SIZE, cursor_id=1, start_rowid=0, end_rowid=None
+):
+    """Yield pending Files rows one by one, see iter_pending_chunks()."""
+    async for chunk in iter_pending_chunks(
+        chunk_size, cursor_id, start_rowid, end_rowid
+    ):
+        for record in chunk:
+            yield record
+
+
+async def iter_pending_chunks(
+    chunk_size=CLONE_CHUNK_SIZE, cursor_id=1, start_rowid=0, end_rowid=None
+):
+    """Yield pending Files rows in id (source) order, as lists of chunk_size rows.
+
+    Only rows with start_rowid < rowid <= end_rowid are read (no upper bound
+    when end_rowid is None). Iteration starts after the persisted CloneCursor
+    ``cursor_id``, so a restarted clone does not walk the finished part of
+    the range again. The cursor is only moved by commit_clone_progress(),
+    up to the rows that are committed (see ProgressJournal).
+    """
+    last_rowid = max(start_rowid or 0, await get_clone_cursor(cursor_id))
+    upper = end_rowid if end_rowid is not None else -1
+    while True:
+        async with get_db_reader() as db:
+            async with db.execute(
+                f"""SELECT id, {", ".join(STORED_COLUMNS)}
+                   FROM Files WHERE id > ? AND (? < 0 OR id <= ?)
+                   ORDER BY id LIMIT ?""",
+                (last_rowid, upper, upper, chunk_size),
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        if not rows:
+            break
+
+        yield [unpack_file(row) for row in rows]
+
+        last_rowid = rows[-1][0]
+
+
+async def get_media_window(from_channel, message_id, limit=200):
+    """The media rows of ``from_channel`` from ``message_id`` on, in source order."""
+    async with get_db_reader() as db:
+        async with db.execute(
+            f"""SELECT id, {", ".join(STORED_COLUMNS)}
+               FROM Files WHERE from_channel = ? AND message_id >= ? AND file_type != 'messages'
+               ORDER BY message_id LIMIT ?""",
+            (str(from_channel), message_id, limit),
+        ) as cursor:
+            return [unpack_file(row) for row in await cursor.fetchall()]
+
+
+async def update_file_ids(file_ids):
+    """Store refreshed file ids, given as (file_id, id) pairs."""
+    try:
+        async with get_db_connection() as db:
+            await db.executemany(
+                """UPDATE OR IGNORE Files
+                   SET file_id = ?, id_type = ?, dc_id = ?, media_id = ?,
+                       access_hash = ?, file_reference = ?, file_extra = ?
+                   WHERE id = ?""",
+                [stored_file_id(file_id) + (rowid,) for file_id, rowid in file_ids],
+            )
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error updating file ids: {e}")
+        return False
+
+
+async def get_sources(start_rowid=0, end_rowid=None):
+    """Distinct (from_channel, worker) pairs of the Files rows in the id range."""
+    upper = end_rowid if end_rowid is not None else -1
+    async with get_db_reader() as db:
+        async with db.execute(
+            """SELECT DISTINCT from_channel, worker FROM Files
+               WHERE id > ? AND (? < 0 OR id <= ?)""",
+            (start_rowid or 0, upper, upper),
+        ) as cursor:
+            return await cursor.fetchall()
+
+
+async def count_documents(start_rowid=0, end_rowid=None):
+    """Count Files rows, only those with start_rowid < id <= end_rowid if given."""
+    upper = end_rowid if end_rowid is not None else -1
+    async with get_db_reader() as db:
+        async with db.execute(
+            "SELECT COUNT(*) FROM Files WHERE id > ? AND (? < 0 OR id <= ?)",
+            (start_rowid or 0, upper, upper),
+        ) as cursor:
             result = await cursor.fetchone()
             total = result[0] if result else 0
     return total
@@ -220,6 +715,7 @@ async def delete_files():
     async with get_db_connection() as db:
         try:
             await db.execute("DELETE FROM Files")
+            await db.execute("DELETE FROM CloneCursor")
             await db.commit()
             return True
         except Exception as e:
@@ -227,66 +723,90 @@ async def delete_files():
             return False
 
 
-async def delete_data(file_id, from_channel, message_id):
-    async with get_db_connection() as db:
-        try:
-            result = await db.execute(
-                """DELETE FROM Files 
-                   WHERE file_id = ? AND from_channel = ? AND message_id = ?""",
-                (file_id, from_channel, message_id),
-            )
-            await db.commit()
+async def commit_clone_progress(records, progress, failed=(), cursors=None):
+    """Delete cloned rows and apply {channel_id: count} to Channels atomically.
 
-            if result.rowcount > 0:
-                LOGGER.info("File/Message deleted from Database: %s", file_id)
-                return True
-            else:
-                LOGGER.info(
-                    "No file/message found to delete with file_id: %s, from_channel: %s, message_id: %s",
-                    file_id,
-                    from_channel,
-                    message_id,
-                )
-                return False
-        except Exception as e:
-            LOGGER.error(f"Error deleting data from the database: {e}")
-            return False
+    ``failed`` holds (record, caption, channel_id, job_id, error, next_retry)
+    for the rows among ``records`` whose clone failed; they are moved to
+    FailedFiles in the same transaction. ``cursors`` holds the
+    {cursor_id: last_rowid} CloneCursors to save in the same transaction too.
 
-
-async def save_channels(channel_data_list):
-    await init_db()
-    
-    channel_schema = ChannelData()
-    valid_channels = []
-    validation_errors = 0
-    
-    for channel_data in channel_data_list:
-        try:
-            channel_schema.load(channel_data)
-            valid_channels.append((
-                channel_data["channel_id"],
-                channel_data["channel_number"],
-                channel_data["pending_files"],
-                channel_data["processed_files"],
-                channel_data["status"]
-            ))
-        except ValidationError as e:
-            LOGGER.error(
-                "Validation error occurred while saving channel in Database. Error: %s", e
+    Returns the number of Files rows removed, or None if the transaction failed.
+    """
+    try:
+        async with get_db_connection() as db:
+            cursor = await db.executemany(
+                "DELETE FROM Files WHERE id = ?",
+                [(record.rowid,) for record in records],
+            )
+            deleted = cursor.rowcount
+            now = time.time()
+            await db.executemany(
+                f"""INSERT INTO FailedFiles
+                    (file_rowid, {", ".join(FILE_COLUMNS)}, channel_id, job_id, error, next_retry, failed_at)
+                    VALUES ({", ".join("?" * (len(FILE_COLUMNS) + 6))})""",
+                [
+                    (
+                        record.rowid,
+                        record.file_name,
+                        record.file_id,
+                        record.from_channel,
+                        record.file_type,
+                        record.message_id,
+                        record.use,
+                        record.worker,
+                        caption,
+                        record.media_group_id,
+                        channel_id,
+                        job_id,
+                        error,
+                        next_retry,
+                        now,
+                    )
+                    for record, caption, channel_id, job_id, error, next_retry in failed
+                ],
+            )
+            await db.executemany(
+                """UPDATE Channels 
+                   SET processed_files = processed_files + ?, 
+                       pending_files = pending_files - ?
+                   WHERE channel_id = ?""",
+                [
+                    (count, count, channel_id)
+                    for channel_id, count in progress.items()
+                ],
+            )
+            await db.executemany(
+                "INSERT OR REPLACE INTO CloneCursor (id, last_rowid) VALUES (?, ?)",
+                list((cursors or {}).items()),
             )
-            validation_errors += 1
+            return deleted
+    except Exception as e:
+        LOGGER.error(f"Error committing clone progress: {e}")
+        return None
+
+
+async def save_channels(channel_data_list, job_id=None):
+    valid_channels, errors = channel_validator.load_many(channel_data_list)
+    for channel_data, messages in errors:
+        LOGGER.error(
+            "Validation error occurred while saving channel in Database. Error: %s",
+            messages,
+        )
     
     if not valid_channels:
         return False
     
     try:
         async with get_db_connection() as db:
-            await db.execute("DELETE FROM Channels")
-            
+            await db.execute(
+                "DELETE FROM Channels WHERE job_id IS ?", (job_id,)
+            )
+
             await db.executemany(
-                """INSERT INTO Channels (channel_id, channel_number, pending_files, processed_files, status)
-                   VALUES (?, ?, ?, ?, ?)""",
-                valid_channels
+                """INSERT INTO Channels (channel_id, channel_number, pending_files, processed_files, status, job_id)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [channel + (job_id,) for channel in valid_channels]
             )
             
             LOGGER.info(f"Saved {len(valid_channels)} channels to Database")
@@ -297,24 +817,18 @@ async def save_channels(channel_data_list):
         return False
 
 
-async def get_channels():
+async def get_channels(job_id=None):
+    """Channels of job ``job_id``, or of every job."""
     try:
-        await init_db()
-        
-        ChannelRecord = namedtuple(
-            "ChannelRecord",
-            [
-                "channel_id",
-                "channel_number", 
-                "pending_files",
-                "processed_files",
-                "status"
-            ],
-        )
         
-        async with get_db_connection() as db:
+        async with get_db_reader() as db:
             try:
-                async with db.execute("SELECT * FROM Channels ORDER BY channel_number") as cursor:
+                async with db.execute(
+                    """SELECT channel_id, channel_number, pending_files, processed_files, status, start_rowid, end_rowid, job_id
+                       FROM Channels WHERE ? IS NULL OR job_id = ?
+                       ORDER BY job_id, channel_number""",
+                    (job_id, job_id),
+                ) as cursor:
                     rows = await cursor.fetchall()
                     channels = [ChannelRecord(*row) for row in rows]
                     LOGGER.info(f"Retrieved {len(channels)} channels from database")
@@ -327,56 +841,316 @@ async def get_channels():
         raise
 
 
-async def update_channel_progress(channel_id, processed_count):
-    await init_db()
-    
+async def assign_channel_ranges(job_id):
+    """Give every channel of a job its own id range of the job's Files rows.
+
+    Channels are walked in channel_number order and each one takes the next
+    pending_files rows, so the split matches filling them one after another.
+    The last channel's range ends where the job's range ends.
+    """
+    async with get_db_connection() as db:
+        async with db.execute(
+            "SELECT start_rowid, end_rowid FROM Jobs WHERE id = ?", (job_id,)
+        ) as cursor:
+            start, job_end = await cursor.fetchone()
+        async with db.execute(
+            """SELECT channel_id, pending_files FROM Channels
+               WHERE job_id = ? ORDER BY channel_number""",
+            (job_id,),
+        ) as cursor:
+            channels = await cursor.fetchall()
+        async with db.execute("SELECT COALESCE(MAX(id), 0) FROM Files") as cursor:
+            max_rowid = (await cursor.fetchone())[0]
+
+        first = start
+        offset = 0
+        for idx, (channel_id, pending_files) in enumerate(channels):
+            end = job_end
+            if idx < len(channels) - 1:
+                end = start
+                if pending_files > 0:
+                    offset += pending_files
+                    async with db.execute(
+                        "SELECT id FROM Files WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+                        (first, offset - 1),
+                    ) as cursor:
+                        row = await cursor.fetchone()
+                    end = row[0] if row else max_rowid
+                    if job_end is not None:
+                        end = min(end, job_end)
+            await db.execute(
+                "UPDATE Channels SET start_rowid = ?, end_rowid = ? WHERE channel_id = ?",
+                (start, end, channel_id),
+            )
+            await db.execute(
+                "DELETE FROM CloneCursor WHERE id = ?", (int(channel_id),)
+            )
+            if end is not None:
+                start = end
+        LOGGER.info("Assigned Files ranges to %s channels of job %s", len(channels), job_id)
+
+
+async def create_job(channel_data_list):
+    """Create a clone job for every Files row not claimed by an earlier job.
+
+    The job owns the ids after the highest id of the earlier jobs up to the
+    current highest Files id, and its channels (channel_data_list) split
+    that range between them. Returns the new job id, or None.
+    """
+    try:
+        async with get_db_connection() as db:
+            async with db.execute("SELECT COALESCE(MAX(id), 0) FROM Files") as cursor:
+                max_rowid = (await cursor.fetchone())[0]
+            async with db.execute(
+                "SELECT COALESCE(MAX(end_rowid), 0) FROM Jobs"
+            ) as cursor:
+                start = (await cursor.fetchone())[0]
+            async with db.execute(
+                "SELECT DISTINCT from_channel FROM Files WHERE id > ? AND id <= ?",
+                (start, max_rowid),
+            ) as cursor:
+                sources = " ".join(row[0] for row in await cursor.fetchall())
+            now = time.time()
+            cursor = await db.execute(
+                """INSERT INTO Jobs (state, sources, start_rowid, end_rowid, created_at, updated_at)
+                   VALUES ('pending', ?, ?, ?, ?, ?)""",
+                (sources, start, max_rowid, now, now),
+            )
+            job_id = cursor.lastrowid
+    except Exception as e:
+        LOGGER.error(f"Error creating clone job: {e}")
+        return None
+
+    if not await save_channels(channel_data_list, job_id):
+        await delete_job(job_id)
+        return None
+    await assign_channel_ranges(job_id)
+    LOGGER.info("Created clone job %s for Files %s-%s", job_id, start + 1, max_rowid)
+    return job_id
+
+
+async def adopt_channels():
+    """Put Channels saved without a job (older versions) into a new job.
+
+    That job keeps the old behaviour of owning every Files row. Returns the
+    new job id, or None if there was nothing to adopt.
+    """
+    async with get_db_connection() as db:
+        async with db.execute(
+            "SELECT COUNT(*) FROM Channels WHERE job_id IS NULL"
+        ) as cursor:
+            if (await cursor.fetchone())[0] == 0:
+                return None
+        now = time.time()
+        cursor = await db.execute(
+            """INSERT INTO Jobs (state, sources, start_rowid, end_rowid, created_at, updated_at)
+               VALUES ('interrupted', '', 0, NULL, ?, ?)""",
+            (now, now),
+        )
+        job_id = cursor.lastrowid
+        await db.execute("UPDATE Channels SET job_id = ? WHERE job_id IS NULL", (job_id,))
+        await db.execute(
+            "UPDATE Channels SET start_rowid = NULL, end_rowid = NULL WHERE job_id = ?",
+            (job_id,),
+        )
+    await assign_channel_ranges(job_id)
+    LOGGER.info("Adopted saved channels as clone job %s", job_id)
+    return job_id
+
+
+async def get_jobs():
+    async with get_db_reader() as db:
+        async with db.execute(
+            """SELECT id, state, sources, start_rowid, end_rowid, failed, error, created_at, updated_at
+               FROM Jobs ORDER BY id"""
+        ) as cursor:
+            return [JobRecord(*row) for row in await cursor.fetchall()]
+
+
+async def count_unclaimed_files():
+    """Files rows that no clone job owns yet (none while an adopted job,
+    which owns every row, is not done; it can still be resumed)."""
+    async with get_db_reader() as db:
+        async with db.execute(
+            """SELECT COUNT(*) FROM Files
+               WHERE id > (SELECT COALESCE(MAX(end_rowid), 0) FROM Jobs)
+                 AND NOT EXISTS (
+                     SELECT 1 FROM Jobs WHERE end_rowid IS NULL AND state != 'done')"""
+        ) as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def update_job(job_id, state, failed=0, error=None):
     try:
         async with get_db_connection() as db:
             await db.execute(
-                """UPDATE Channels 
-                   SET processed_files = processed_files + ?, 
-                       pending_files = pending_files - ?
-                   WHERE channel_id = ?""",
-                (processed_count, processed_count, channel_id)
+                """UPDATE Jobs SET state = ?, failed = ?, error = ?, updated_at = ?
+                   WHERE id = ?""",
+                (state, failed, error, time.time(), job_id),
             )
             return True
-            
     except Exception as e:
-        LOGGER.error(f"Error updating channel progress: {e}")
+        LOGGER.error(f"Error updating clone job {job_id}: {e}")
         return False
 
 
-async def get_channel_by_number(channel_number):
-    await init_db()
-    
-    async with get_db_connection() as db:
+async def delete_job(job_id):
+    """Forget a job's channels and clone cursors; the Jobs row is kept as history."""
+    try:
+        async with get_db_connection() as db:
+            await db.execute(
+                """DELETE FROM CloneCursor WHERE id IN (
+                       SELECT CAST(channel_id AS INTEGER) FROM Channels WHERE job_id = ?)""",
+                (job_id,),
+            )
+            await db.execute("DELETE FROM Channels WHERE job_id = ?", (job_id,))
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error removing channels of clone job {job_id}: {e}")
+        return False
+
+
+async def find_sent_media(chat_id, sources, media_ids):
+    """The (from_channel, message_id) pairs among ``sources`` and the ids
+    among ``media_ids`` that were already sent to ``chat_id``."""
+    message_ids = {}
+    for from_channel, message_id in set(sources):
+        message_ids.setdefault(from_channel, []).append(message_id)
+    media_ids = list(set(media_ids))
+    found_sources, found_media = set(), set()
+    async with get_db_reader() as db:
+        for from_channel, values in message_ids.items():
+            for start in range(0, len(values), INSERT_CHUNK_SIZE):
+                chunk = values[start : start + INSERT_CHUNK_SIZE]
+                async with db.execute(
+                    f"""SELECT message_id FROM SentMedia
+                        WHERE chat_id = ? AND from_channel = ?
+                        AND message_id IN ({", ".join("?" * len(chunk))})""",
+                    (chat_id, from_channel, *chunk),
+                ) as cursor:
+                    found_sources.update(
+                        (from_channel, row[0]) for row in await cursor.fetchall()
+                    )
+        for start in range(0, len(media_ids), INSERT_CHUNK_SIZE):
+            chunk = media_ids[start : start + INSERT_CHUNK_SIZE]
+            async with db.execute(
+                f"""SELECT media_id FROM SentMedia
+                    WHERE chat_id = ? AND media_id IN ({", ".join("?" * len(chunk))})""",
+                (chat_id, *chunk),
+            ) as cursor:
+                found_media.update(row[0] for row in await cursor.fetchall())
+    return found_sources, found_media
+
+
+async def save_sent_media(sent):
+    """Record (chat_id, from_channel, message_id, media_id) SentMedia entries."""
+    try:
+        async with get_db_connection() as db:
+            await db.executemany(
+                """INSERT OR IGNORE INTO SentMedia (chat_id, from_channel, message_id, media_id)
+                   VALUES (?, ?, ?, ?)""",
+                sent,
+            )
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error saving sent media: {e}")
+        return False
+
+
+async def clear_sent_media():
+    try:
+        async with get_db_connection() as db:
+            await db.execute("DELETE FROM SentMedia")
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error clearing sent media: {e}")
+        return False
+
+
+async def get_due_failed_files(now, limit=50):
+    """FailedFiles rows whose next retry is due, oldest first."""
+    async with get_db_reader() as db:
         async with db.execute(
-            "SELECT * FROM Channels WHERE channel_number = ?", 
-            (channel_number,)
+            f"""SELECT {", ".join(FailedRecord._fields)} FROM FailedFiles
+                WHERE next_retry <= ? ORDER BY next_retry LIMIT ?""",
+            (now, limit),
         ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                ChannelRecord = namedtuple(
-                    "ChannelRecord",
-                    [
-                        "channel_id",
-                        "channel_number", 
-                        "pending_files",
-                        "processed_files",
-                        "status"
-                    ],
-                )
-                return ChannelRecord(*row)
-            return None
+            return [FailedRecord(*row) for row in await cursor.fetchall()]
+
+
+async def next_failed_retry():
+    """Time of the next due retry, or None when no row is waiting for one."""
+    async with get_db_reader() as db:
+        async with db.execute("SELECT MIN(next_retry) FROM FailedFiles") as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def update_failed_file(failed_id, error, attempts, next_retry):
+    try:
+        async with get_db_connection() as db:
+            await db.execute(
+                """UPDATE FailedFiles SET error = ?, attempts = ?, next_retry = ?
+                   WHERE id = ?""",
+                (error, attempts, next_retry, failed_id),
+            )
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error updating failed file {failed_id}: {e}")
+        return False
+
+
+async def delete_failed_file(failed_id):
+    try:
+        async with get_db_connection() as db:
+            await db.execute("DELETE FROM FailedFiles WHERE id = ?", (failed_id,))
+            return True
+    except Exception as e:
+        LOGGER.error(f"Error deleting failed file {failed_id}: {e}")
+        return False
+
+
+async def count_failed_files():
+    """[(error, waiting, given_up)] counts of FailedFiles rows per error class."""
+    async with get_db_reader() as db:
+        async with db.execute(
+            """SELECT error, COUNT(next_retry), SUM(next_retry IS NULL)
+               FROM FailedFiles GROUP BY error ORDER BY COUNT(*) DESC"""
+        ) as cursor:
+            return await cursor.fetchall()
+
+
+async def requeue_failed_files(now):
+    """Give the rows whose retries gave up a fresh set of attempts."""
+    try:
+        async with get_db_connection() as db:
+            cursor = await db.execute(
+                """UPDATE FailedFiles SET attempts = 0, next_retry = ?
+                   WHERE next_retry IS NULL""",
+                (now,),
+            )
+            return cursor.rowcount
+    except Exception as e:
+        LOGGER.error(f"Error requeueing failed files: {e}")
+        return 0
+
+
+async def clear_failed_files():
+    try:
+        async with get_db_connection() as db:
+            cursor = await db.execute("DELETE FROM FailedFiles")
+            return cursor.rowcount
+    except Exception as e:
+        LOGGER.error(f"Error clearing failed files: {e}")
+        return 0
 
 
 async def clear_channels():
-    await init_db()
-    
     try:
         async with get_db_connection() as db:
             await db.execute("DELETE FROM Channels")
-            LOGGER.info("Cleared all channels from Database")
+            await db.execute("DELETE FROM Jobs")
+            await db.execute("DELETE FROM CloneCursor")
+            LOGGER.info("Cleared all channels and clone jobs from Database")
             return True
     except Exception as e:
         LOGGER.error(f"Error clearing channels: {e}")
@@ -384,17 +1158,8 @@ async def clear_channels():
 
 
 async def save_custom_caption(caption_html):
-    await init_db()
-    
     try:
         async with get_db_connection() as db:
-            await db.execute(
-                """CREATE TABLE IF NOT EXISTS CustomCaption (
-                    id INTEGER PRIMARY KEY DEFAULT 1,
-                    caption_html TEXT
-                )"""
-            )
-            
             await db.execute(
                 """INSERT OR REPLACE INTO CustomCaption (id, caption_html)
                    VALUES (1, ?)""",
@@ -409,34 +1174,25 @@ async def save_custom_caption(caption_html):
         return False
 
 
+async def load_custom_caption():
+    """The custom caption, None if none is set; database errors are raised."""
+    async with get_db_reader() as db:
+        async with db.execute(
+            "SELECT caption_html FROM CustomCaption WHERE id = 1"
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+
 async def get_custom_caption():
-    await init_db()
-    
     try:
-        async with get_db_connection() as db:
-            await db.execute(
-                """CREATE TABLE IF NOT EXISTS CustomCaption (
-                    id INTEGER PRIMARY KEY DEFAULT 1,
-                    caption_html TEXT
-                )"""
-            )
-            
-            async with db.execute(
-                "SELECT caption_html FROM CustomCaption WHERE id = 1"
-            ) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    return row[0]
-                return None
-                
+        return await load_custom_caption()
     except Exception as e:
         LOGGER.error(f"Error getting custom caption: {e}")
         return None
 
 
 async def remove_custom_caption():
-    await init_db()
-    
     try:
         async with get_db_connection() as db:
             result = await db.execute(
@@ -453,14 +1209,3 @@ async def remove_custom_caption():
     except Exception as e:
         LOGGER.error(f"Error removing custom caption: {e}")
         return False
-
-
-def init_database():
-    try:
-        asyncio.get_running_loop()
-        asyncio.create_task(init_db())
-    except RuntimeError:
-        asyncio.run(init_db())
-
-
-init_database()
@@ -0,0 +1,155 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from clonebot import DB_CACHE_MB, DB_MMAP_MB, DB_READERS, LOGGER
+from clonebot.utils.metrics import DB_COMMITS
+
+# prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    # with WAL a commit only waits for the log write, not for fsync
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = {-DB_CACHE_MB * 1024}",
+    f"PRAGMA mmap_size = {DB_MMAP_MB * 1024 * 1024}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+_databases = []
+
+
+class Database:
+    """The long-lived connections of one SQLite file.
+
+    Writes go through a single writer connection, one ``transaction()`` at a
+    time, which commits when the block ends and rolls back when it raises.
+    Reads take one of ``readers`` connections with ``read()``; in WAL mode
+    they run next to the writer and see every committed transaction. The
+    connections stay open with their statement caches for the lifetime of
+    the event loop they were opened in; a new loop opens them again.
+
+    ``migrations`` brings the schema up to date when the database is
+    opened: migration N (counting from 1) is applied if ``PRAGMA
+    user_version`` is below N, in one transaction together with the new
+    version. A migration is an SQL statement or a coroutine function
+    taking the writer connection. Query functions can therefore assume the
+    current schema.
+    """
+
+    def __init__(self, path, migrations=(), readers=DB_READERS):
+        self.path = path
+        self.migrations = tuple(migrations)
+        self.readers = max(1, readers)
+        self._loop = None
+        self._ready = None
+        self._writer = None
+        self._pool = None
+        self._connections = []
+        self._lock = None
+        _databases.append(self)
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.path, cached_statements=STATEMENT_CACHE)
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        self._connections.append(conn)
+        return conn
+
+    async def _open(self):
+        self._lock = asyncio.Lock()
+        self._writer = await self._connect()
+        await self.migrate(self._writer)
+        self._pool = asyncio.Queue()
+        for _ in range(self.readers):
+            self._pool.put_nowait(await self._connect())
+        LOGGER.info("Opened %s with %s reader connections", self.path, self.readers)
+
+    async def migrate(self, db):
+        async with db.execute("PRAGMA user_version") as cursor:
+            version = (await cursor.fetchone())[0]
+        for number, migration in enumerate(self.migrations, 1):
+            if number <= version:
+                continue
+            await db.execute("BEGIN")
+            try:
+                if isinstance(migration, str):
+                    await db.execute(migration)
+                else:
+                    await migration(db)
+                await db.execute(f"PRAGMA user_version = {number}")
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+            LOGGER.info("Migrated %s to schema version %s", self.path, number)
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._connections:
+                # opened by an event loop that is gone by now
+                await self.close()
+            self._loop = loop
+            self._ready = loop.create_task(self._open())
+        try:
+            await self._ready
+        except Exception:
+            self._loop = None
+            await self.close()
+            raise
+
+    async def close(self):
+        connections, self._connections = self._connections, []
+        self._loop = None
+        self._writer = None
+        self._pool = None
+        for conn in connections:
+            try:
+                await conn.close()
+            except Exception as e:
+                LOGGER.warning(f"Could not close {self.path}: {e}")
+
+    @asynccontextmanager
+    async def transaction(self):
+        await self.open()
+        async with self._lock:
+            writer = self._writer
+            try:
+                yield writer
+            except BaseException:
+                try:
+                    await writer.rollback()
+                except Exception as e:
+                    LOGGER.error(f"Could not roll back {self.path}: {e}")
+                raise
+            with DB_COMMITS.time():
+                await writer.commit()
+
+    @asynccontextmanager
+    async def read(self):
+        await self.open()
+        pool = self._pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+
+
+async def open_databases():
+    """Open every database at startup instead of on its first query."""
+    for database in _databases:
+        await database.open()
+
+
+async def close_databases():
+    for database in _databases:
+        await database.close()
@@ -2,37 +2,34 @@
 #
 # This file is part of clonebot.
 
-import asyncio
-from contextlib import asynccontextmanager
-
-import aiosqlite
-
 from clonebot import LOGGER
+from clonebot.db.connection import Database
 
 FORWARD_DB = "forward.db"
 
+# schema versions of forward.db, see Database; append new ones, never edit old ones
+MIGRATIONS = (
+    """
+    CREATE TABLE IF NOT EXISTS chats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_channel INTEGER NOT NULL,
+        destination_channel INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS chats_route ON chats (source_channel, destination_channel)",
+)
 
-@asynccontextmanager
-async def get_db_connection():
-    conn = await aiosqlite.connect(FORWARD_DB)
-    try:
-        yield conn
-        await conn.commit()
-    finally:
-        await conn.close()
+forward_db = Database(FORWARD_DB, migrations=MIGRATIONS, readers=1)
 
 
-async def init_db():
-    async with get_db_connection() as db:
-        await db.execute(
-            """
-            CREATE TABLE IF NOT EXISTS chats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_channel INTEGER NOT NULL,
-                destination_channel INTEGER NOT NULL
-            )
-            """
-        )
+def get_db_connection():
+    """The writer connection, as a transaction committed when the block ends."""
+    return forward_db.transaction()
+
+
+def get_db_reader():
+    """A read-only connection, for queries that write nothing."""
+    return forward_db.read()
 
 
 async def add_chats(source, destination):
@@ -70,7 +67,7 @@ async def remove_chats(source, destination):
 
 
 async def get_chats(source):
-    async with get_db_connection() as db:
+    async with get_db_reader() as db:
         async with db.execute(
             "SELECT destination_channel FROM chats WHERE source_channel = ?", (source,)
         ) as cursor:
@@ -78,7 +75,7 @@ async def get_chats(source):
 
 
 async def get_all_chats():
-    async with get_db_connection() as db:
+    async with get_db_reader() as db:
         async with db.execute(
             "SELECT source_channel, destination_channel FROM chats"
         ) as cursor:
@@ -86,28 +83,17 @@ async def get_all_chats():
 
 
 async def get_source_channels():
-    async with get_db_connection() as db:
+    async with get_db_reader() as db:
         async with db.execute("SELECT source_channel FROM chats") as cursor:
             source_channels = await cursor.fetchall()
             return [int(row[0]) for row in source_channels]
 
 
 async def get_dest_by_source(source):
-    async with get_db_connection() as db:
+    async with get_db_reader() as db:
         async with db.execute(
             "SELECT destination_channel FROM chats WHERE source_channel = ?",
             (source,),
         ) as cursor:
             destination_channels = await cursor.fetchall()
             return [int(row[0]) for row in destination_channels]
-
-
-def init_database():
-    try:
-        asyncio.get_running_loop()
-        asyncio.create_task(init_db())
-    except RuntimeError:
-        asyncio.run(init_db())
-
-
-init_database()
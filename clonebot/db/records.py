@@ -0,0 +1,190 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from typing import NamedTuple, Optional, Union, get_args, get_origin, get_type_hints
+
+MISSING = object()
+
+MESSAGES = {
+    "required": "Missing data for required field.",
+    "null": "Field may not be null.",
+    "unknown": "Unknown field.",
+    str: "Not a valid string.",
+    int: "Not a valid integer.",
+    "too_large": "Number too large.",
+    "utf8": "Not a valid utf-8 string.",
+}
+
+
+class ValidationError(ValueError):
+    """A row that does not fit its record; ``messages`` maps a field name to
+    its errors, the same way marshmallow reports them."""
+
+    def __init__(self, messages):
+        super().__init__(messages)
+        self.messages = messages
+
+
+class FileData(NamedTuple):
+    """A Files row to insert, in FILE_COLUMNS order."""
+
+    file_name: str = None
+    file_id: str = None
+    from_channel: str = None
+    file_type: str = None
+    message_id: int = None
+    use: str = "clone"
+    worker: str = None
+    caption: Optional[str] = None
+    media_group_id: Optional[str] = None
+
+    REQUIRED = ("file_id",)
+
+
+class ChannelData(NamedTuple):
+    """A Channels row to insert."""
+
+    channel_id: str = None
+    channel_number: int = None
+    pending_files: int = None
+    processed_files: int = 0
+    status: str = "pending"
+
+    REQUIRED = ("channel_id", "channel_number", "pending_files")
+
+
+def to_str(value):
+    """(value, error) of a non-str value for a str field."""
+    if isinstance(value, str):
+        return value, None
+    if isinstance(value, bytes):
+        try:
+            return value.decode("utf-8"), None
+        except UnicodeDecodeError:
+            return None, MESSAGES["utf8"]
+    return None, MESSAGES[str]
+
+
+def to_int(value):
+    """(value, error) of a non-int value for an int field."""
+    if value is True or value is False:
+        return None, MESSAGES[int]
+    try:
+        return int(value), None
+    except OverflowError:
+        return None, MESSAGES["too_large"]
+    except (TypeError, ValueError):
+        return None, MESSAGES[int]
+
+
+CONVERTERS = {str: "to_str", int: "to_int"}
+
+ROW_CHECK = """\
+errors = None
+{fields}if not data.keys() <= KNOWN:
+    errors = errors or {{}}
+    errors.update((key, [UNKNOWN]) for key in data if key not in KNOWN)
+if errors is not None:
+    {on_error}
+"""
+
+FIELD_CHECK = """\
+v{index} = data.get({name!r}, MISSING)
+if type(v{index}) is not {type}:
+    if v{index} is MISSING:
+        {on_missing}
+    elif v{index} is None:
+        {on_none}
+    else:
+        v{index}, error = {converter}(v{index})
+        if error is not None:
+            errors = errors or {{}}
+            errors[{name!r}] = [error]
+"""
+
+
+class Validator:
+    """Loads dicts into ``record`` with marshmallow's rules and messages.
+
+    The checks of every field are generated as Python source once, for
+    ``load(data)``, which returns the record or raises ValidationError, and
+    for ``load_many(rows)``, which checks a whole batch in one loop and
+    returns (records, [(row, messages)]). A value of the annotated type
+    costs one type() check; anything else is converted like marshmallow's
+    String/Integer fields do (bytes and numeric strings are accepted,
+    booleans are not). Optional fields accept None, fields listed in the
+    record's REQUIRED must be present, and unknown keys are errors.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        hints = get_type_hints(record)
+        required = set(getattr(record, "REQUIRED", ()))
+        checks = []
+        for index, name in enumerate(record._fields):
+            kind, nullable = hints[name], False
+            if get_origin(kind) is Union:
+                kind = next(arg for arg in get_args(kind) if arg is not type(None))
+                nullable = True
+            default = record._field_defaults.get(name)
+            checks.append(
+                FIELD_CHECK.format(
+                    index=index,
+                    name=name,
+                    type=kind.__name__,
+                    converter=CONVERTERS[kind],
+                    on_missing=_set_error(name, "REQUIRED_ERROR")
+                    if name in required
+                    else f"v{index} = {default!r}",
+                    on_none="pass" if nullable else _set_error(name, "NULL"),
+                )
+            )
+        values = ", ".join(f"v{index}" for index in range(len(record._fields)))
+        fields = "".join(checks)
+        load = "def load(data):\n" + _indent(
+            ROW_CHECK.format(fields=fields, on_error="raise ValidationError(errors)")
+            + f"return new(record, ({values},))\n"
+        )
+        load_many = (
+            "def load_many(rows):\n"
+            "    records = []\n"
+            "    invalid = []\n"
+            "    for data in rows:\n"
+            + _indent(
+                ROW_CHECK.format(
+                    fields=fields, on_error="invalid.append((data, errors))\n    continue"
+                )
+                + f"records.append(new(record, ({values},)))\n",
+                2,
+            )
+            + "    return records, invalid\n"
+        )
+        namespace = {
+            "record": record,
+            "new": tuple.__new__,
+            "KNOWN": frozenset(record._fields),
+            "MISSING": MISSING,
+            "UNKNOWN": MESSAGES["unknown"],
+            "REQUIRED_ERROR": MESSAGES["required"],
+            "NULL": MESSAGES["null"],
+            "ValidationError": ValidationError,
+            "to_str": to_str,
+            "to_int": to_int,
+        }
+        exec(load + "\n" + load_many, namespace)
+        self.load = namespace["load"]
+        self.load_many = namespace["load_many"]
+
+
+def _set_error(name, message):
+    return f"errors = errors or {{}}\n        errors[{name!r}] = [{message}]"
+
+
+def _indent(source, levels=1):
+    prefix = "    " * levels
+    return "".join(prefix + line if line.strip() else line for line in source.splitlines(True))
+
+
+file_validator = Validator(FileData)
+channel_validator = Validator(ChannelData)
@@ -7,6 +7,7 @@ from pyrogram import filters
 from __main__ import bot
 from clonebot import ADMINS
 from clonebot.db.forward_sql import add_chats, get_all_chats, remove_chats
+from clonebot.plugins.forward import refresh_routes
 
 
 @bot.on_message(filters.command("addchat") & filters.user(ADMINS))
@@ -24,6 +25,12 @@ async def add_chat_handler(bot, message):
             await message.reply_text(
                 f"Chat Added: Source: `{source_chat_id}` - Destination: `{dest_chat_id}`"
             )
+            routes = await refresh_routes()
+            if dest_chat_id not in routes.get(source_chat_id, ()):
+                await message.reply_text(
+                    "⚠️ I can't read the source or post in the destination, "
+                    "make me admin there. Messages are not forwarded until then."
+                )
         else:
             message.reply_text("Some error occured while adding chat")
     except (IndexError, ValueError):
@@ -45,6 +52,7 @@ async def delete_chat_handler(bot, message):
             await message.reply_text(
                 f"Chat Deleted: Source: `{source_chat_id}` - Destination: `{dest_chat_id}`"
             )
+            await refresh_routes()
         else:
             message.reply_text("Some error occured while removing chat")
     except (IndexError, ValueError):
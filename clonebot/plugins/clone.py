@@ -3,61 +3,184 @@
 # This file is part of clonebot.
 
 import asyncio
-import random
-from datetime import datetime
+import time
+from functools import partial
 
-import pytz
 from pyrogram import filters
 from pyrogram.errors import (
     FileReferenceEmpty,
     FileReferenceExpired,
     MediaEmpty,
-    ChannelInvalid,
-    PeerIdInvalid,
-    ChannelPrivate,
-    UserNotParticipant,
     FloodWait
 )
-from __main__ import bot, user
-from clonebot import ADMINS, LOGGER
+from pyrogram.types import (
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+)
+from __main__ import bot, bots, users
+from clonebot import ADMINS, CLONE_BATCH_SIZE, CLONE_DISTRIBUTION, LOGGER
 from clonebot.db.clone_sql import (
+    FileRecord,
+    clear_failed_files,
     count_documents,
-    delete_data,
+    count_failed_files,
+    count_unclaimed_files,
     delete_files,
-    get_search_results,
-    save_channels,
+    get_sources,
+    iter_pending_chunks,
+    next_failed_retry,
     get_channels,
-    update_channel_progress,
-    get_channel_by_number,
     clear_channels,
-    get_custom_caption,
+    requeue_failed_files,
 )
-
-IST = pytz.timezone("Asia/Kolkata")
-MessageCount = 0
-BOT_STATUS = "0"
-status = set(int(x) for x in (BOT_STATUS).split())
-
-
-async def get_caption(original_caption, file_name):
-    custom_caption = await get_custom_caption()
-    if custom_caption:
-        if "{file_name}" in custom_caption:
-            return custom_caption.replace("{file_name}", file_name)
-        else:
-            return custom_caption
+from clonebot.utils.caption import get_caption_template
+from clonebot.utils.channel_plan import ChannelPlan
+from clonebot.utils.clone_engine import CloneEngine, CloneItem
+from clonebot.utils.file_refresh import file_refresher
+from clonebot.utils.jobs import (
+    CANCELLED,
+    FAILED,
+    PAUSED,
+    PENDING,
+    RESUMABLE,
+    RUNNING,
+    SLEEPING,
+    job_manager,
+)
+from clonebot.utils.journal import ProgressJournal
+from clonebot.utils.metrics import API_CALLS
+from clonebot.utils.pacing import get_pacer
+from clonebot.utils.peers import peer_cache
+from clonebot.utils.progress import ProgressReporter
+from clonebot.utils.rate_limit import get_flood_controller
+from clonebot.utils.retry import RetryWorker
+from clonebot.utils.sent_index import sent_index
+from clonebot.utils.worker_pool import ACCESS_ERRORS, WorkerPool
+
+ALBUM_SIZE = 10
+retry_worker = None
+ALBUM_MEDIA = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "audio": InputMediaAudio,
+    "document": InputMediaDocument,
+}
+
+
+async def get_caption(record):
+    template = await get_caption_template()
+    if template:
+        return template.render(record)
     else:
-        return original_caption
+        return record.caption
 
 
 @bot.on_message(filters.command("status") & filters.user(ADMINS))
 async def count(bot, message):
-    if 1 in status:
-        await message.reply_text("Currently Bot is forwarding messages.")
-    if 2 in status:
-        await message.reply_text("Now Bot is Sleeping")
-    if 1 not in status and 2 not in status:
+    await job_manager.load()
+    jobs = job_manager.live()
+    if not jobs:
         await message.reply_text("Bot is Idle now, You can start a task.")
+        return
+    text = ""
+    for job in jobs:
+        if job.state == SLEEPING:
+            text += f"Job {job.id}: Now Bot is Sleeping\n"
+        elif job.state == PAUSED:
+            text += f"Job {job.id}: Paused\n"
+        else:
+            text += f"Job {job.id}: Currently Bot is forwarding messages.\n"
+    await message.reply_text(text)
+
+
+@bot.on_message(filters.command("jobs") & filters.user(ADMINS))
+async def list_jobs(bot, message):
+    await job_manager.load()
+    if not job_manager.jobs:
+        await message.reply_text("No clone jobs.", quote=True)
+        return
+    text = "📋 **Clone Jobs:**\n\n"
+    for job in job_manager.jobs.values():
+        text += f"**Job {job.id}** - {job.state}\n"
+        if job.sources:
+            text += f"  • Sources: {', '.join(job.sources)}\n"
+        if job.plan:
+            text += f"  • Processed: {job.processed:,} (failed {job.failed:,})\n"
+            text += f"  • Speed: {job.rate:.2f} msgs/s\n"
+            for channel in job.plan.channels:
+                text += f"  • Channel {channel.channel_number} ({channel.channel_id}): {channel.processed_files:,} done, {channel.pending_files:,} pending\n"
+        if job.error:
+            text += f"  • Error: {job.error}\n"
+        text += "\n"
+    text += "Use `/pause ID`, `/resume ID`, `/cancel ID` or `/reclone ID`."
+    await message.reply_text(text, quote=True)
+
+
+async def get_job(message):
+    """The job whose id follows the command, after replying if there is none."""
+    await job_manager.load()
+    try:
+        job = job_manager.get(int(message.command[1]))
+    except (IndexError, ValueError):
+        await message.reply_text("Send the job ID too, see /jobs", quote=True)
+        return None
+    if job is None:
+        await message.reply_text("❌ No such clone job, see /jobs", quote=True)
+    return job
+
+
+@bot.on_message(filters.command(["pause", "resume", "cancel"]) & filters.user(ADMINS))
+async def control_job(bot, message):
+    job = await get_job(message)
+    if job is None:
+        return
+    action = message.command[0]
+    try:
+        if action == "pause":
+            await job.pause()
+        elif action == "resume":
+            if job.state in RESUMABLE or job.task is None:
+                await message.reply_text(
+                    f"Job {job.id} is not running, use `/reclone {job.id}`", quote=True
+                )
+                return
+            await job.resume()
+        else:
+            await job_manager.cancel(job)
+    except ValueError as e:
+        await message.reply_text(f"❌ {e}", quote=True)
+        return
+    await message.reply_text(f"Job {job.id}: {job.state}", quote=True)
+
+
+@bot.on_message(filters.command("failed") & filters.user(ADMINS))
+async def failed_files(bot, message):
+    action = message.command[1].lower() if len(message.command) > 1 else ""
+    if action == "clear":
+        cleared = await clear_failed_files()
+        await message.reply_text(f"🗑 Dropped {cleared:,} failed files.", quote=True)
+        return
+    if action == "retry":
+        requeued = await requeue_failed_files(time.time())
+        get_retry_worker().start()
+        await message.reply_text(
+            f"🔄 Retrying {requeued:,} given up files.", quote=True
+        )
+        return
+
+    counts = await count_failed_files()
+    if not counts:
+        await message.reply_text("✅ No failed files.", quote=True)
+        return
+    get_retry_worker().start()
+    total = sum(waiting + given_up for _, waiting, given_up in counts)
+    text = f"📛 **Failed Files: {total:,}**\n\n"
+    for error, waiting, given_up in counts:
+        text += f"• {error}: {waiting:,} waiting for a retry, {given_up:,} given up\n"
+    text += "\nUse `/failed retry` to retry the given up files or `/failed clear` to drop them all."
+    await message.reply_text(text, quote=True)
 
 
 @bot.on_message(filters.command("total") & filters.user(ADMINS))
@@ -80,7 +203,7 @@ async def channel_status(bot, message):
             status_text = "📊 **Channel Status:**\n\n"
             for channel in channels:
                 status_text += (
-                    f"Channel {channel.channel_number} ({channel.channel_id}):\n"
+                    f"Job {channel.job_id} Channel {channel.channel_number} ({channel.channel_id}):\n"
                 )
                 status_text += f"  • Pending: {channel.pending_files:,}\n"
                 status_text += f"  • Processed: {channel.processed_files:,}\n"
@@ -95,10 +218,17 @@ async def channel_status(bot, message):
 
 @bot.on_message(filters.command("cleardb") & filters.user(ADMINS))
 async def clrdb(bot, message):
+    await job_manager.load()
+    if job_manager.live():
+        await message.reply(
+            "❌ Clone jobs are running, cancel them first (see /jobs).", quote=True
+        )
+        return
     msg = await message.reply("Clearing files from DB...", quote=True)
     try:
         drop = await delete_files()
         cdrop = await clear_channels()
+        job_manager.forget()
         if drop and cdrop:
             LOGGER.info("Cleared DB")
             await msg.edit("Cleared DB")
@@ -120,36 +250,18 @@ async def clrdb(bot, message):
 async def forward(bot, message):
     user_id = message.from_user.id
 
-    existing_channels = await get_channels()
-    if existing_channels:
-        total_processed = sum(channel.processed_files for channel in existing_channels)
-        total_pending = sum(channel.pending_files for channel in existing_channels)
-
-        if total_pending > 0:
-            pending_text = "⚠️ **Existing Clone Task Found!**\n\n"
-            pending_text += "📊 **Task Status:**\n"
-            pending_text += f"✅ Already processed: {total_processed:,} files\n"
-            pending_text += f"⏳ Still pending: {total_pending:,} files\n\n"
-            pending_text += "📋 **Channel Distribution:**\n\n"
-
-            for channel in existing_channels:
-                if channel.pending_files > 0:
-                    pending_text += (
-                        f"Channel {channel.channel_number} ({channel.channel_id}):\n"
-                    )
-                    pending_text += f"  • Processed: {channel.processed_files:,}\n"
-                    pending_text += f"  • Pending: {channel.pending_files:,}\n\n"
-
-            pending_text += "🔄 **Options:**\n"
-            pending_text += "• Use `/reclone` to resume this task\n"
-            pending_text += "• Use `/cleardb` to clear database and start fresh\n\n"
-            pending_text += "❌ Cannot start new clone while existing task is pending!"
-
-            await message.reply_text(pending_text, quote=True)
-            return
-        else:
-            await clear_channels()
-            LOGGER.info("Cleared completed clone task from database")
+    await job_manager.load()
+    total_files = await count_unclaimed_files()
+    if total_files == 0:
+        pending_text = "❌ No new indexed files to clone!\n\n"
+        if job_manager.resumable():
+            pending_text += "Stopped clone jobs:\n"
+            for job in job_manager.resumable():
+                pending_text += f"• Job {job.id} ({job.state})\n"
+            pending_text += "\n🔄 Use `/reclone ID` to resume a job\n"
+        pending_text += "• Use /index to add files, or `/cleardb` to start fresh"
+        await message.reply_text(pending_text, quote=True)
+        return
 
     await message.reply_text(
         "Send me ID of the channel you want to clone the files/messages to",
@@ -165,12 +277,9 @@ async def forward(bot, message):
         )
         return
 
-    total_files = await count_documents()
     files_per_channel = 980000
     total_channels_needed = (total_files + files_per_channel - 1) // files_per_channel
 
-    await clear_channels()
-
     channel_data_list = []
     channel_ids = [chat.text]
 
@@ -210,6 +319,20 @@ async def forward(bot, message):
 
         await message.reply_text(distribution_text, quote=True)
 
+    saved_ids = {channel.channel_id for channel in await get_channels()}
+    busy = job_manager.busy_chats()
+    in_use = [
+        ch_id
+        for ch_id in channel_ids
+        if ch_id in saved_ids or (ch_id.lstrip("-").isdigit() and int(ch_id) in busy)
+    ]
+    if in_use:
+        await message.reply_text(
+            f"❌ {', '.join(in_use)} already used by another clone job, see /jobs",
+            quote=True,
+        )
+        return
+
     for i, ch_id in enumerate(channel_ids, 1):
         pending_files = min(
             files_per_channel, total_files - (i - 1) * files_per_channel
@@ -225,48 +348,63 @@ async def forward(bot, message):
                 }
             )
 
-    await save_channels(channel_data_list)
-    LOGGER.info(f"Saved {len(channel_data_list)} channels to database")
+    job = await job_manager.create(channel_data_list)
+    if job is None:
+        await message.reply_text("❌ Could not create the clone job", quote=True)
+        return
+    LOGGER.info(f"Saved {len(channel_data_list)} channels of job {job.id} to database")
 
-    await start_forwarding_process(bot, message, files_per_channel, user_id=user_id)
+    job_manager.start(job, start_forwarding_process(bot, message, job, user_id=user_id))
 
 
 @bot.on_message(filters.command("reclone") & filters.user(ADMINS))
 async def reclone(bot, message):
     user_id = message.from_user.id
-    channels = await get_channels()
-    if not channels:
-        await message.reply_text(
-            "❌ No saved channels found!\n\n"
-            "Use /clone to start a new clone process or ensure channels are saved in database.",
-            quote=True,
-        )
-        return
+    await job_manager.load()
+    if len(message.command) > 1:
+        job = await get_job(message)
+        if job is None:
+            return
+    else:
+        jobs = job_manager.resumable()
+        if not jobs:
+            await message.reply_text(
+                "❌ No stopped clone job found!\n\n"
+                "Use /clone to start a new clone process.",
+                quote=True,
+            )
+            return
+        if len(jobs) > 1:
+            await message.reply_text(
+                "Several clone jobs can be resumed: "
+                + ", ".join(str(job.id) for job in jobs)
+                + "\nUse `/reclone ID`.",
+                quote=True,
+            )
+            return
+        job = jobs[0]
 
-    total_files = await count_documents()
-    if total_files == 0:
-        await message.reply_text(
-            "❌ No files found in database!\n\n"
-            "Nothing to clone. Use /clone to start a new process.",
-            quote=True,
-        )
+    if job.state not in RESUMABLE:
+        await message.reply_text(f"Job {job.id} is {job.state}.", quote=True)
         return
 
-    total_processed = sum(channel.processed_files for channel in channels)
-    remaining_files = total_files - total_processed
-
-    if remaining_files <= 0:
+    channels = await get_channels(job.id)
+    total_files = await count_documents(job.start_rowid, job.end_rowid)
+    if total_files == 0:
         await message.reply_text(
             "✅ All files have already been processed!\n\n"
             "Clone process appears to be complete. Use /clone to start a new process.",
             quote=True,
         )
+        await job.set_state(RUNNING)
+        await job.finish()
         return
 
-    resume_text = "🔄 **Resuming Clone Process**\n\n"
-    resume_text += f"📊 Total files in DB: {total_files:,}\n"
+    total_processed = sum(channel.processed_files for channel in channels)
+
+    resume_text = f"🔄 **Resuming Clone Job {job.id}**\n\n"
     resume_text += f"✅ Already processed: {total_processed:,}\n"
-    resume_text += f"⏳ Remaining files: {remaining_files:,}\n\n"
+    resume_text += f"⏳ Remaining files: {total_files:,}\n\n"
     resume_text += "📋 **Channel Status:**\n\n"
 
     for channel in channels:
@@ -276,560 +414,581 @@ async def reclone(bot, message):
 
     await message.reply_text(resume_text, quote=True)
 
-    files_per_channel = 980000
-
-    await start_forwarding_process(
-        bot,
-        message,
-        files_per_channel,
-        resume=True,
-        resume_count=total_processed,
-        user_id=user_id,
+    job_manager.start(
+        job, start_forwarding_process(bot, message, job, resume=True, user_id=user_id)
     )
 
 
-async def start_forwarding_process(
-    bot, message, files_per_channel, resume=False, resume_count=0, user_id=None
-):
+async def start_forwarding_process(bot, message, job, resume=False, user_id=None):
+    if not job.claim():
+        await message.reply_text(f"Job {job.id} is already running.")
+        return
+    try:
+        await forward_job(bot, message, job, resume, user_id)
+    finally:
+        job.release()
+
+
+async def forward_job(bot, message, job, resume, user_id):
     if user_id is None:
         user_id = message.from_user.id
 
-    if 1 in status:
-        await message.reply_text("A task is already running.")
+    async def abandon():
+        # a new job that never started stays resumable with /reclone
+        if job.state == PENDING:
+            await job.set_state(CANCELLED)
+
+    try:
+        plan = await ChannelPlan.load(job.id)
+    except ValueError as e:
+        LOGGER.error(f"Wrong channel ID: {e}")
+        await abandon()
+        await message.reply_text("❌ Wrong channel ID", quote=True)
+        return
+    if not plan.channels:
+        await abandon()
+        await message.reply_text(
+            "❌ No channels found in database!\nUse /clone to start a new process.",
+            quote=True,
+        )
+        return
+    busy = job_manager.busy_chats(exclude=job) & {
+        channel.chat_id for channel in plan.channels
+    }
+    if busy:
+        await abandon()
+        await message.reply_text(
+            f"❌ Another clone job is sending to {', '.join(map(str, busy))}",
+            quote=True,
+        )
         return
-    if 2 in status:
-        await message.reply_text("Sleeping the engine for avoiding ban.")
+
+    # resolve every route up front, so a bad channel fails before the clone
+    pools = {"bot": WorkerPool(bots), "user": WorkerPool(users)}
+    unreachable = await peer_cache.warm_up(
+        pools,
+        await get_sources(job.start_rowid, job.end_rowid),
+        [channel.chat_id for channel in plan.channels],
+    )
+    if unreachable:
+        error_text = "❌ **Channel Access Error!**\n\n"
+        for (from_channel, chat_id), error in list(unreachable.items())[:10]:
+            error_text += f"• {from_channel} → {chat_id}: {type(error).__name__}\n"
+        if len(unreachable) > 10:
+            error_text += f"• ... and {len(unreachable) - 10} more\n"
+        error_text += f"\n🔧 Fix channel access and use `/reclone {job.id}`"
+        LOGGER.error(f"Clone job {job.id} cannot reach {len(unreachable)} routes")
+        await job.set_state(FAILED, error=f"{len(unreachable)} routes unreachable")
+        await message.reply_text(error_text, quote=True)
         return
 
+    job.plan = plan
+    job.processed = plan.processed
     if resume:
         strt_fwd = await message.reply_text(
-            text=f"🔄 Resuming Clone Process\nStarting from message {resume_count + 1:,}",
+            text=f"🔄 Resuming Clone Job {job.id}\nStarting from message {job.processed + 1:,}",
             quote=True,
         )
     else:
-        strt_fwd = await message.reply_text(text="🚀 Started Clone Process", quote=True)
+        strt_fwd = await message.reply_text(
+            text=f"🚀 Started Clone Job {job.id}", quote=True
+        )
 
-    global MessageCount
-    if resume:
-        MessageCount = resume_count
-
-    mcount = random.randint(10000, 15300)
-    acount = random.randint(5000, 6000)
-    bcount = random.randint(1500, 2000)
-    ccount = random.randint(250, 300)
-
-    while await count_documents() != 0:
-        data = await get_search_results()
-        for msg in data:
-            channel = msg.from_channel
-            file_id = msg.file_id
-            message_id = int(msg.message_id)
-            worker = msg.worker
-            original_caption = msg.caption
-            file_type = msg.file_type
-            file_name = msg.file_name
-            
-            caption = await get_caption(original_caption, file_name)
-
-            current_channel_num = MessageCount // files_per_channel + 1
-            current_channel = await get_channel_by_number(current_channel_num)
-            if current_channel:
-                try:
-                    chat_id = int(current_channel.channel_id)
-                except Exception as e:
-                    LOGGER.error(f"Wrong channel ID: {e}")
-                    await message.reply_text("❌ Wrong channel ID", quote=True)
-                    return
-
-                if MessageCount > 0 and MessageCount % files_per_channel == 0:
-                    next_channel = await get_channel_by_number(current_channel_num + 1)
-                    if next_channel:
-                        await message.reply_text(
-                            f"✅ Reached {MessageCount:,} messages!\nSwitching to Channel {next_channel.channel_number}: {next_channel.channel_id}",
-                            quote=True,
-                        )
-            else:
-                channels = await get_channels()
-                if channels:
-                    chat_id = int(channels[0].channel_id)
-                else:
-                    await message.reply_text(
-                        "❌ No channels found in database!\nUse /clone to start a new process.",
-                        quote=True,
-                    )
-                    return
-
-            if worker == "bot":
-                try:
-                    if file_type in ("document", "photo", "video", "audio"):
-                        try:
-                            mess = await bot.send_cached_media(
-                                chat_id=chat_id, file_id=file_id, caption=caption
-                            )
-                        except (
-                            FileReferenceExpired,
-                            FileReferenceEmpty,
-                            MediaEmpty,
-                            ValueError,
-                        ) as e:
-                            LOGGER.error(f"Invalid file_id {file_id}: {e}")
-                            try:
-                                mess = await bot.copy_message(
-                                    chat_id=chat_id,
-                                    from_chat_id=channel,
-                                    caption=caption,
-                                    message_id=message_id,
-                                )
-                            except Exception as e:
-                                LOGGER.error(f"Error: {e}")
-                    else:
-                        await bot.copy_message(
-                            chat_id=chat_id,
-                            from_chat_id=channel,
-                            caption=caption,
-                            message_id=message_id,
-                        )
-                except (
-                    ChannelInvalid,
-                    PeerIdInvalid,
-                    ChannelPrivate,
-                    UserNotParticipant,
-                ) as e:
-                    LOGGER.error(f"Channel access error for chat_id {chat_id}: {e}")
-                    try:
-                        status.remove(1)
-                    except Exception:
-                        pass
-                    try:
-                        status.remove(2)
-                    except Exception:
-                        pass
-                    
-                    current_channel_num = MessageCount // files_per_channel + 1
-                    current_channel = await get_channel_by_number(current_channel_num)
-                    channel_info = f"Channel {current_channel.channel_number} ({current_channel.channel_id})" if current_channel else f"Channel {chat_id}"
-                    
-                    error_text = "❌ **Channel Access Error!**\n\n"
-                    error_text += f"🚫 Cannot access {channel_info}\n\n"
-                    error_text += f"**Error: {e}**\n\n"
-                    error_text += "📊 **Progress saved:**\n"
-                    error_text += f"• Processed: {MessageCount:,} messages\n"
-                    error_text += f"• Stopped at: {channel_info}\n\n"
-                    error_text += "🔧 **To resume:**\n"
-                    error_text += "1. Fix channel access issues\n"
-                    error_text += "2. Use `/reclone` to continue from where stopped\n\n"
-                    error_text += "⚠️ **Clone process stopped!**"
-                    
-                    await message.reply_text(error_text, quote=True)
-                    await strt_fwd.edit(f"❌ Clone stopped due to channel access error: {channel_info}")
-                    return
-                    await asyncio.sleep(1)
-                    try:
-                        status.add(1)
-                    except Exception:
-                        pass
-                    try:
-                        status.remove(2)
-                    except Exception:
-                        pass
-                except FloodWait as e:
-                    LOGGER.warning(f"Floodwait of {e} sec")
-                    await asyncio.sleep(e.value)
-                    if file_type in ("document", "photo", "video", "audio"):
-                        try:
-                            mess = await bot.send_cached_media(
-                                chat_id=chat_id, file_id=file_id, caption=caption
-                            )
-                        except (
-                            FileReferenceExpired,
-                            FileReferenceEmpty,
-                            MediaEmpty,
-                            ValueError,
-                        ) as e:
-                            LOGGER.error(
-                                f"Invalid file_id {file_id} after FloodWait: {e}"
-                            )
-                            continue
-                    else:
-                        await bot.copy_message(
-                            chat_id=chat_id,
-                            from_chat_id=channel,
-                            caption=caption,
-                            message_id=message_id,
-                        )
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    LOGGER.error(f"Unexpected error: {e}")
-                await delete_data(file_id, channel, message_id)
-                await asyncio.sleep(1)
-                MessageCount += 1
-
-                current_channel_num = (MessageCount - 1) // files_per_channel + 1
-                current_channel = await get_channel_by_number(current_channel_num)
-                if current_channel:
-                    await update_channel_progress(current_channel.channel_id, 1)
-                try:
-                    datetime_ist = datetime.now(IST)
-                    ISTIME = datetime_ist.strftime("%I:%M:%S %p - %d %B %Y")
-                    if MessageCount % 100 == 0:
-                        current_channel_num = MessageCount // files_per_channel + 1
-                        current_channel = await get_channel_by_number(
-                            current_channel_num
+    duplicates = 0
+
+    async def queue_rows(channel):
+        nonlocal duplicates
+        seq = 0
+        batch = []
+
+        async def flush():
+            captions = [None] * len(batch)
+            if batch[0].file_type != "messages":
+                captions = [
+                    await get_caption(record)
+                    for record in batch
+                ]
+            return CloneItem(
+                seq=seq - len(batch),
+                chat_id=channel.chat_id,
+                channel_id=channel.channel_id,
+                worker=batch[0].worker,
+                records=tuple(batch),
+                captions=tuple(captions),
+            )
+
+        async for chunk in iter_pending_chunks(
+            cursor_id=channel.chat_id,
+            start_rowid=channel.start_rowid,
+            end_rowid=channel.end_rowid,
+        ):
+            journal.read(channel.chat_id, chunk)
+            claimed = set()
+            for msg in await sent_index.claim(channel.chat_id, chunk):
+                claims[msg.rowid] = (channel.chat_id, msg)
+                claimed.add(msg.rowid)
+            for msg in chunk:
+                if msg.rowid not in claimed:
+                    # already in this destination, from an earlier clone or
+                    # run, or the same media came earlier in this one
+                    duplicates += 1
+                    job.processed += 1
+                    await journal.record((msg,), channel.channel_id)
+                    continue
+
+                if batch and not (
+                    msg.from_channel == batch[0].from_channel
+                    and msg.worker == batch[0].worker
+                    and (
+                        (
+                            batch[0].file_type == "messages"
+                            and msg.file_type == "messages"
+                            and len(batch) < CLONE_BATCH_SIZE
                         )
-                        if current_channel:
-                            channel_info = f"{current_channel.channel_number} ({current_channel.channel_id})"
-                            pending_info = f"Pending: {current_channel.pending_files:,}"
-                        else:
-                            channel_info = "Unknown"
-                            pending_info = "Pending: N/A"
-
-                        await strt_fwd.edit(
-                            text=f"Total Forwarded : `{MessageCount}`\nForwarded Using: Bot\nCurrent Channel: {channel_info}\n{pending_info}\nLast Forwarded at {ISTIME}"
+                        or (
+                            batch[0].media_group_id
+                            and msg.media_group_id == batch[0].media_group_id
+                            and len(batch) < ALBUM_SIZE
                         )
-                    LOGGER.info(
-                        "Total Forwarded : %s, Forwarded Using: Bot, Last Forwarded at %s",
-                        MessageCount,
-                        ISTIME,
                     )
-                except Exception as e:
-                    LOGGER.error(e)
-                    await message.reply_text(f"Error:\n{e}")
-            elif worker == "user":
-                channel = int(channel)
-                if mcount:
-                    if acount:
-                        if bcount:
-                            if ccount:
-                                try:
-                                    if file_type in ("document", "photo", "video", "audio"):
-                                        try:
-                                            await user.send_cached_media(
-                                                chat_id=chat_id,
-                                                file_id=file_id,
-                                                caption=caption,
-                                            )
-                                        except (
-                                            FileReferenceExpired,
-                                            FileReferenceEmpty,
-                                            MediaEmpty,
-                                        ):
-                                            try:
-                                                await send_user_message(
-                                                    message,
-                                                    channel,
-                                                    message_id,
-                                                    file_type,
-                                                    chat_id,
-                                                    caption,
-                                                    user_id,
-                                                )
-                                            except (
-                                                ChannelInvalid,
-                                                PeerIdInvalid,
-                                                ChannelPrivate,
-                                                UserNotParticipant,
-                                            ) as e:
-                                                raise e
-                                        except Exception as e:
-                                            LOGGER.error(e)
-                                            await message.reply_text(f"Error:\n{e}")
-                                    else:
-                                        try:
-                                            await user.copy_message(
-                                                chat_id=chat_id,
-                                                from_chat_id=channel,
-                                                caption=caption,
-                                                message_id=message_id,
-                                            )
-                                        except Exception as e:
-                                            LOGGER.error(e)
-                                            await message.reply_text(f"Error:\n{e}")
-                                except (
-                                    ChannelInvalid,
-                                    PeerIdInvalid,
-                                    ChannelPrivate,
-                                    UserNotParticipant,
-                                ) as e:
-                                    LOGGER.error(f"Channel access error for chat_id {chat_id}: {e}")
-                                    try:
-                                        status.remove(1)
-                                    except Exception:
-                                        pass
-                                    try:
-                                        status.remove(2)
-                                    except Exception:
-                                        pass
-                                    
-                                    current_channel_num = MessageCount // files_per_channel + 1
-                                    current_channel = await get_channel_by_number(current_channel_num)
-                                    channel_info = f"Channel {current_channel.channel_number} ({current_channel.channel_id})" if current_channel else f"Channel {chat_id}"
-                                    
-                                    error_text = "❌ **Channel Access Error!**\n\n"
-                                    error_text += f"🚫 Cannot access {channel_info}\n\n"
-                                    error_text += f"**Error: {e}**\n\n"
-                                    error_text += "📊 **Progress saved:**\n"
-                                    error_text += f"• Processed: {MessageCount:,} messages\n"
-                                    error_text += f"• Stopped at: {channel_info}\n\n"
-                                    error_text += "🔧 **To resume:**\n"
-                                    error_text += "1. Fix channel access issues\n"
-                                    error_text += "2. Use `/reclone` to continue from where stopped\n\n"
-                                    error_text += "⚠️ **Clone process stopped!**"
-                                    
-                                    await message.reply_text(error_text, quote=True)
-                                    await strt_fwd.edit(f"❌ Clone stopped due to channel access error: {channel_info}")
-                                    return
-                                await delete_data(file_id, channel, message_id)
-                                try:
-                                    status.add(1)
-                                except Exception:
-                                    pass
-                                try:
-                                    status.remove(2)
-                                except Exception:
-                                    pass
-
-                                mcount -= 1
-                                ccount -= 1
-                                acount -= 1
-                                bcount -= 1
-                                MessageCount += 1
-
-                                current_channel_num = (
-                                    MessageCount - 1
-                                ) // files_per_channel + 1
-                                current_channel = await get_channel_by_number(
-                                    current_channel_num
-                                )
-                                if current_channel:
-                                    await update_channel_progress(
-                                        current_channel.channel_id, 1
-                                    )
-                                mainsleep = random.randint(3, 8)
-                                try:
-                                    datetime_ist = datetime.now(IST)
-                                    ISTIME = datetime_ist.strftime(
-                                        "%I:%M:%S %p - %d %B %Y"
-                                    )
-                                    if MessageCount % 100 == 0:
-                                        current_channel_num = (
-                                            MessageCount // files_per_channel + 1
-                                        )
-                                        current_channel = await get_channel_by_number(
-                                            current_channel_num
-                                        )
-                                        if current_channel:
-                                            channel_info = f"{current_channel.channel_number} ({current_channel.channel_id})"
-                                            pending_info = f"Pending: {current_channel.pending_files:,}"
-                                        else:
-                                            channel_info = "Unknown"
-                                            pending_info = "Pending: N/A"
-
-                                        await strt_fwd.edit(
-                                            text=f"Total Forwarded : `{MessageCount}`\nForwarded Using: User\nCurrent Channel: {channel_info}\n{pending_info}\nSleeping for `{mainsleep}` Seconds\nLast Forwarded at `{ISTIME}`"
-                                        )
-                                    LOGGER.info(
-                                        "Total Forwarded : %s, Forwarded Using: User, Sleeping for %s Seconds, Last Forwarded at %s",
-                                        MessageCount,
-                                        mainsleep,
-                                        ISTIME,
-                                    )
-                                except FloodWait as e:
-                                    LOGGER.warning(f"Floodwait of {e} sec")
-                                    await asyncio.sleep(e.value)
-                                except Exception as e:
-                                    LOGGER.error(e)
-                                await asyncio.sleep(mainsleep)
-                            else:
-                                try:
-                                    status.add(2)
-                                except Exception:
-                                    pass
-                                try:
-                                    status.remove(1)
-                                except Exception:
-                                    pass
-                                csleep = random.randint(250, 500)
-                                try:
-                                    datetime_ist = datetime.now(IST)
-                                    ISTIME = datetime_ist.strftime(
-                                        "%I:%M:%S %p - %d %B %Y"
-                                    )
-                                    await strt_fwd.edit(
-                                        text=f"You have send {MessageCount} messages.\nWaiting for {csleep} Seconds.\nLast Forwarded at {ISTIME}"
-                                    )
-                                    LOGGER.info(
-                                        "Total Forwarded : %s, Waiting for %s Seconds, Last Forwarded at %s",
-                                        MessageCount,
-                                        csleep,
-                                        ISTIME,
-                                    )
-                                except Exception as e:
-                                    LOGGER.error(e)
-                                    await message.reply_text(f"Error:\n{e}")
-
-                                await asyncio.sleep(csleep)
-                                ccount = random.randint(250, 300)
-                                await strt_fwd.edit(f"Starting after {csleep}")
-                                LOGGER.info("Starting after %s minutes", csleep / 60)
-                        else:
-                            try:
-                                status.add(2)
-                            except Exception:
-                                pass
-                            try:
-                                status.remove(1)
-                            except Exception:
-                                pass
-                            bsl = random.randint(1000, 1200)
-                            try:
-                                datetime_ist = datetime.now(IST)
-                                ISTIME = datetime_ist.strftime("%I:%M:%S %p - %d %B %Y")
-                                await strt_fwd.edit(
-                                    text=f"You have send {MessageCount} messages.\nWaiting for {bsl} seconds.\nLast Forwarded at {ISTIME}"
-                                )
-                                LOGGER.info(
-                                    "Total Forwarded : %s, Waiting for %s Seconds, Last Forwarded at %s",
-                                    MessageCount,
-                                    bsl,
-                                    ISTIME,
-                                )
-                            except Exception as e:
-                                LOGGER.error(e)
-                                await message.reply_text(f"Error:\n{e}")
-
-                            await asyncio.sleep(bsl)
-                            bcount = random.randint(1500, 2000)
-                            await strt_fwd.edit(f"Starting after {bsl}")
-                            LOGGER.info("Starting after %s minutes", bsl / 60)
-                    else:
-                        try:
-                            status.add(2)
-                        except Exception:
-                            pass
-                        try:
-                            status.remove(1)
-                        except Exception:
-                            pass
-                        asl = random.randint(1500, 2000)
-                        try:
-                            datetime_ist = datetime.now(IST)
-                            ISTIME = datetime_ist.strftime("%I:%M:%S %p - %d %B %Y")
-                            await strt_fwd.edit(
-                                text=f"You have send {MessageCount} messages.\nWaiting for {asl} seconds.\nLast Forwarded at {ISTIME}"
-                            )
-                            LOGGER.info(
-                                "Total Forwarded : %s, Waiting for %s Seconds, Last Forwarded at %s",
-                                MessageCount,
-                                asl,
-                                ISTIME,
-                            )
-                        except Exception as e:
-                            LOGGER.error(e)
-                            await message.reply_text(f"Error:\n{e}")
-
-                        await asyncio.sleep(asl)
-                        acount = random.randint(5000, 6000)
-                        await strt_fwd.edit(f"Starting after {asl}")
-                        LOGGER.info("Starting after %s minutes", asl / 60)
-                else:
-                    try:
-                        status.add(2)
-                    except Exception:
-                        pass
-                    try:
-                        status.remove(1)
-                    except Exception:
-                        pass
-                    msl = random.randint(2000, 3000)
-                    try:
-                        datetime_ist = datetime.now(IST)
-                        ISTIME = datetime_ist.strftime("%I:%M:%S %p - %d %B %Y")
-                        await strt_fwd.edit(
-                            text=f"You have send {MessageCount} messages.\nWaiting for {msl} seconds.\nLast Forwarded at {ISTIME}"
-                        )
-                        LOGGER.info(
-                            "Total Forwarded : %s, Waiting for %s Seconds, Last Forwarded at %s",
-                            MessageCount,
-                            msl,
-                            ISTIME,
-                        )
-                    except Exception as e:
-                        LOGGER.error(e)
-                        await message.reply_text(f"Error:\n{e}")
+                ):
+                    yield await flush()
+                    batch = []
+
+                if (
+                    msg.file_type == "messages" and CLONE_BATCH_SIZE > 1
+                ) or msg.media_group_id:
+                    batch.append(msg)
+                    seq += 1
+                    continue
+
+                yield CloneItem(
+                    seq=seq,
+                    chat_id=channel.chat_id,
+                    channel_id=channel.channel_id,
+                    worker=msg.worker,
+                    records=(msg,),
+                    captions=(await get_caption(msg),),
+                )
+                seq += 1
+
+        if batch:
+            yield await flush()
+
+    async def clone_pass():
+        if CLONE_DISTRIBUTION == "parallel":
+            await engine.run(*(queue_rows(channel) for channel in plan.channels))
+            return
+        for channel in plan.channels:
+            if channel.pending_files <= 0 and channel.end_rowid is not None:
+                continue
+            if channel is not plan.channels[0] and channel.processed_files == 0:
+                await message.reply_text(
+                    f"✅ Reached {job.processed:,} messages!\nSwitching to Channel {channel.channel_number}: {channel.channel_id}",
+                    quote=True,
+                )
+            await engine.run(queue_rows(channel))
+
+    # Files id -> error of the rows whose send failed, until row_done
+    failures = {}
+    # Files id -> (chat_id, record) of the rows claimed in the SentIndex,
+    # until they are sent or row_done gives them up
+    claims = {}
+
+    async def save_sent(item):
+        for record in item.records:
+            claims.pop(record.rowid, None)
+        await sent_index.save(item.chat_id, item.records)
+
+    async def send_single(item, client):
+        try:
+            if item.worker == "bot":
+                await send_bot_row(item, client)
+            elif item.worker == "user":
+                await send_user_row(item, client)
+            else:
+                raise ValueError(f"Unknown worker {item.worker}")
+        except (FloodWait, *ACCESS_ERRORS):
+            raise
+        except Exception as e:
+            LOGGER.error(f"Could not clone {item.record.file_id}: {e}")
+            failures[item.record.rowid] = e
+            return False
+        await save_sent(item)
+        return True
+
+    async def send_row(item, client):
+        if len(item.records) == 1:
+            return await send_single(item, client)
+        if item.record.file_type == "messages":
+            sent = await send_batch(item, client)
+        else:
+            sent = await send_album(item, client)
+        if sent:
+            await save_sent(item)
+            return True
+
+        controller = get_flood_controller(client)
+        ok = True
+        for record, caption in zip(item.records, item.captions):
+            ok &= await controller.call(
+                send_single,
+                item._replace(records=(record,), captions=(caption,)),
+                client,
+            )
+        return ok
+
+    async def row_done(item, ok):
+        count = len(item.records)
+        job.processed += count
+        failed = []
+        if not ok:
+            for record, caption in zip(item.records, item.captions):
+                error = failures.pop(record.rowid, None)
+                if error is None and count > 1:
+                    # sent on its own after the group send failed
+                    continue
+                failed.append(
+                    (
+                        record,
+                        caption,
+                        item.channel_id,
+                        job.id,
+                        type(error).__name__ if error else "SendFailed",
+                        retries.next_retry(1),
+                    )
+                )
+            job.failed += len(failed)
+        for record, *_ in failed:
+            claims.pop(record.rowid, None)
+        sent_index.release(item.chat_id, [record for record, *_ in failed])
+        await journal.record(item.records, item.channel_id, failed)
+        if failed:
+            retries.start()
+
+        current_channel = plan.get(item.channel_id)
+        if current_channel:
+            channel_info = f"{current_channel.channel_number} ({current_channel.channel_id})"
+            pending_info = f"Pending: {current_channel.pending_files:,}"
+        else:
+            channel_info = "Unknown"
+            pending_info = "Pending: N/A"
+        progress.update(
+            f"Job {job.id}\nTotal Forwarded : `{job.processed}`\nForwarded Using: {item.worker.title()}\nCurrent Channel: {channel_info}\n{pending_info}\nSpeed: `{engine.rate:.2f}` msgs/s",
+            footer="Last Forwarded at {}",
+        )
+        if job.processed // 100 != (job.processed - count) // 100:
+            LOGGER.info(
+                "Job %s: Total Forwarded : %s, Forwarded Using: %s",
+                job.id,
+                job.processed,
+                item.worker.title(),
+            )
 
-                    await asyncio.sleep(msl)
-                    mcount = random.randint(10000, 15300)
-                    await strt_fwd.edit(f"Starting after {msl}")
-                    LOGGER.info("Starting after %s minutes", msl / 60)
+    progress = ProgressReporter(strt_fwd, bot)
+    engine = CloneEngine(
+        send_row,
+        on_done=row_done,
+        pools=pools,
+        pacers={"user": get_pacer},
+        on_pause=partial(pause_status, job, progress),
+        on_resume=partial(resume_status, job, progress),
+        gate=job.gate,
+    )
+    job.engine = engine
 
+    retries = get_retry_worker()
+    journal = ProgressJournal(plan)
+    journal.start()
+    await job.set_state(RUNNING)
     try:
-        LOGGER.info("Finished: Total Forwarded : %s", MessageCount)
+        while await count_documents(job.start_rowid, job.end_rowid) != 0:
+            before = engine.sent + engine.failed + duplicates
+            await clone_pass()
+            journal.rewind()
+            await journal.flush()
+            if engine.sent + engine.failed + duplicates == before:
+                raise RuntimeError("Clone pass made no progress, stopping")
+    except ACCESS_ERRORS as e:
+        await progress.close()
+        current_channel = plan.by_chat_id(engine.error_chat_id)
+        channel_info = f"Channel {current_channel.channel_number} ({current_channel.channel_id})" if current_channel else "Channel Unknown"
+        LOGGER.error(f"Channel access error for {channel_info}: {e}")
+
+        error_text = "❌ **Channel Access Error!**\n\n"
+        error_text += f"🚫 Cannot access {channel_info}\n\n"
+        error_text += f"**Error: {e}**\n\n"
+        error_text += "📊 **Progress saved:**\n"
+        error_text += f"• Processed: {job.processed:,} messages\n"
+        error_text += f"• Stopped at: {channel_info}\n\n"
+        error_text += "🔧 **To resume:**\n"
+        error_text += "1. Fix channel access issues\n"
+        error_text += f"2. Use `/reclone {job.id}` to continue from where stopped\n\n"
+        error_text += "⚠️ **Clone process stopped!**"
+
+        await job.set_state(FAILED, error=f"{channel_info}: {e}")
+        await message.reply_text(error_text, quote=True)
+        await strt_fwd.edit(f"❌ Clone stopped due to channel access error: {channel_info}")
+        return
+    except asyncio.CancelledError:
+        LOGGER.info("Clone job %s cancelled", job.id)
+        raise
+    except Exception as e:
+        await progress.close()
+        LOGGER.error(f"Clone job {job.id} failed: {e}")
+        await job.set_state(FAILED, error=str(e))
+        await message.reply_text(f"Error:\n{e}")
+        return
+    finally:
+        await progress.close()
+        await journal.close()
+        # rows claimed but not sent, e.g. when the job was stopped
+        for chat_id, record in claims.values():
+            sent_index.release(chat_id, (record,))
+        await sent_index.flush()
+        job.engine = None
+        if job.failed:
+            retries.start()
 
-        channels = await get_channels()
-        if len(channels) > 1:
-            distribution_text = f"✅ Successfully Forwarded {MessageCount:,} messages\n\n📊 **Final Distribution:**\n\n"
+    try:
+        LOGGER.info(
+            "Finished job %s: Total Forwarded : %s, Skipped duplicates: %s, Speed: %.2f msgs/s",
+            job.id,
+            job.processed,
+            duplicates,
+            engine.rate,
+        )
+        skipped_text = (
+            f"\n♻️ Skipped {duplicates:,} already sent" if duplicates else ""
+        )
 
-            for channel in channels:
+        if len(plan.channels) > 1:
+            distribution_text = f"✅ Successfully Forwarded {job.processed:,} messages{skipped_text}\n\n📊 **Final Distribution:**\n\n"
+
+            for channel in plan.channels:
                 if channel.processed_files > 0:
                     distribution_text += f"Channel {channel.channel_number} ({channel.channel_id}): {channel.processed_files:,} messages\n"
 
             await strt_fwd.edit(text=distribution_text)
         else:
             await strt_fwd.edit(
-                text=f"✅ Successfully Forwarded {MessageCount:,} messages"
+                text=f"✅ Successfully Forwarded {job.processed:,} messages{skipped_text}"
             )
     except Exception as e:
         LOGGER.error(e)
         await message.reply_text(f"Error:\n{e}")
 
-    try:
-        status.remove(1)
-    except Exception:
-        pass
-    try:
-        status.remove(2)
-    except Exception:
-        pass
+    await job.finish()
+    LOGGER.info("Cleared channels of job %s from database after clone completion", job.id)
 
-    await clear_channels()
-    LOGGER.info("Cleared channels from database after clone completion")
 
-    MessageCount = 0
+async def pause_status(job, progress, seconds):
+    await job.sleep()
+    progress.update(
+        f"You have send {job.processed} messages.\nWaiting for {seconds:.0f} seconds.",
+        footer="Last Forwarded at {}",
+    )
+    LOGGER.info(
+        "Job %s: Total Forwarded : %s, Waiting for %s Seconds",
+        job.id,
+        job.processed,
+        seconds,
+    )
 
 
-async def send_user_message(
-    message, channel, message_id, file_type, chat_id, caption, user_id
-):
+async def resume_status(job, progress, seconds):
+    await job.wake()
+    progress.update(f"Starting after {seconds:.0f}")
+    LOGGER.info("Starting after %s minutes", seconds / 60)
+
+
+async def send_cached_file(client, chat_id, record, caption):
+    """send_cached_media with the freshest file id of ``record``; an expired
+    file reference is renewed once, together with the rows after it."""
     try:
-        fetch = await user.get_messages(channel, int(message_id))
-        LOGGER.info("Fetching file from channel.")
-        try:
-            for file_type in ("document", "photo", "video", "audio"):
-                media = getattr(fetch, file_type, None)
-                if media is not None:
-                    file_idn = media.file_id
-                    break
-            await user.send_cached_media(
-                chat_id=chat_id, file_id=file_idn, caption=caption
+        with API_CALLS.time(method="send_cached_media"):
+            await client.send_cached_media(
+                chat_id=chat_id, file_id=file_refresher.file_id(record), caption=caption
             )
+    except FileReferenceExpired:
+        file_id = await file_refresher.refresh(record, client)
+        if file_id is None:
+            raise
+        with API_CALLS.time(method="send_cached_media"):
+            await client.send_cached_media(
+                chat_id=chat_id, file_id=file_id, caption=caption
+            )
+
+
+async def bot_send(client, chat_id, record, caption):
+    if record.file_type in ("document", "photo", "video", "audio"):
+        try:
+            await send_cached_file(client, chat_id, record, caption)
         except (
-            ChannelInvalid,
-            PeerIdInvalid,
-            ChannelPrivate,
-            UserNotParticipant,
+            FileReferenceExpired,
+            FileReferenceEmpty,
+            MediaEmpty,
+            ValueError,
         ) as e:
-            LOGGER.error(f"Channel access error in send_user_message for chat_id {chat_id}: {e}")
-            raise e
-        except Exception as e:
-            LOGGER.error(e)
-            await message.reply_text(f"Error:\n{e}")
-    except (
-        ChannelInvalid,
-        PeerIdInvalid,
-        ChannelPrivate,
-        UserNotParticipant,
-    ):
+            LOGGER.error(f"Invalid file_id {record.file_id}: {e}")
+            with API_CALLS.time(method="copy_message"):
+                await client.copy_message(
+                    chat_id=chat_id,
+                    from_chat_id=record.from_channel,
+                    caption=caption,
+                    message_id=int(record.message_id),
+                )
+    else:
+        with API_CALLS.time(method="copy_message"):
+            await client.copy_message(
+                chat_id=chat_id,
+                from_chat_id=record.from_channel,
+                caption=caption,
+                message_id=int(record.message_id),
+            )
+    return True
+
+
+async def send_album(item, client):
+    """Clone an indexed album with one send_media_group call."""
+    try:
+        media = [
+            ALBUM_MEDIA[record.file_type](
+                file_refresher.file_id(record), caption=caption or ""
+            )
+            for record, caption in zip(item.records, item.captions)
+        ]
+    except KeyError:
+        return False
+    try:
+        with API_CALLS.time(method="send_media_group"):
+            await client.send_media_group(chat_id=item.chat_id, media=media)
+        return True
+    except (FloodWait, *ACCESS_ERRORS):
         raise
     except Exception as e:
-        LOGGER.error(e)
-        await message.reply_text(f"Error:\n{e}")
+        LOGGER.error(
+            f"Album {item.record.media_group_id} could not be sent as a group, sending items one by one: {e}"
+        )
+        return False
+
+
+async def send_batch(item, client):
+    """Clone consecutive text messages of one source chat with a single call."""
+    message_ids = [int(record.message_id) for record in item.records]
+    try:
+        with API_CALLS.time(method="forward_messages"):
+            await client.forward_messages(
+                chat_id=item.chat_id,
+                from_chat_id=int(item.record.from_channel),
+                message_ids=message_ids,
+                send_copy=True,
+            )
+        return True
+    except (FloodWait, *ACCESS_ERRORS):
+        raise
+    except Exception as e:
+        LOGGER.error(
+            f"Batch copy of {len(message_ids)} messages failed, copying one by one: {e}"
+        )
+        return False
+
+
+async def send_bot_row(item, client):
+    return await bot_send(client, item.chat_id, item.record, item.caption)
+
+
+async def send_user_row(item, client):
+    record = item.record
+    chat_id = item.chat_id
+    channel = int(record.from_channel)
+    message_id = int(record.message_id)
+    if record.file_type in ("document", "photo", "video", "audio"):
+        try:
+            await send_cached_file(client, chat_id, record, item.caption)
+            return True
+        except (
+            FileReferenceExpired,
+            FileReferenceEmpty,
+            MediaEmpty,
+        ):
+            return await send_user_message(
+                client, channel, message_id, chat_id, item.caption
+            )
+    with API_CALLS.time(method="copy_message"):
+        await client.copy_message(
+            chat_id=chat_id,
+            from_chat_id=channel,
+            caption=item.caption,
+            message_id=message_id,
+        )
+    return True
+
+
+async def send_user_message(client, channel, message_id, chat_id, caption):
+    with API_CALLS.time(method="get_messages"):
+        fetch = await client.get_messages(channel, int(message_id))
+    for file_type in ("document", "photo", "video", "audio"):
+        media = getattr(fetch, file_type, None)
+        if media is not None:
+            break
+    else:
+        raise MediaEmpty()
+    with API_CALLS.time(method="send_cached_media"):
+        await client.send_cached_media(
+            chat_id=chat_id, file_id=media.file_id, caption=caption
+        )
+    return True
+
+
+async def send_failed_row(row, client):
+    """Send a FailedFiles row again, for the RetryWorker."""
+    record = FileRecord(
+        row.file_rowid,
+        row.file_name,
+        row.file_id,
+        row.from_channel,
+        row.file_type,
+        row.message_id,
+        row.use,
+        row.worker,
+        row.caption,
+        row.media_group_id,
+    )
+    item = CloneItem(
+        seq=0,
+        chat_id=int(row.channel_id),
+        channel_id=row.channel_id,
+        worker=row.worker,
+        records=(record,),
+        captions=(row.caption,),
+    )
+    if not await sent_index.claim(item.chat_id, item.records):
+        # sent by now, or being sent by a clone job
+        return True
+    try:
+        if row.worker == "user":
+            await send_user_row(item, client)
+        else:
+            await send_bot_row(item, client)
+    except BaseException:
+        sent_index.release(item.chat_id, item.records)
+        raise
+    await sent_index.save(item.chat_id, item.records)
+    return True
+
+
+async def start_retry_worker():
+    """Start the RetryWorker at startup if failed files wait for a retry."""
+    if await next_failed_retry() is not None:
+        get_retry_worker().start()
+
+
+def get_retry_worker():
+    global retry_worker
+    if retry_worker is None:
+        retry_worker = RetryWorker(
+            send_failed_row,
+            {"bot": WorkerPool(bots), "user": WorkerPool(users)},
+        )
+    return retry_worker
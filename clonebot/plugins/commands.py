@@ -29,6 +29,8 @@ from clonebot.db.clone_sql import (
     remove_custom_caption,
     get_custom_caption,
 )
+from clonebot.utils import metrics
+from clonebot.utils.caption import invalidate_caption_cache
 from clonebot.utils.util_support import humanbytes
 
 
@@ -105,6 +107,7 @@ async def set_custom_caption(bot, message):
             "Reply to a message with `/setcaption`\n\n"
             "**Features:**\n"
             "• Use `{file_name}` filename\n"
+            "• Use `{file_type}`, `{message_id}` or `{caption}` (original caption)\n"
             "• Applies to all media files during clone\n\n"
             "**Example:**\n"
             "`📁 **File:** {file_name}`\n"
@@ -126,6 +129,7 @@ async def set_custom_caption(bot, message):
         return
 
     success = await save_custom_caption(caption_html)
+    invalidate_caption_cache()
 
     if success:
         preview_text = "✅ **Custom Caption Saved!**\n\n"
@@ -144,6 +148,7 @@ async def set_custom_caption(bot, message):
 @bot.on_message(filters.command("removecaption") & filters.user(ADMINS))
 async def remove_caption_cmd(bot, message):
     success = await remove_custom_caption()
+    invalidate_caption_cache()
     if success:
         await message.reply_text(
             "✅ **Custom caption removed!**\n\nOriginal captions will be used during clone.",
@@ -164,7 +169,8 @@ async def show_caption_cmd(bot, message):
         preview_text = "📋 **Current Custom Caption:**\n\n"
         preview_text += f"{caption_html}\n\n"
         preview_text += (
-            "**Placeholder:** `{file_name}` will be replaced with actual filename\n\n"
+            "**Placeholders:** `{file_name}`, `{file_type}`, `{message_id}` and `{caption}` "
+            "will be replaced with the values of each cloned file\n\n"
         )
         preview_text += "**Commands:**\n"
         preview_text += "• `/setcaption` - Update custom caption\n"
@@ -223,7 +229,7 @@ async def server_stats(bot, update):
     used_disk = disk_usage("/").percent
     db_size = "SQLite"
 
-    stats_msg = f"--**BOT STATS**--\n`Ping: {ping}`\n\n--**SERVER DETAILS**--\n`Disk Total/Used/Free: {total}/{used}/{free}\nDisk usage: {used_disk}%\nRAM Total/Used/Free: {t_ram}/{u_ram}/{f_ram}\nRAM Usage: {ram_usage}%\nCPU Usage: {cpu_usage}%`\n\n--**DATABASE DETAILS**--\n`{db_size}`"
+    stats_msg = f"--**BOT STATS**--\n`Ping: {ping}`\n\n--**SERVER DETAILS**--\n`Disk Total/Used/Free: {total}/{used}/{free}\nDisk usage: {used_disk}%\nRAM Total/Used/Free: {t_ram}/{u_ram}/{f_ram}\nRAM Usage: {ram_usage}%\nCPU Usage: {cpu_usage}%`\n\n--**DATABASE DETAILS**--\n`{db_size}`\n\n--**CLONE METRICS**--\n`{metrics.summary()}`"
     try:
         await sts.edit(stats_msg)
     except Exception as e:
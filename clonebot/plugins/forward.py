@@ -3,52 +3,65 @@
 # This file is part of clonebot.
 
 import asyncio
-from sqlite3 import OperationalError
 
 from pyrogram import filters
-from pyrogram.errors import FloodWait
 from pyrogram.types import LinkPreviewOptions
 
 from __main__ import bot
-from clonebot.db.forward_sql import (
-    get_dest_by_source,
-    get_source_channels,
-    init_database,
-)
+from clonebot import LOGGER
+from clonebot.db.forward_sql import get_all_chats
+from clonebot.utils.metrics import API_CALLS
+from clonebot.utils.peers import peer_cache
+from clonebot.utils.rate_limit import get_flood_controller
 
-SOURCE_CHATS = []
+# source chat -> destination chats the bot can send to
+ROUTES = {}
 file_groups = []
 
 
+async def get_routes():
+    """Map every source of the chats table to its usable destinations."""
+    routes = {}
+    for source, destination in await get_all_chats():
+        source, destination = int(source), int(destination)
+        if not (await peer_cache.check(bot, source)).can_read:
+            LOGGER.warning(f"Cannot read forward source {source}")
+            continue
+        access = await peer_cache.check(bot, destination)
+        if not access.can_send:
+            LOGGER.warning(f"Cannot forward {source} to {destination}: {access.error}")
+            continue
+        routes.setdefault(source, []).append(destination)
+    return routes
+
+
+async def refresh_routes():
+    global ROUTES
+    ROUTES = await get_routes()
+    return ROUTES
+
+
 async def get_source():
-    global SOURCE_CHATS
     while True:
         try:
-            SOURCE_CHATS = await get_source_channels()
-        except OperationalError:
-            init_database()
+            await refresh_routes()
+        except Exception as e:
+            LOGGER.error(f"Error loading forward chats: {e}")
         await asyncio.sleep(60)
 
     
 @bot.on_message((filters.group | filters.channel), group=1)
 async def file_copier(bot, message):
-    curr_chat = message.chat.id
-    if curr_chat in SOURCE_CHATS:
-        dest_chats = await get_dest_by_source(curr_chat)
-        
-        for chat in dest_chats: 
-            await copy_message(message, chat)
-        
+    for chat in ROUTES.get(message.chat.id, ()):
+        await copy_message(message, chat)
 
 
 async def copy_message(message, chat_id):
     mess = message
     mess.link_preview_options = LinkPreviewOptions(is_disabled=True)
-    try:
-        await mess.copy(chat_id)
-    except FloodWait as e:
-        await asyncio.sleep(e.value + 1)
-        await copy_message(message, chat_id)
+    await get_flood_controller(bot).call(
+        API_CALLS.timed(mess.copy, method="copy_message"), chat_id
+    )
     await asyncio.sleep(1)
 
 
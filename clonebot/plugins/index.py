@@ -3,16 +3,13 @@
 # This file is part of clonebot.
 
 import asyncio
-from datetime import datetime
 from typing import AsyncGenerator, Union
 
-import pytz
 from pyrogram import filters, types
 from pyrogram.enums import ChatMemberStatus, MessageMediaType
 from pyrogram.errors import (
     ChannelInvalid,
     ChannelPrivate,
-    FloodWait,
     PeerIdInvalid,
 )
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
@@ -22,12 +19,22 @@ from clonebot import ADMINS, LOGGER, SESSION
 
 from clonebot.db.clone_sql import save_data_batch
 from clonebot.utils.file_support import unpack_new_file_id
+from clonebot.utils.index_report import IndexReport
+from clonebot.utils.metrics import API_CALLS
+from clonebot.utils.progress import ProgressReporter
+from clonebot.utils.rate_limit import get_flood_controller
 
 lock = asyncio.Lock()
 limit_no = ""
 skip_no = ""
 index_task = None
-IST = pytz.timezone("Asia/Kolkata")
+CANCEL_BUTTON = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Cancel", callback_data="cancel_index"),
+        ]
+    ]
+)
 
 
 @bot.on_message(filters.private & filters.command(["index"]) & filters.user(ADMINS))
@@ -309,18 +316,11 @@ async def category_handler(bot, query):
     skip_no = int(data[4])
     limit_no = int(data[5])
     global index_task
-    kb = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("Cancel", callback_data="cancel_index"),
-            ]
-        ]
-    )
 
     mess = query.message
     indx_strt = await mess.edit(
-        "Indexing Started...\nCount will be updated after every 250 files.",
-        reply_markup=kb,
+        "Indexing Started...\nCount will be updated every few seconds.",
+        reply_markup=CANCEL_BUTTON,
     )
 
     index_task = asyncio.create_task(
@@ -335,14 +335,13 @@ async def index_handler(
 ):
     current = skip_no
     msg_count = 0
-    saved = 0
-    skipped = 0
     from_chat = int(frm_cnl_id)
+    report = IndexReport(from_chat)
 
     batch_size = 100
     batch_data = []
-    media_groups = {}
-    processed_groups = set()
+    album = []
+    progress = ProgressReporter(indx_strt, bot)
 
     async with lock:
         try:
@@ -379,11 +378,15 @@ async def index_handler(
                 file_type = None
                 file_name = None
 
+                if album and msg.media_group_id != album[0].media_group_id:
+                    # albums are stored where they are in the source
+                    batch_data.extend(
+                        await get_album_rows(album, cat, worker, from_chat)
+                    )
+                    album = []
+
                 if msg.media_group_id:
-                    if msg.media_group_id not in media_groups:
-                        media_groups[msg.media_group_id] = []
-                    media_groups[msg.media_group_id].append(msg)
-                    
+                    album.append(msg)
                     msg_count += 1
                     current += 1
                     continue
@@ -413,6 +416,7 @@ async def index_handler(
                             "use": "clone",
                             "worker": worker,
                             "caption": msg_caption,
+                            "media_group_id": None,
                         }
                     )
 
@@ -421,118 +425,87 @@ async def index_handler(
 
                     if len(batch_data) >= batch_size:
                         try:
-                            batch_saved, batch_skipped = await save_data_batch(
-                                batch_data
-                            )
-                            saved += batch_saved
-                            skipped += batch_skipped
+                            report.add(await save_data_batch(batch_data))
                             batch_data = []
                         except Exception as e:
                             LOGGER.error(f"Batch processing error: {e}")
                             await indx_strt.reply(f"Batch Error:\n{e}")
                             return
 
-                    if msg_count % 250 == 0:
-                        kb = InlineKeyboardMarkup(
-                            [
-                                [
-                                    InlineKeyboardButton(
-                                        "Cancel", callback_data="cancel_index"
-                                    ),
-                                ]
-                            ]
-                        )
-                        try:
-                            datetime_ist = datetime.now(IST)
-                            ISTIME = datetime_ist.strftime("%I:%M:%S %p - %d %B %Y")
-                            await indx_strt.edit(
-                                text=f"Total Indexed : `{msg_count}`\nSaved:`{saved}`\nSkipped:`{skipped}`\nLast edited at `{ISTIME}`",
-                                reply_markup=kb,
-                            )
-                        except FloodWait as e:
-                            LOGGER.warning(
-                                "Floodwait while indexing, sleeping for %s", e.value
-                            )
-                            await asyncio.sleep(e.value)
-                        except ValueError as e:
-                            LOGGER.error(e)
-                            await indx_strt.reply(f"Error:\n{e}")
-                            return
+                    progress.update(
+                        f"Total Indexed : `{msg_count}`\nSaved:`{report.saved}`\nSkipped:`{report.skipped}`",
+                        footer="Last edited at `{}`",
+                        reply_markup=CANCEL_BUTTON,
+                    )
 
-            for media_group_id, group_messages in media_groups.items():
-                if media_group_id in processed_groups:
-                    continue
-                
-                group_messages.sort(key=lambda x: x.id)
-                
-                combined_caption = ""
-                captions = []
-                for group_msg in group_messages:
-                    if group_msg.caption:
-                        captions.append(group_msg.caption)
-                
-                if captions:
-                    combined_caption = "\n\n".join(captions)
-                
-                for idx, group_msg in enumerate(group_messages):
-                    file_id = None
-                    file_type = None
-                    file_name = None
-                    
-                    if cat in ("document", "photo", "video", "audio"):
-                        if group_msg.media and group_msg.media.value == cat:
-                            file_id, file_type, file_name = await get_file_det(group_msg, worker)
-                    elif cat == "docvid":
-                        if group_msg.media and group_msg.media.value in ["document", "video"]:
-                            file_id, file_type, file_name = await get_file_det(group_msg, worker)
-                    elif cat == "empty":
-                        if group_msg.media:
-                            file_id, file_type, file_name = await get_file_det(group_msg, worker)
-                    
-                    if file_name:
-                        caption_to_use = combined_caption if idx == 0 else group_msg.caption
-                        
-                        batch_data.append(
-                            {
-                                "file_name": f"{file_name}_group_{idx+1}",
-                                "file_id": file_id,
-                                "from_channel": str(from_chat),
-                                "file_type": file_type,
-                                "message_id": group_msg.id,
-                                "use": "clone",
-                                "worker": worker,
-                                "caption": caption_to_use,
-                            }
-                        )
-                
-                processed_groups.add(media_group_id)
+            await progress.close()
+            if album:
+                batch_data.extend(await get_album_rows(album, cat, worker, from_chat))
 
             if batch_data:
                 try:
-                    batch_saved, batch_skipped = await save_data_batch(batch_data)
-                    saved += batch_saved
-                    skipped += batch_skipped
+                    report.add(await save_data_batch(batch_data))
                 except Exception as e:
                     LOGGER.error(f"Final batch processing error: {e}")
 
             await indx_strt.edit(
-                f"Successfully Indexed `{msg_count}` messages.\nSaved: `{saved}`\nDuplicate/Skipped: `{skipped}`"
+                f"Successfully Indexed `{msg_count}` messages.\n{report.summary()}"
             )
+            document = report.document()
+            if document:
+                await indx_strt.reply_document(
+                    document, caption="Duplicate/invalid messages of this index"
+                )
             LOGGER.info(
-                "Successfully Indexed %s messages. Saved: %s, Skipped: %s",
+                "Successfully Indexed %s messages. Saved: %s, Duplicates: %s, Invalid: %s",
                 msg_count,
-                saved,
-                skipped,
+                report.saved,
+                len(report.duplicates),
+                len(report.invalid),
             )
 
-        except FloodWait as e:
-            LOGGER.warning("Floodwait while indexing, sleeping for %s", e.value)
-            await asyncio.sleep(e.value)
-            await indx_strt.edit("Continuing indexing after Floodwait...")
-            await index_handler(bot, query, skip_no=current)
         except Exception as e:
+            await progress.close()
             LOGGER.error(f"Error during indexing: {e}")
             await indx_strt.edit_text(f"Error:\n{e}")
+        finally:
+            await progress.close()
+
+
+async def get_album_rows(messages, cat, worker, from_chat):
+    """Files rows of the album ``messages`` that match category ``cat``."""
+    rows = []
+    messages = sorted(messages, key=lambda x: x.id)
+    for idx, group_msg in enumerate(messages):
+        file_id = None
+        file_type = None
+        file_name = None
+
+        if cat in ("document", "photo", "video", "audio"):
+            if group_msg.media and group_msg.media.value == cat:
+                file_id, file_type, file_name = await get_file_det(group_msg, worker)
+        elif cat == "docvid":
+            if group_msg.media and group_msg.media.value in ["document", "video"]:
+                file_id, file_type, file_name = await get_file_det(group_msg, worker)
+        elif cat == "empty":
+            if group_msg.media:
+                file_id, file_type, file_name = await get_file_det(group_msg, worker)
+
+        if file_name:
+            rows.append(
+                {
+                    "file_name": f"{file_name}_group_{idx+1}",
+                    "file_id": file_id,
+                    "from_channel": str(from_chat),
+                    "file_type": file_type,
+                    "message_id": group_msg.id,
+                    "use": "clone",
+                    "worker": worker,
+                    "caption": group_msg.caption,
+                    "media_group_id": str(group_msg.media_group_id),
+                }
+            )
+    return rows
 
 
 async def get_file_det(msg, worker):
@@ -560,12 +533,14 @@ async def iter_messages(
     offset: int = 0,
 ) -> AsyncGenerator["types.Message", None]:
     current = offset
+    controller = get_flood_controller(bot)
     while current < offset + limit:
         new_diff = min(200, offset + limit - current)
         if new_diff <= 0:
             return
         try:
-            messages = await bot.get_messages(
+            messages = await controller.call(
+                API_CALLS.timed(bot.get_messages, method="get_messages"),
                 chat_id=chat_id,
                 message_ids=list(range(current, current + new_diff + 1)),
             )
@@ -0,0 +1,72 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import re
+
+from clonebot import LOGGER
+from clonebot.db.clone_sql import load_custom_caption
+
+PLACEHOLDERS = ("file_name", "file_type", "message_id", "caption")
+PLACEHOLDER_RE = re.compile(r"\{(" + "|".join(PLACEHOLDERS) + r")\}")
+RENDER_CACHE_SIZE = 4096
+
+_UNLOADED = object()
+_template = _UNLOADED
+
+
+class CaptionTemplate:
+    """A /setcaption template split once into literal text and placeholders.
+
+    Supported placeholders are {file_name}, {file_type}, {message_id} and
+    {caption} (the original caption). Any other braces are kept as text.
+    Rendered captions are memoized on the values of the placeholders the
+    template actually uses, so a {file_name}-only template renders once per
+    distinct file name.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = PLACEHOLDER_RE.split(template)
+        # odd positions of the split hold placeholder names
+        self.fields = tuple(dict.fromkeys(self.parts[1::2]))
+        self._cache = {}
+
+    def render(self, record):
+        values = tuple(
+            "" if getattr(record, field) is None else str(getattr(record, field))
+            for field in self.fields
+        )
+        caption = self._cache.get(values)
+        if caption is None:
+            if not self.fields:
+                caption = self.template
+            else:
+                lookup = dict(zip(self.fields, values))
+                caption = "".join(
+                    lookup[part] if idx % 2 else part
+                    for idx, part in enumerate(self.parts)
+                )
+            if len(self._cache) >= RENDER_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[values] = caption
+        return caption
+
+
+async def get_caption_template():
+    """Return the compiled custom caption, or None when none is set."""
+    global _template
+    if _template is _UNLOADED:
+        try:
+            custom_caption = await load_custom_caption()
+        except Exception as e:
+            # not cached, so the next row looks it up again
+            LOGGER.error(f"Error getting custom caption: {e}")
+            return None
+        _template = CaptionTemplate(custom_caption) if custom_caption else None
+    return _template
+
+
+def invalidate_caption_cache():
+    global _template
+    _template = _UNLOADED
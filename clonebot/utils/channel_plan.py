@@ -0,0 +1,88 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from collections import defaultdict
+
+from clonebot.db.clone_sql import assign_channel_ranges, get_channels
+
+
+class PlannedChannel:
+    __slots__ = (
+        "channel_id",
+        "chat_id",
+        "channel_number",
+        "pending_files",
+        "processed_files",
+        "status",
+        "start_rowid",
+        "end_rowid",
+    )
+
+    def __init__(self, record):
+        self.channel_id = record.channel_id
+        self.chat_id = int(record.channel_id)
+        self.channel_number = record.channel_number
+        self.pending_files = record.pending_files
+        self.processed_files = record.processed_files
+        self.status = record.status
+        self.start_rowid = record.start_rowid
+        self.end_rowid = record.end_rowid
+
+
+class ChannelPlan:
+    """In-memory copy of the Channels of one clone job.
+
+    Every channel owns the Files rows of its rowid range (see
+    assign_channel_ranges), so channels can be filled one after another or
+    all at once and each resumes exactly where it stopped. The plan keeps
+    processed/pending counts in memory; counts not yet written back to
+    Channels are handed out by ``take_progress()`` (see ProgressJournal).
+    """
+
+    def __init__(self, channels):
+        self.channels = [PlannedChannel(channel) for channel in channels]
+        self._by_id = {channel.channel_id: channel for channel in self.channels}
+        self._by_chat_id = {channel.chat_id: channel for channel in self.channels}
+        self._unflushed = defaultdict(int)
+
+    @classmethod
+    async def load(cls, job_id):
+        """Build the plan of a job from the Channels table (raises ValueError
+        on a bad channel id).
+
+        Channels saved without a rowid range get one assigned first.
+        """
+        channels = await get_channels(job_id)
+        if any(channel.start_rowid is None for channel in channels):
+            await assign_channel_ranges(job_id)
+            channels = await get_channels(job_id)
+        return cls(channels)
+
+    def get(self, channel_id):
+        return self._by_id.get(channel_id)
+
+    def by_chat_id(self, chat_id):
+        return self._by_chat_id.get(chat_id)
+
+    @property
+    def processed(self):
+        return sum(channel.processed_files for channel in self.channels)
+
+    def record(self, channel_id, count=1):
+        channel = self._by_id.get(channel_id)
+        if channel is None:
+            return
+        channel.processed_files += count
+        channel.pending_files -= count
+        self._unflushed[channel_id] += count
+
+    def take_progress(self):
+        """Return and forget the {channel_id: count} deltas not yet persisted."""
+        progress, self._unflushed = dict(self._unflushed), defaultdict(int)
+        return progress
+
+    def restore_progress(self, progress):
+        """Put back deltas whose write failed, so the next flush retries them."""
+        for channel_id, count in progress.items():
+            self._unflushed[channel_id] += count
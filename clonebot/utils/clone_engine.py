@@ -0,0 +1,234 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+from collections import namedtuple
+
+from pyrogram.errors import FloodWait
+
+from clonebot import CLONE_CHAT_RATE, CLONE_IN_FLIGHT, LOGGER
+from clonebot.utils import metrics
+from clonebot.utils.rate_limit import FloodController
+from clonebot.utils.worker_pool import ACCESS_ERRORS
+
+
+class CloneItem(
+    namedtuple(
+        "CloneItem", ["seq", "chat_id", "channel_id", "worker", "records", "captions"]
+    )
+):
+    """One send: a single Files row, or several rows (a text batch or an
+    album) cloned with one call. ``captions`` holds one caption per record."""
+
+    __slots__ = ()
+
+    @property
+    def record(self):
+        return self.records[0]
+
+    @property
+    def caption(self):
+        return self.captions[0]
+
+
+class _Lane:
+    def __init__(self, chat_id, queue_size):
+        self.chat_id = chat_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+
+
+class CloneEngine:
+    """Producer/consumer clone pipeline.
+
+    Items are routed to one lane per destination chat, so every chat receives
+    its messages in the order they were produced. ``pools`` maps a worker
+    name such as ``bot``/``user`` to the WorkerPool whose clients make that
+    worker's sends. Sends are paced by a FloodController per destination and
+    per client, and at most ``in_flight`` sends run at the same time across
+    all lanes. A lane sends one item at a time, so ``in_flight`` only limits
+    anything when several chats are cloned at once.
+
+    ``send(item, client)`` performs the actual API call with the client the
+    pool handed out (None for a worker without pool) and returns True on
+    success. A FloodWait it raises slows down and pauses that client and the
+    destination, then the item is sent again, by another client of the pool
+    if one is ready. An access error is retried on the other clients of the
+    pool; once no client can reach the chats, it stops the whole run like
+    any other exception escaping ``send`` and is re-raised by ``run()``. ``on_done(item, ok)`` is
+    awaited after every send. ``pacers`` maps a worker name to a function
+    that returns the pacer of a client, an object with
+    ``before_send()``/``after_send()`` coroutines for clients that need extra
+    pauses on top of the rate limits; pacers are shared with other engines
+    sending through the same client. ``on_pause``/``on_resume`` are awaited
+    around every pause of a pacer this engine uses. While the ``gate`` event
+    is cleared no new send starts.
+    """
+
+    def __init__(
+        self,
+        send,
+        on_done=None,
+        in_flight=CLONE_IN_FLIGHT,
+        chat_rate=CLONE_CHAT_RATE,
+        pools=None,
+        pacers=None,
+        on_pause=None,
+        on_resume=None,
+        gate=None,
+    ):
+        self.send = send
+        self.on_done = on_done
+        self.in_flight = max(1, in_flight)
+        self.chat_rate = chat_rate
+        self.pools = pools or {}
+        self.chat_controllers = {}
+        self.pacers = pacers or {}
+        self.on_pause = on_pause
+        self.on_resume = on_resume
+        self._watched = {}
+        self.gate = gate
+        self.sent = 0
+        self.failed = 0
+        self.started = None
+        self._semaphore = asyncio.Semaphore(self.in_flight)
+        self._lanes = {}
+        self._error = None
+        self.error_chat_id = None
+
+    @property
+    def rate(self):
+        """Achieved messages per second since the first run started."""
+        if not self.started:
+            return 0.0
+        elapsed = time.monotonic() - self.started
+        return (self.sent + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def _chat_controller(self, chat_id):
+        controller = self.chat_controllers.get(chat_id)
+        if controller is None:
+            controller = self.chat_controllers[chat_id] = FloodController(
+                self.chat_rate
+            )
+        return controller
+
+    def _pacer(self, worker, client):
+        get_pacer = self.pacers.get(worker)
+        if get_pacer is None:
+            return None
+        pacer = get_pacer(client)
+        if pacer not in self._watched:
+            self._watched[pacer] = pacer.watch(self.on_pause, self.on_resume)
+        return pacer
+
+    def _lane(self, chat_id):
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _Lane(chat_id, self.in_flight * 2)
+            lane.task = asyncio.create_task(self._run_lane(lane))
+        return lane
+
+    async def _run_lane(self, lane):
+        while True:
+            item = await lane.queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                await self._process(item)
+            except Exception as e:
+                LOGGER.error("Clone lane for %s stopped: %s", lane.chat_id, e)
+                self._error = e
+                self.error_chat_id = lane.chat_id
+
+    async def _process(self, item):
+        pool = self.pools.get(item.worker)
+        chat = self._chat_controller(item.chat_id)
+        route = (item.record.from_channel, item.chat_id)
+        while True:
+            if self.gate:
+                await self.gate.wait()
+            member = None
+            if pool:
+                member = await pool.acquire(route)
+                if member is None:
+                    raise pool.access_errors[route]
+            pacer = self._pacer(item.worker, member.client if member else None)
+            if pacer:
+                await pacer.before_send()
+            await chat.acquire()
+            try:
+                async with self._semaphore:
+                    ok = await self.send(item, member.client if member else None)
+            except FloodWait as e:
+                metrics.on_flood(e.value, item.worker)
+                if member:
+                    pool.on_flood(member, e.value)
+                if member is None or len(pool) == 1:
+                    # with several clients the wait is the client's, not the chat's
+                    chat.on_flood(e.value)
+                LOGGER.warning(
+                    "Floodwait of %s sec while cloning to %s", e.value, item.chat_id
+                )
+                continue
+            except ACCESS_ERRORS as e:
+                if member and pool.on_no_access(member, route, e):
+                    continue
+                raise
+            except Exception:
+                if member:
+                    pool.release(member, False)
+                raise
+            if member:
+                pool.release(member, ok)
+            chat.on_success()
+            break
+
+        if ok:
+            self.sent += len(item.records)
+        else:
+            self.failed += len(item.records)
+        metrics.SENDS.inc(
+            len(item.records), worker=item.worker, result="ok" if ok else "failed"
+        )
+        if self.on_done:
+            await self.on_done(item, ok)
+        if pacer:
+            await pacer.after_send()
+
+    async def _feed(self, items):
+        async for item in items:
+            if self._error is not None:
+                break
+            await self._lane(item.chat_id).queue.put(item)
+
+    async def run(self, *sources):
+        """Clone every item of the given async iterables.
+
+        Several sources (e.g. one per destination channel) are consumed at
+        the same time, each feeding its own lanes.
+        """
+        if self.started is None:
+            self.started = time.monotonic()
+        self._error = None
+        self.error_chat_id = None
+        feeders = [asyncio.create_task(self._feed(items)) for items in sources]
+        try:
+            await asyncio.gather(*feeders)
+            for lane in self._lanes.values():
+                await lane.queue.put(None)
+            await asyncio.gather(*(lane.task for lane in self._lanes.values()))
+        finally:
+            for task in feeders + [lane.task for lane in self._lanes.values()]:
+                if not task.done():
+                    task.cancel()
+            self._lanes = {}
+            for pacer, watcher in self._watched.items():
+                pacer.unwatch(watcher)
+            self._watched = {}
+
+        if self._error is not None:
+            raise self._error
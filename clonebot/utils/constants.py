@@ -59,15 +59,18 @@ If you can make bot admin in source chats, there is no need to use sessions.
 ✪ **Clone Commands:**
 ◆ /index - Index a source chat for cloning. (This helps to omit duplicate files)
 __Always try to use bot only to avoid bans.__
-◆ /clone - Clone all indexed files to a destination chat.
-◆ /reclone - Resume clone process from where it stopped after bot restart.
+◆ /clone - Clone the newly indexed files to a destination chat as a new job.
+◆ /reclone - Resume a stopped clone job - `/reclone JOB_ID`
+◆ /jobs - List the clone jobs with their progress and speed.
+◆ /pause, /resume, /cancel - Control a running clone job - `/pause JOB_ID`
 ◆ /total - Get the total count of indexed files.
 ◆ /channels - Show current channel distribution and progress.
+◆ /failed - Show the files whose clone failed - `/failed retry` or `/failed clear`
 ◆ /setcaption - Set custom caption by replying to a message.
 ◆ /showcaption - View current custom caption.
 ◆ /removecaption - Remove custom caption.
 ◆ /cleardb - Delete the entire indexed files and channels from database.
-◆ /status - To find if any cloning job is ongoing.
+◆ /status - To find which cloning jobs are ongoing.
 
 ✪ **Forwarder Commands:**
 ◆ /addchat - Add chat to source and destination - `/addchat SOURCE_CHAT_ID DEST_CHAT_ID`
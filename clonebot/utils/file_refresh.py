@@ -0,0 +1,83 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+
+from clonebot import LOGGER
+from clonebot.db.clone_sql import get_media_window, update_file_ids
+from clonebot.utils.metrics import API_CALLS
+from clonebot.utils.rate_limit import get_flood_controller
+
+REFRESH_WINDOW = 200
+
+
+class FileRefresher:
+    """Renews expired file references a window of rows at a time.
+
+    Once a send fails with FileReferenceExpired, the rest of an old index
+    usually does too. ``refresh(record, client)`` therefore fetches the
+    record's message together with the next media rows of the same source
+    (``window`` messages, one get_messages call), stores their fresh file
+    ids in Files and keeps them in memory, where ``file_id(record)`` picks
+    them up for rows that were already queued with the stale id.
+    """
+
+    def __init__(self, window=REFRESH_WINDOW, keep=REFRESH_WINDOW * 5):
+        self.window = window
+        self.keep = keep
+        self.fresh = {}
+        self.fetches = 0
+        self.refreshed = 0
+        self._locks = {}
+
+    def file_id(self, record):
+        """The freshest known file id of ``record``."""
+        return self.fresh.get(record.rowid, record.file_id)
+
+    async def refresh(self, record, client):
+        """Fresh file id for ``record``, or None if its message has no media now."""
+        lock = self._locks.setdefault(record.from_channel, asyncio.Lock())
+        stale = self.file_id(record)
+        async with lock:
+            # another send may have refreshed this window while we waited
+            if self.file_id(record) != stale:
+                return self.file_id(record)
+            rows = await get_media_window(
+                record.from_channel, int(record.message_id), self.window
+            )
+            if not rows or rows[0].message_id != int(record.message_id):
+                # not in Files (anymore), e.g. a FailedFiles retry
+                rows = [record] + rows[: self.window - 1]
+            messages = await get_flood_controller(client).call(
+                API_CALLS.timed(client.get_messages, method="get_messages"),
+                int(record.from_channel),
+                [int(row.message_id) for row in rows],
+            )
+            self.fetches += 1
+            updates = []
+            found = None
+            for row, message in zip(rows, messages):
+                media = getattr(message, message.media.value, None) if message.media else None
+                file_id = getattr(media, "file_id", None)
+                if not file_id:
+                    continue
+                if row.rowid == record.rowid:
+                    found = file_id
+                if file_id != row.file_id:
+                    self.fresh[row.rowid] = file_id
+                    updates.append((file_id, row.rowid))
+            if updates:
+                await update_file_ids(updates)
+            self.refreshed += len(updates)
+            while len(self.fresh) > self.keep:
+                del self.fresh[next(iter(self.fresh))]
+            LOGGER.info(
+                "Refreshed %s file references of %s in one call",
+                len(updates),
+                record.from_channel,
+            )
+            return found
+
+
+file_refresher = FileRefresher()
@@ -3,11 +3,24 @@
 # This file is part of clonebot.
 
 import base64
-from struct import pack
+from io import BytesIO
+from struct import pack, unpack
 from typing import Union
 
 from pyrogram import raw
-from pyrogram.file_id import DOCUMENT_TYPES, PHOTO_TYPES, FileId, FileType
+from pyrogram.file_id import (
+    DOCUMENT_TYPES,
+    FILE_REFERENCE_FLAG,
+    PHOTO_TYPES,
+    WEB_LOCATION_FLAG,
+    FileId,
+    FileType,
+    b64_decode,
+    b64_encode,
+    rle_decode,
+    rle_encode,
+)
+from pyrogram.raw.core import Bytes
 
 
 def get_input_file_from_file_id(
@@ -84,3 +97,51 @@ def unpack_new_file_id(new_file_id):
     )
     file_ref = encode_file_ref(decoded.file_reference)
     return file_id, file_ref
+
+
+def get_media_id(file_id):
+    """media_id of a stored file id (new or legacy format), None if it has none.
+
+    split_file_id() also reads the short ids unpack_new_file_id() stores
+    for photos, which FileId.decode() cannot.
+    """
+    parts = split_file_id(file_id)
+    if parts is not None:
+        return parts[2]
+    try:
+        return FileId.decode(file_id).media_id
+    except Exception:
+        return None
+
+
+def split_file_id(file_id):
+    """(id_type, dc_id, media_id, access_hash, file_reference, file_extra) of a
+    file id, the parts join_file_id() turns back into the same string.
+
+    id_type is the file type with its flags, file_reference is b"" when the
+    id has none and file_extra holds what follows the access hash (photo
+    sizes, version bytes). Returns None for web files and anything that
+    does not rebuild to ``file_id`` exactly.
+    """
+    try:
+        buffer = BytesIO(rle_decode(b64_decode(file_id)))
+        id_type, dc_id = unpack("<ii", buffer.read(8))
+        if id_type & WEB_LOCATION_FLAG:
+            return None
+        file_reference = Bytes.read(buffer) if id_type & FILE_REFERENCE_FLAG else b""
+        media_id, access_hash = unpack("<qq", buffer.read(16))
+        parts = (id_type, dc_id, media_id, access_hash, file_reference, buffer.read())
+    except Exception:
+        return None
+    if join_file_id(*parts) != file_id:
+        return None
+    return parts
+
+
+def join_file_id(id_type, dc_id, media_id, access_hash, file_reference, file_extra):
+    """The file id string of the parts split_file_id() returned."""
+    buffer = pack("<ii", id_type, dc_id)
+    if id_type & FILE_REFERENCE_FLAG:
+        buffer += Bytes(file_reference)
+    buffer += pack("<qq", media_id, access_hash) + file_extra
+    return b64_encode(rle_encode(buffer))
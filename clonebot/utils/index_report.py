@@ -0,0 +1,68 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from io import BytesIO
+
+
+class IndexReport:
+    """What became of the messages of one /index run.
+
+    ``add()`` takes the SaveResult of every save_data_batch() call.
+    ``summary()`` is a few lines for the final message; ``document()`` lists
+    every duplicate and invalid message, with the message that holds the
+    same file, as a text file to send along.
+    """
+
+    def __init__(self, from_chat, examples=5):
+        self.from_chat = from_chat
+        self.examples = examples
+        self.saved = 0
+        self.duplicates = []
+        self.invalid = []
+
+    @property
+    def skipped(self):
+        return len(self.duplicates) + len(self.invalid)
+
+    def add(self, result):
+        self.saved += result.saved
+        self.duplicates.extend(
+            (record.message_id, source) for record, source in result.duplicates
+        )
+        self.invalid.extend(
+            (data.get("message_id"), error) for data, error in result.invalid
+        )
+
+    def _duplicate_line(self, message_id, source):
+        if source is None:
+            return f"{message_id}: already indexed"
+        from_channel, original_id = source
+        if str(from_channel) == str(self.from_chat):
+            return f"{message_id}: same file as message {original_id}"
+        return f"{message_id}: already indexed from {from_channel} ({original_id})"
+
+    def summary(self):
+        lines = [
+            f"Saved: `{self.saved}`",
+            f"Duplicates: `{len(self.duplicates)}`",
+            f"Invalid: `{len(self.invalid)}`",
+        ]
+        for message_id, source in self.duplicates[: self.examples]:
+            lines.append(f"• {self._duplicate_line(message_id, source)}")
+        if len(self.duplicates) > self.examples:
+            lines.append(f"• ... {len(self.duplicates) - self.examples} more")
+        return "\n".join(lines)
+
+    def document(self):
+        """The full report as a named file object, or None if nothing was skipped."""
+        if not self.skipped:
+            return None
+        lines = [f"Duplicates ({len(self.duplicates)})"]
+        lines.extend(self._duplicate_line(*entry) for entry in self.duplicates)
+        lines.append("")
+        lines.append(f"Invalid ({len(self.invalid)})")
+        lines.extend(f"{message_id}: {error}" for message_id, error in self.invalid)
+        document = BytesIO("\n".join(lines).encode())
+        document.name = f"index_report_{self.from_chat}.txt"
+        return document
@@ -0,0 +1,221 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+
+from clonebot import LOGGER
+from clonebot.db.clone_sql import (
+    adopt_channels,
+    create_job,
+    delete_job,
+    get_jobs,
+    update_job,
+)
+
+PENDING = "pending"
+RUNNING = "running"
+SLEEPING = "sleeping"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+# state -> states it may move to
+TRANSITIONS = {
+    PENDING: {RUNNING, FAILED, CANCELLED},
+    RUNNING: {SLEEPING, PAUSED, DONE, FAILED, CANCELLED},
+    SLEEPING: {RUNNING, PAUSED, DONE, FAILED, CANCELLED},
+    PAUSED: {RUNNING, DONE, FAILED, CANCELLED},
+    FAILED: {RUNNING, CANCELLED},
+    CANCELLED: {RUNNING, FAILED},
+    INTERRUPTED: {RUNNING, FAILED, CANCELLED},
+    DONE: set(),
+}
+LIVE = (RUNNING, SLEEPING, PAUSED)
+RESUMABLE = (FAILED, CANCELLED, INTERRUPTED)
+
+
+class CloneJob:
+    """One clone job: the Files rows it owns, its destination channels and
+    its run state.
+
+    The job's own Files id range and state are persisted in the Jobs table,
+    its channels and their progress in Channels. ``plan``, ``engine`` and
+    ``task`` are set while the job runs; ``processed`` counts the rows done
+    so far and ``gate`` is cleared while the job is paused. ``starting`` is
+    set by ``claim()`` until the job has stopped again, so a job is only
+    started once.
+    """
+
+    def __init__(self, record):
+        self.id = record.id
+        self.state = record.state
+        self.sources = record.sources.split() if record.sources else []
+        self.start_rowid = record.start_rowid
+        self.end_rowid = record.end_rowid
+        self.failed = record.failed
+        self.error = record.error
+        self.created_at = record.created_at
+        self.plan = None
+        self.engine = None
+        self.task = None
+        self.processed = 0
+        self.starting = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    @property
+    def live(self):
+        return self.starting or self.state in LIVE
+
+    def claim(self):
+        """Reserve the job for one run, before anything is awaited; False
+        if it is already running or being started."""
+        if self.live:
+            return False
+        self.starting = True
+        return True
+
+    def release(self):
+        self.starting = False
+
+    @property
+    def rate(self):
+        return self.engine.rate if self.engine else 0.0
+
+    @property
+    def chat_ids(self):
+        return [channel.chat_id for channel in self.plan.channels] if self.plan else []
+
+    async def set_state(self, state, error=None):
+        if state == self.state:
+            return
+        if state not in TRANSITIONS[self.state]:
+            raise ValueError(f"Clone job {self.id} cannot go from {self.state} to {state}")
+        LOGGER.info("Clone job %s: %s -> %s", self.id, self.state, state)
+        self.state = state
+        if error is not None:
+            self.error = error
+        await update_job(self.id, state, self.failed, self.error)
+
+    async def pause(self):
+        await self.set_state(PAUSED)
+        self.gate.clear()
+
+    async def resume(self):
+        await self.set_state(RUNNING)
+        self.gate.set()
+
+    async def sleep(self):
+        """Called while the pacing scheduler pauses the job's user lane."""
+        if self.state == RUNNING:
+            await self.set_state(SLEEPING)
+
+    async def wake(self):
+        if self.state == SLEEPING:
+            await self.set_state(RUNNING)
+
+    async def finish(self):
+        await self.set_state(DONE)
+        await delete_job(self.id)
+
+
+class JobManager:
+    """Registry of the clone jobs of this process.
+
+    Each running job is an asyncio task with its own CloneEngine, so jobs
+    to different destinations run side by side. Jobs found in the database
+    that were live when the process stopped come back as interrupted and can
+    be resumed.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        async with self._lock:
+            if self._loaded:
+                return
+            await adopt_channels()
+            for record in await get_jobs():
+                job = CloneJob(record)
+                if job.state in LIVE + (PENDING,):
+                    job.state = INTERRUPTED
+                    await update_job(job.id, job.state, job.failed, job.error)
+                if job.state != DONE:
+                    self.jobs[job.id] = job
+            self._loaded = True
+
+    async def create(self, channel_data_list):
+        """Create a job for the unclaimed Files rows; None on failure."""
+        await self.load()
+        job_id = await create_job(channel_data_list)
+        if job_id is None:
+            return None
+        for record in await get_jobs():
+            if record.id == job_id:
+                job = self.jobs[job_id] = CloneJob(record)
+                return job
+        return None
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def live(self):
+        return [job for job in self.jobs.values() if job.live]
+
+    def resumable(self):
+        return [job for job in self.jobs.values() if job.state in RESUMABLE]
+
+    def busy_chats(self, exclude=None):
+        """Destination chats of the running jobs other than ``exclude``."""
+        return {
+            chat_id
+            for job in self.live()
+            if job is not exclude
+            for chat_id in job.chat_ids
+        }
+
+    def start(self, job, coro):
+        job.task = asyncio.create_task(coro)
+        return job.task
+
+    async def cancel(self, job):
+        """Stop a job; its progress is kept and /reclone can restart it."""
+        task = job.task
+        await job.set_state(CANCELLED)
+        job.gate.set()
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def stop(self):
+        """Cancel the running job tasks at shutdown and wait for them, so
+        their journals are flushed. The jobs keep their state and come back
+        as interrupted on the next start."""
+        tasks = [
+            job.task for job in self.jobs.values() if job.task and not job.task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                LOGGER.error(f"Clone job stopped with an error at shutdown: {e}")
+
+    def forget(self):
+        """Drop every job, after the database was cleared."""
+        self.jobs = {}
+
+
+job_manager = JobManager()
@@ -0,0 +1,126 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+
+from clonebot import CLONE_JOURNAL_BATCH, CLONE_JOURNAL_INTERVAL, LOGGER
+from clonebot.db.clone_sql import commit_clone_progress
+
+
+class ProgressJournal:
+    """Write-behind log of finished clone rows.
+
+    Cloned rows and the ChannelPlan's progress deltas are kept in memory and
+    committed together in one transaction once ``flush_every`` rows are
+    pending or ``flush_interval`` seconds have passed. Because the row
+    deletes and the Channels counters land in the same commit, the database
+    is always at a batch boundary: after a crash /reclone re-sends at most
+    the one batch that had not been committed yet. Rows whose clone failed
+    are moved to FailedFiles by the same commit.
+
+    The commit also moves the CloneCursor of each destination up to just
+    below the lowest row ``read()`` from it that is not committed yet, so a
+    restart never skips rows that were still in flight. ``rewind()`` starts
+    the next pass over from the beginning.
+    """
+
+    def __init__(
+        self,
+        plan,
+        flush_every=CLONE_JOURNAL_BATCH,
+        flush_interval=CLONE_JOURNAL_INTERVAL,
+    ):
+        self.plan = plan
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._records = []
+        self._failed = []
+        # rowid -> cursor_id of the rows read but not committed yet
+        self._reading = {}
+        # cursor_id -> last rowid read, and as committed
+        self._read_to = {}
+        self._cursors = {}
+        self._flushed_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._timer = None
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run_timer())
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+    async def _run_timer(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if time.monotonic() - self._flushed_at >= self.flush_interval:
+                await self.flush()
+
+    def read(self, cursor_id, records):
+        """Note ``records`` as read by iter_pending_chunks(cursor_id=...)."""
+        for record in records:
+            self._reading[record.rowid] = cursor_id
+        if records:
+            self._read_to[cursor_id] = records[-1].rowid
+
+    def rewind(self):
+        """Start every cursor over once the rows read so far are committed."""
+        for cursor_id in self._read_to:
+            self._read_to[cursor_id] = 0
+
+    def _cursors_after(self, records):
+        committed = {record.rowid for record in records}
+        lowest = {}
+        for rowid, cursor_id in self._reading.items():
+            if rowid not in committed and rowid < lowest.get(cursor_id, rowid + 1):
+                lowest[cursor_id] = rowid
+        cursors = {}
+        for cursor_id, read_to in self._read_to.items():
+            last_rowid = lowest[cursor_id] - 1 if cursor_id in lowest else read_to
+            if self._cursors.get(cursor_id) != last_rowid:
+                cursors[cursor_id] = last_rowid
+        return cursors
+
+    async def record(self, records, channel_id, failed=()):
+        """Log finished ``records`` of ``channel_id``; ``failed`` holds the
+        FailedFiles entries of those that could not be cloned."""
+        self._records.extend(records)
+        self._failed.extend(failed)
+        self.plan.record(channel_id, len(records))
+        if (
+            len(self._records) >= self.flush_every
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            self._flushed_at = time.monotonic()
+            progress = self.plan.take_progress()
+            cursors = self._cursors_after(self._records)
+            if not self._records and not progress and not cursors:
+                return True
+            records, self._records = self._records, []
+            failed, self._failed = self._failed, []
+            deleted = await commit_clone_progress(records, progress, failed, cursors)
+            if deleted is None:
+                self._records = records + self._records
+                self._failed = failed + self._failed
+                self.plan.restore_progress(progress)
+                return False
+            for record in records:
+                self._reading.pop(record.rowid, None)
+            self._cursors.update(cursors)
+            LOGGER.info(
+                "Committed %s cloned Files/Messages (%s removed from Database, %s failed)",
+                len(records),
+                deleted,
+                len(failed),
+            )
+            return True
@@ -0,0 +1,245 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+from clonebot import LOGGER, METRICS_FILE, METRICS_INTERVAL
+
+# seconds; Telegram calls take tens of milliseconds up to a few seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+RATE_WINDOW = 60
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """A monotonically increasing value per label set.
+
+    Besides the totals it keeps one sample per second of the last
+    ``RATE_WINDOW`` seconds, so ``rate()`` can tell the current speed.
+    """
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._samples = deque()
+        self._created = time.monotonic()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        self.values[key] = self.values.get(key, 0) + amount
+        now = int(time.monotonic())
+        if self._samples and self._samples[-1][0] == now:
+            self._samples[-1][1] += amount
+        else:
+            self._samples.append([now, amount])
+            while self._samples[0][0] <= now - RATE_WINDOW:
+                self._samples.popleft()
+
+    def total(self):
+        return sum(self.values.values())
+
+    def rate(self):
+        """Increments per second over the last ``RATE_WINDOW`` seconds, all labels."""
+        now = time.monotonic()
+        recent = sum(amount for second, amount in self._samples if second > now - RATE_WINDOW)
+        return recent / max(1.0, min(RATE_WINDOW, now - self._created))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Observations counted into fixed ``buckets`` (upper bounds), per label set."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _Series(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the ``with`` block took, also when it raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, func, **labels):
+        """``func`` wrapped to observe the duration of every call, for
+        FloodController.call(), whose own waits must not be counted."""
+
+        async def wrapper(*args, **kwargs):
+            with self.time(**labels):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    def quantile(self, q, **labels):
+        """Upper bound of the bucket holding the ``q`` quantile, or None."""
+        series = self.series.get(tuple(labels.get(name, "") for name in self.labels))
+        if series is None or not series.count:
+            return None
+        rank = q * series.count
+        seen = 0
+        for bound, count in zip(self.buckets, series.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            seen = 0
+            for bound, count in zip(self.buckets, series.counts):
+                seen += count
+                labels = _labels(self.labels + ("le",), key + (f"{bound:g}",))
+                lines.append(f"{self.name}_bucket{labels} {seen}")
+            labels = _labels(self.labels + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {series.count}")
+            labels = _labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {series.sum:.6f}")
+            lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics of the bot.
+
+    Counters and histograms are created once with ``counter()`` and
+    ``histogram()`` and updated in place, which costs a dict lookup per
+    event. ``render()`` returns them in the Prometheus text format and
+    ``start()`` writes that to ``path`` every ``interval`` seconds, through
+    a temporary file so a scraper never reads half of it.
+    """
+
+    def __init__(self, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.metrics = {}
+        self.task = None
+
+    def counter(self, name, help, labels=()):
+        return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+    def start(self):
+        if self.path and self.interval > 0 and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self.path:
+            await asyncio.to_thread(self.write)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.write)
+            except Exception as e:
+                LOGGER.error(f"Could not write metrics to {self.path}: {e}")
+
+
+metrics = MetricsRegistry()
+
+SENDS = metrics.counter(
+    "clonebot_sends_total", "Files/Messages cloned, by worker and result", ("worker", "result")
+)
+API_CALLS = metrics.histogram(
+    "clonebot_api_call_seconds", "Latency of Telegram API calls", ("method",)
+)
+FLOOD_WAITS = metrics.counter(
+    "clonebot_flood_waits_total", "FloodWait errors received", ("source",)
+)
+FLOOD_SECONDS = metrics.counter(
+    "clonebot_flood_wait_seconds_total", "Seconds of FloodWait imposed", ("source",)
+)
+DB_COMMITS = metrics.histogram("clonebot_db_commit_seconds", "Latency of SQLite commits")
+
+
+def on_flood(seconds, source):
+    """Count a FloodWait of ``seconds``; ``source`` names who got it."""
+    FLOOD_WAITS.inc(source=source)
+    FLOOD_SECONDS.inc(seconds, source=source)
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.1f} ms"
+
+
+def summary():
+    """Short text of the metrics, for /server."""
+    lines = [
+        f"Sends: {SENDS.total():,} ({SENDS.rate():.2f}/s last minute)",
+        f"FloodWaits: {FLOOD_WAITS.total():,} ({FLOOD_SECONDS.total():,} s)",
+    ]
+    for (method,), series in sorted(API_CALLS.series.items()):
+        lines.append(
+            f"{method}: {series.count:,} calls, avg {_ms(series.sum / series.count)}, "
+            f"p50 <= {_ms(API_CALLS.quantile(0.5, method=method))}, "
+            f"p99 <= {_ms(API_CALLS.quantile(0.99, method=method))}"
+        )
+    for series in DB_COMMITS.series.values():
+        lines.append(
+            f"DB commits: {series.count:,}, avg {_ms(series.sum / series.count)}, "
+            f"p99 <= {_ms(DB_COMMITS.quantile(0.99))}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,158 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import random
+import time
+from collections import namedtuple
+
+from clonebot import CLONE_USER_DELAY, CLONE_USER_PACING
+
+# pause for ``pause`` seconds after every ``every`` sends; both are (min, max)
+PacingTier = namedtuple("PacingTier", ["every", "pause"])
+PacingPolicy = namedtuple("PacingPolicy", ["delay", "tiers"])
+
+
+def parse_range(text):
+    """``"3-8"`` -> (3.0, 8.0), ``"5"`` -> (5.0, 5.0)."""
+    low, _, high = text.strip().partition("-")
+    low = float(low)
+    high = float(high) if high else low
+    if low < 0 or high < low:
+        raise ValueError(f"Invalid range: {text!r}")
+    return low, high
+
+
+def parse_policy(tiers, delay="0"):
+    """Build a PacingPolicy from its config form.
+
+    ``tiers`` is a comma separated list of ``sends:pause`` ranges, e.g.
+    ``"250-300:250-500,1500-2000:1000-1200"`` pauses 250-500 s after every
+    250-300 sends and 1000-1200 s after every 1500-2000 sends. ``delay`` is
+    the range of seconds slept after each send.
+    """
+    parsed = []
+    for tier in tiers.split(","):
+        if not tier.strip():
+            continue
+        every, sep, pause = tier.partition(":")
+        if not sep:
+            raise ValueError(f"Invalid pacing tier: {tier!r}")
+        parsed.append(PacingTier(parse_range(every), parse_range(pause)))
+    # longest pause first; tiers due at the same time take only the longest
+    # of their pauses, see PacingScheduler.before_send()
+    parsed.sort(key=lambda tier: tier.pause, reverse=True)
+    return PacingPolicy(parse_range(delay), tuple(parsed))
+
+
+USER_PACING = parse_policy(CLONE_USER_PACING, CLONE_USER_DELAY)
+
+
+class Clock:
+    """Real time."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock whose sleeps only move its own time forward, so hours of a
+    schedule run in milliseconds."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class PacingScheduler:
+    """Runs a PacingPolicy for one send lane.
+
+    Used as a CloneEngine pacer: ``after_send()`` sleeps the per-send delay
+    and counts the send towards every tier, ``before_send()`` takes the
+    pause that has come due. Tiers due at the same time pause once, for the
+    longest of their pauses, and all start counting again.
+    ``on_pause(seconds)``/``on_resume(seconds)`` are awaited around each
+    pause, e.g. to update a status message, and so are the callbacks
+    added with ``watch()`` by every job sending through the lane.
+    """
+
+    def __init__(self, policy, clock=None, rng=None, on_pause=None, on_resume=None):
+        self.policy = policy
+        self.clock = clock or Clock()
+        self.random = rng or random.Random()
+        self.watchers = [(on_pause, on_resume)]
+        self.sends = 0
+        self.paused = 0.0
+        self._lock = asyncio.Lock()
+        self._left = [self._draw(tier.every) for tier in policy.tiers]
+
+    def _draw(self, bounds):
+        low, high = bounds
+        if low == high:
+            return low
+        if low.is_integer() and high.is_integer():
+            return self.random.randint(int(low), int(high))
+        return self.random.uniform(low, high)
+
+    async def before_send(self):
+        async with self._lock:
+            pause = None
+            for idx, tier in enumerate(self.policy.tiers):
+                if self._left[idx] > 0:
+                    continue
+                seconds = self._draw(tier.pause)
+                pause = seconds if pause is None else max(pause, seconds)
+                self._left[idx] = self._draw(tier.every)
+            if pause is not None:
+                await self.pause(pause)
+
+    async def after_send(self):
+        self.sends += 1
+        self._left = [left - 1 for left in self._left]
+        delay = self._draw(self.policy.delay)
+        if delay > 0:
+            await self.clock.sleep(delay)
+
+    def watch(self, on_pause=None, on_resume=None):
+        """Also await ``on_pause``/``on_resume`` around the pauses; returns
+        the key to pass to ``unwatch()``."""
+        watcher = (on_pause, on_resume)
+        self.watchers.append(watcher)
+        return watcher
+
+    def unwatch(self, watcher):
+        if watcher in self.watchers:
+            self.watchers.remove(watcher)
+
+    async def pause(self, seconds):
+        watchers = list(self.watchers)
+        for on_pause, _ in watchers:
+            if on_pause:
+                await on_pause(seconds)
+        await self.clock.sleep(seconds)
+        self.paused += seconds
+        for _, on_resume in watchers:
+            if on_resume:
+                await on_resume(seconds)
+
+
+_pacers = {}
+
+
+def get_pacer(client, policy=USER_PACING):
+    """Return the PacingScheduler shared by every clone job sending with
+    ``client``, so their sends count towards the same pauses."""
+    pacer = _pacers.get(client)
+    if pacer is None:
+        pacer = _pacers[client] = PacingScheduler(policy)
+    return pacer
@@ -0,0 +1,120 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import time
+from collections import namedtuple
+
+from pyrogram.enums import ChatMemberStatus, ChatType
+from pyrogram.errors import ChannelPrivate, ChatWriteForbidden, FloodWait
+
+from clonebot import LOGGER
+from clonebot.utils.rate_limit import get_flood_controller
+from clonebot.utils.worker_pool import ACCESS_ERRORS
+
+# what a client may do in a chat; error explains a missing right
+PeerAccess = namedtuple("PeerAccess", ["can_read", "can_send", "error"])
+
+ADMIN_STATUSES = (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
+READ_STATUSES = ADMIN_STATUSES + (ChatMemberStatus.MEMBER, ChatMemberStatus.RESTRICTED)
+# seconds a chat a client could not use is remembered before it is checked again
+RECHECK_AFTER = 300
+
+
+class PeerCache:
+    """Resolved chats and the rights every client has in them.
+
+    ``check(client, chat_id)`` resolves the chat with one get_chat_member
+    call, which also puts the peer into the client's session, and keeps the
+    result for the lifetime of the process. Administrators may send
+    anywhere; members and restricted members only to groups whose
+    permissions allow it, which takes a get_chat call. Chats a client cannot
+    fully use are kept for ``recheck_after`` seconds, or until a check with
+    ``recheck=True``, like the one of warm_up().
+    """
+
+    def __init__(self, recheck_after=RECHECK_AFTER):
+        self.recheck_after = recheck_after
+        self.access = {}
+        # (client, chat_id) -> (PeerAccess, checked_at) of the failed checks
+        self.failed = {}
+
+    async def check(self, client, chat_id, recheck=False):
+        key = (client, int(chat_id))
+        access = self.access.get(key)
+        if access is not None:
+            return access
+        failed = self.failed.get(key)
+        if (
+            failed is not None
+            and not recheck
+            and time.monotonic() - failed[1] < self.recheck_after
+        ):
+            return failed[0]
+        access = await self._fetch(client, int(chat_id))
+        if access.can_read and access.can_send:
+            self.access[key] = access
+            self.failed.pop(key, None)
+        else:
+            self.failed[key] = (access, time.monotonic())
+        return access
+
+    async def _fetch(self, client, chat_id):
+        controller = get_flood_controller(client)
+        try:
+            member = await controller.call(client.get_chat_member, chat_id, "me")
+            if member.status in ADMIN_STATUSES:
+                return PeerAccess(True, True, None)
+            if member.status not in READ_STATUSES:
+                return PeerAccess(False, False, ChannelPrivate())
+            chat = await controller.call(client.get_chat, chat_id)
+        except ACCESS_ERRORS as e:
+            return PeerAccess(False, False, e)
+        except FloodWait:
+            raise
+        except Exception as e:
+            # unknown, leave it to the send itself
+            LOGGER.warning(f"Could not check access to {chat_id}: {e}")
+            return PeerAccess(True, True, None)
+        if chat.type == ChatType.CHANNEL:
+            # only administrators post to a broadcast channel
+            can_send = False
+        else:
+            if member.status == ChatMemberStatus.RESTRICTED:
+                permissions = member.permissions
+            else:
+                permissions = chat.permissions
+            can_send = permissions is None or bool(permissions.can_send_messages)
+        return PeerAccess(True, can_send, None if can_send else ChatWriteForbidden())
+
+    async def warm_up(self, pools, sources, chat_ids):
+        """Check every client of ``pools`` against the clone routes.
+
+        ``sources`` holds (from_channel, worker) pairs, ``chat_ids`` the
+        destinations. A client that cannot read a source or send to a
+        destination is blocked for that route in its pool. Returns
+        {route: error} for the routes no client can serve.
+        """
+        unreachable = {}
+        for from_channel, worker in sources:
+            pool = pools.get(worker)
+            if not pool:
+                continue
+            for member in pool.members:
+                source = await self.check(member.client, from_channel, recheck=True)
+                for chat_id in chat_ids:
+                    route = (from_channel, chat_id)
+                    if not source.can_read:
+                        pool.block(member, route, source.error)
+                        continue
+                    destination = await self.check(member.client, chat_id, recheck=True)
+                    if not destination.can_send:
+                        pool.block(member, route, destination.error)
+            for chat_id in chat_ids:
+                route = (from_channel, chat_id)
+                if not pool.candidates(route):
+                    unreachable[route] = pool.access_errors[route]
+        return unreachable
+
+
+peer_cache = PeerCache()
@@ -0,0 +1,85 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytz
+
+from clonebot import LOGGER, PROGRESS_INTERVAL
+from clonebot.utils.rate_limit import get_flood_controller
+
+IST = pytz.timezone("Asia/Kolkata")
+TIME_FORMAT = "%I:%M:%S %p - %d %B %Y"
+
+
+class ProgressReporter:
+    """Keeps one progress message up to date without spending the send
+    budget on it.
+
+    ``update()`` only records the latest text; the message is edited in the
+    background at most once every ``interval`` seconds, with whatever text
+    was recorded last. A text equal to the one on screen is not sent again.
+    ``footer`` is a template whose ``{}`` is filled with the current time,
+    formatted only when an edit is made. Edits go through ``client``'s
+    FloodController.
+    """
+
+    def __init__(self, message, client, interval=PROGRESS_INTERVAL):
+        self.message = message
+        self.controller = get_flood_controller(client)
+        self.interval = interval
+        self.edits = 0
+        self._shown = None
+        self._pending = None
+        self._edited = 0.0
+        self._task = None
+
+    def update(self, text, footer=None, **kwargs):
+        """Show ``text`` (plus ``footer``) with the next edit."""
+        if text == self._shown:
+            self._pending = None
+            return
+        self._pending = (text, footer, kwargs)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self._pending is not None:
+                delay = self._edited + self.interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                await self.flush()
+        finally:
+            self._task = None
+
+    async def flush(self):
+        """Make the pending edit now."""
+        if self._pending is None:
+            return
+        text, footer, kwargs = self._pending
+        self._pending = None
+        self._shown = text
+        self._edited = time.monotonic()
+        if footer:
+            text = f"{text}\n{footer.format(datetime.now(IST).strftime(TIME_FORMAT))}"
+        try:
+            await self.controller.call(self.message.edit, text=text, **kwargs)
+            self.edits += 1
+        except Exception as e:
+            LOGGER.error(f"Error editing progress message: {e}")
+
+    async def close(self):
+        """Drop the pending edit, e.g. before the final message is sent."""
+        self._pending = None
+        task = self._task
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,137 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+
+from pyrogram.errors import FloodWait
+
+from clonebot import CLONE_BOT_RATE, CLONE_USER_RATE, LOGGER
+from clonebot.utils import metrics
+
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    A rate of 0 (or less) disables the limit.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, tokens=1):
+        """Seconds until ``tokens`` would be available."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens=1):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class FloodController:
+    """AIMD send-rate controller driven by FloodWait.
+
+    Sends are paced by a token bucket. A FloodWait halves the rate (never
+    below ``min_rate``) and pauses every caller of ``acquire()`` until the
+    wait is over; after ``probe_after`` successes in a row the rate grows
+    again by a tenth of the configured ceiling.
+    """
+
+    def __init__(self, rate, min_rate=0.05, probe_after=20, decrease=0.5):
+        self.max_rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate) if self.max_rate > 0 else 0
+        self.increase = self.max_rate / 10
+        self.probe_after = probe_after
+        self.decrease = decrease
+        self.bucket = TokenBucket(rate)
+        self.flood_waits = 0
+        self.flood_seconds = 0
+        self._successes = 0
+        self._paused_until = 0.0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    @property
+    def paused(self):
+        return time.monotonic() < self._paused_until
+
+    @property
+    def resume_in(self):
+        """Seconds left of the current FloodWait pause."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    async def acquire(self):
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        await self.bucket.acquire()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.probe_after and self.max_rate > 0:
+            self._successes = 0
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.increase)
+
+    def on_flood(self, seconds):
+        now = time.monotonic()
+        self.flood_waits += 1
+        self.flood_seconds += seconds
+        self._successes = 0
+        if now >= self._paused_until and self.max_rate > 0:
+            # one cut per wait window, however many sends hit it at once
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * self.decrease)
+        self._paused_until = max(self._paused_until, now + seconds)
+
+    async def call(self, func, *args, **kwargs):
+        """Await ``func(*args, **kwargs)`` under this controller, retrying on FloodWait."""
+        while True:
+            await self.acquire()
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWait as e:
+                self.on_flood(e.value)
+                metrics.on_flood(e.value, "api")
+                LOGGER.warning(
+                    "Floodwait of %s sec, send rate now %.2f/s", e.value, self.rate
+                )
+                continue
+            self.on_success()
+            return result
+
+
+_controllers = {}
+
+
+def get_flood_controller(client):
+    """Return the FloodController shared by every coroutine using ``client``."""
+    controller = _controllers.get(client)
+    if controller is None:
+        rate = CLONE_BOT_RATE if getattr(client, "bot_token", None) else CLONE_USER_RATE
+        controller = _controllers[client] = FloodController(rate)
+    return controller
@@ -0,0 +1,154 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import random
+import time
+
+from pyrogram.errors import FloodWait
+
+from clonebot import CLONE_RETRY_BASE, CLONE_RETRY_CAP, CLONE_RETRY_MAX, LOGGER
+from clonebot.db.clone_sql import (
+    delete_failed_file,
+    get_due_failed_files,
+    next_failed_retry,
+    update_failed_file,
+)
+from clonebot.utils import metrics
+from clonebot.utils.worker_pool import ACCESS_ERRORS
+
+# seconds to wait after a database error before looking at the rows again
+ERROR_DELAY = 5
+
+
+class RetryWorker:
+    """Re-sends the FailedFiles rows in the background.
+
+    A row is tried again ``backoff(attempts)`` seconds after its last
+    failure: ``base`` seconds doubled for every attempt, capped at ``cap``,
+    with "equal jitter" (a random wait between half and all of it) so rows
+    that failed together do not come back together. After ``max_attempts``
+    failures the row is given up and only kept for /failed. Sends go
+    through the WorkerPool of the row's worker, like the clone itself;
+    ``send(row, client)`` returns True on success. The worker runs while
+    rows are waiting for a retry and stops by itself afterwards.
+    """
+
+    def __init__(
+        self,
+        send,
+        pools,
+        max_attempts=CLONE_RETRY_MAX,
+        base=CLONE_RETRY_BASE,
+        cap=CLONE_RETRY_CAP,
+        rng=None,
+    ):
+        self.send = send
+        self.pools = pools
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.random = rng or random.Random()
+        self.retried = 0
+        self.recovered = 0
+        self.task = None
+
+    def backoff(self, attempts):
+        delay = min(self.cap, self.base * 2 ** max(0, attempts - 1))
+        return self.random.uniform(delay / 2, delay)
+
+    def next_retry(self, attempts):
+        """When a row that failed ``attempts`` times is tried again; None gives up."""
+        if attempts >= self.max_attempts:
+            return None
+        return time.time() + self.backoff(attempts)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                rows = await get_due_failed_files(time.time())
+                if not rows:
+                    due = await next_failed_retry()
+                    if due is None:
+                        return
+                    await asyncio.sleep(max(1.0, due - time.time()))
+                    continue
+            except Exception as e:
+                LOGGER.error(f"Could not read the failed files to retry: {e}")
+                await asyncio.sleep(ERROR_DELAY)
+                continue
+            stuck = 0
+            for row in rows:
+                try:
+                    if not await self._retry(row):
+                        stuck += 1
+                except Exception as e:
+                    stuck += 1
+                    LOGGER.error(f"Could not retry {row.file_id}: {e}")
+            if stuck:
+                # rows that could not be written back are still due, do not
+                # spin on them
+                await asyncio.sleep(ERROR_DELAY)
+
+    async def _retry(self, row):
+        """Send ``row`` again; False if its FailedFiles row could not be
+        deleted or rescheduled."""
+        pool = self.pools.get(row.worker)
+        route = (row.from_channel, int(row.channel_id))
+        member = None
+        self.retried += 1
+        try:
+            if pool:
+                member = await pool.acquire(route)
+                if member is None:
+                    raise pool.access_errors[route]
+            ok = await self.send(row, member.client if member else None)
+        except FloodWait as e:
+            # not the row's fault, try it again once the wait is over
+            metrics.on_flood(e.value, "retry")
+            if member:
+                pool.on_flood(member, e.value)
+            return await update_failed_file(
+                row.id, row.error, row.attempts, time.time() + e.value
+            )
+        except ACCESS_ERRORS as e:
+            if member:
+                pool.on_no_access(member, route, e)
+            return await self._failed(row, e)
+        except Exception as e:
+            if member:
+                pool.release(member, False)
+            return await self._failed(row, e)
+        if member:
+            pool.release(member, ok)
+        metrics.SENDS.inc(worker=row.worker, result="retried" if ok else "failed")
+        if ok:
+            self.recovered += 1
+            LOGGER.info("Retry %s of %s succeeded", row.attempts, row.file_id)
+            return await delete_failed_file(row.id)
+        return await self._failed(row, None)
+
+    async def _failed(self, row, error):
+        attempts = row.attempts + 1
+        next_retry = self.next_retry(attempts)
+        error = type(error).__name__ if error else row.error
+        if not await update_failed_file(row.id, error, attempts, next_retry):
+            return False
+        if next_retry is None:
+            LOGGER.warning(
+                "Giving up %s after %s attempts: %s", row.file_id, attempts, error
+            )
+        return True
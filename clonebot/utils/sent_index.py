@@ -0,0 +1,112 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+
+from clonebot.db.clone_sql import find_sent_media, save_sent_media
+from clonebot.utils.file_support import get_media_id
+
+
+class SentIndex:
+    """What was already sent to each destination, to skip duplicates.
+
+    A row counts as sent to a chat when the same source message
+    (from_channel, message_id) or the same media (the ``media_id`` inside
+    its file id) went there before, in this or an earlier clone. Rows are
+    ``claim()``ed before they are queued for sending. A claim fails while
+    another row of the same source or media is claimed, and for rows found
+    in the SentMedia table, which is looked up through a reader connection
+    after claiming, so a row saved meanwhile is not missed.
+
+    ``save()`` writes the SentMedia rows of a send right after it
+    succeeded, so a restart never sends them again; saves waiting at the
+    same time share one transaction. The claims are dropped once their
+    rows are saved, or with ``release()`` for rows that were not sent.
+    """
+
+    def __init__(self):
+        # chat_id -> ({(from_channel, message_id)}, {media_id}) claimed, not saved yet
+        self.claimed = {}
+        self._unsaved = []
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def entry(record):
+        """(from_channel, message_id, media_id) of a Files or FailedFiles row."""
+        media_id = (
+            get_media_id(record.file_id) if record.file_type != "messages" else None
+        )
+        return record.from_channel, int(record.message_id), media_id
+
+    async def claim(self, chat_id, records):
+        """Claim ``records`` for sending to ``chat_id``; returns the claimed
+        ones, the others were sent or claimed before."""
+        sources, media = self.claimed.setdefault(chat_id, (set(), set()))
+        claimed = []
+        for record in records:
+            from_channel, message_id, media_id = entry = self.entry(record)
+            if (from_channel, message_id) in sources or (
+                media_id is not None and media_id in media
+            ):
+                continue
+            sources.add((from_channel, message_id))
+            if media_id is not None:
+                media.add(media_id)
+            claimed.append((record, entry))
+        if not claimed:
+            return []
+        try:
+            found_sources, found_media = await find_sent_media(
+                chat_id,
+                [entry[:2] for _, entry in claimed],
+                [entry[2] for _, entry in claimed if entry[2] is not None],
+            )
+        except BaseException:
+            for _, entry in claimed:
+                self._forget(chat_id, entry)
+            raise
+        result = []
+        for record, entry in claimed:
+            if entry[:2] in found_sources or entry[2] in found_media:
+                self._forget(chat_id, entry)
+            else:
+                result.append(record)
+        return result
+
+    def release(self, chat_id, records):
+        """Drop the claims of ``records``, which were not sent."""
+        for record in records:
+            self._forget(chat_id, self.entry(record))
+
+    async def save(self, chat_id, records):
+        """Record ``records`` as sent to ``chat_id``; False if the SentMedia
+        rows could not be written, the next save or ``flush()`` tries again."""
+        self._unsaved.extend((chat_id, *self.entry(record)) for record in records)
+        return await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._unsaved:
+                # written by the save that held the lock before
+                return True
+            entries, self._unsaved = self._unsaved, []
+            if not await save_sent_media(entries):
+                self._unsaved = entries + self._unsaved
+                return False
+        for chat_id, *entry in entries:
+            self._forget(chat_id, entry)
+        return True
+
+    def _forget(self, chat_id, entry):
+        claimed = self.claimed.get(chat_id)
+        if claimed is None:
+            return
+        from_channel, message_id, media_id = entry
+        claimed[0].discard((from_channel, message_id))
+        claimed[1].discard(media_id)
+        if not claimed[0] and not claimed[1]:
+            del self.claimed[chat_id]
+
+
+sent_index = SentIndex()
@@ -0,0 +1,343 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from pyrogram import types
+from pyrogram.enums import ChatMemberStatus, MessageMediaType
+from pyrogram.errors import ChannelInvalid, FloodWait
+from pyrogram.file_id import FileId, FileType
+
+from clonebot import (
+    LOGGER,
+    OWNER_ID,
+    SIM_BOTS,
+    SIM_DESTINATIONS,
+    SIM_FLOOD_RATE,
+    SIM_FLOOD_SECONDS,
+    SIM_LATENCY_MS,
+    SIM_MESSAGES,
+    SIM_RATE,
+    SIM_RESUME,
+    SIM_SEED,
+    SIM_USERS,
+)
+
+SIM_SOURCE_ID = -1000000000001
+SIM_DESTINATION_ID = -1000000000100
+
+
+class SimChannel:
+    """Synthetic source channel of ``size`` messages, built on demand.
+
+    Message ``n`` is always the same: every ``text_every``-th one is a text
+    message, runs of ``album_size`` videos starting every ``album_every``
+    messages form an album, the rest are documents.
+    """
+
+    def __init__(self, chat_id, size, text_every=10, album_every=100, album_size=5):
+        self.chat_id = chat_id
+        self.size = size
+        self.text_every = text_every
+        self.album_every = album_every
+        self.album_size = album_size
+        self.chat = types.Chat(id=chat_id, title=f"Sim {chat_id}")
+
+    def file_id(self, message_id, file_type=FileType.DOCUMENT):
+        return FileId(
+            file_type=file_type,
+            dc_id=4,
+            media_id=message_id,
+            access_hash=abs(self.chat_id) ^ message_id,
+            file_reference=message_id.to_bytes(8, "little"),
+        ).encode()
+
+    def message(self, message_id):
+        if not 0 < message_id <= self.size:
+            return types.Message(id=message_id, empty=True)
+        caption = f"caption {message_id}"
+        if self.album_every and message_id % self.album_every < self.album_size:
+            return types.Message(
+                id=message_id,
+                chat=self.chat,
+                media=MessageMediaType.VIDEO,
+                media_group_id=message_id // self.album_every,
+                video=types.Video(
+                    file_id=self.file_id(message_id, FileType.VIDEO),
+                    file_unique_id=f"sim{message_id}",
+                    width=1280,
+                    height=720,
+                    duration=60,
+                    file_name=f"video_{message_id}.mp4",
+                ),
+                caption=caption,
+            )
+        if self.text_every and message_id % self.text_every == 0:
+            return types.Message(
+                id=message_id, chat=self.chat, text=f"message {message_id}"
+            )
+        return types.Message(
+            id=message_id,
+            chat=self.chat,
+            media=MessageMediaType.DOCUMENT,
+            document=types.Document(
+                file_id=self.file_id(message_id),
+                file_unique_id=f"sim{message_id}",
+                file_name=f"document_{message_id}.pdf",
+            ),
+            caption=caption,
+        )
+
+
+class SimMessage:
+    """A message of the simulated chat that progress texts are edited into."""
+
+    def __init__(self, client, chat_id, text=""):
+        self._client = client
+        self.chat = SimpleNamespace(id=chat_id)
+        self.from_user = SimpleNamespace(id=OWNER_ID)
+        self.text = text
+
+    async def edit(self, text=None, **kwargs):
+        await self._client._call("edit", self.chat.id)
+        self.text = self._client.last_text = text
+        LOGGER.debug("Edited %s: %s", self.chat.id, text)
+        return self
+
+    edit_text = edit
+
+    async def reply_text(self, text=None, **kwargs):
+        await self._client._call("reply", self.chat.id)
+        self._client.last_text = text
+        LOGGER.info("Reply in %s: %s", self.chat.id, text)
+        return SimMessage(self._client, self.chat.id, text)
+
+    reply = reply_text
+
+    async def reply_document(self, document, caption=None, **kwargs):
+        await self._client._call("reply", self.chat.id)
+        name = getattr(document, "name", document)
+        LOGGER.info("Document in %s: %s %s", self.chat.id, name, caption or "")
+        return SimMessage(self._client, self.chat.id, caption or "")
+
+    async def delete(self):
+        await self._client._call("delete", self.chat.id)
+
+
+class SimClient:
+    """Offline stand-in for the part of the Pyrogram Client the bot uses.
+
+    Every call waits ``latency`` seconds (+/- 50% jitter) and raises a
+    FloodWait of ``flood_seconds`` with probability ``flood_rate``, or when
+    more than ``rate`` calls were made in the last second (0 disables the
+    limit). Randomness comes from ``seed``, so a run can be repeated.
+    Source ``channels`` are SimChannels; messages sent to a ``destinations``
+    chat are only counted.
+    """
+
+    def __init__(
+        self,
+        name,
+        channels=(),
+        destinations=(),
+        bot_token=None,
+        latency=0.05,
+        flood_rate=0.0,
+        flood_seconds=5,
+        rate=0,
+        seed=0,
+    ):
+        self.name = name
+        self.bot_token = bot_token
+        self.channels = {channel.chat_id: channel for channel in channels}
+        self.destinations = set(destinations)
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.floods = 0
+        self.sent = Counter()
+        self.last_text = None
+        self._window = []
+
+    def on_message(self, *args, **kwargs):
+        return lambda func: func
+
+    on_callback_query = on_message
+
+    async def _call(self, method, chat_id=None):
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        now = time.monotonic()
+        if self.rate > 0:
+            self._window = [t for t in self._window if now - t < 1]
+            if len(self._window) >= self.rate:
+                self.floods += 1
+                raise FloodWait(value=1)
+            self._window.append(now)
+        if self.flood_rate and self.random.random() < self.flood_rate:
+            self.floods += 1
+            raise FloodWait(value=self.flood_seconds)
+
+    def _channel(self, chat_id):
+        channel = self.channels.get(int(chat_id))
+        if channel is None:
+            raise ChannelInvalid()
+        return channel
+
+    async def _send(self, method, chat_id, count=1):
+        await self._call(method, chat_id)
+        if int(chat_id) not in self.destinations:
+            raise ChannelInvalid()
+        self.sent[int(chat_id)] += count
+        return SimMessage(self, chat_id)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._call("get_chat_member", chat_id)
+        if int(chat_id) not in self.channels and int(chat_id) not in self.destinations:
+            raise ChannelInvalid()
+        return types.ChatMember(status=ChatMemberStatus.ADMINISTRATOR)
+
+    async def get_messages(self, chat_id, message_ids):
+        await self._call("get_messages", chat_id)
+        channel = self._channel(chat_id)
+        if isinstance(message_ids, int):
+            return channel.message(message_ids)
+        return [channel.message(message_id) for message_id in message_ids]
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return await self._send("send_message", chat_id)
+
+    async def send_cached_media(self, chat_id, file_id, caption=None, **kwargs):
+        FileId.decode(file_id)
+        return await self._send("send_cached_media", chat_id)
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, **kwargs):
+        self._channel(from_chat_id)
+        return await self._send("copy_message", chat_id)
+
+    async def forward_messages(self, chat_id, from_chat_id, message_ids, **kwargs):
+        self._channel(from_chat_id)
+        return await self._send("forward_messages", chat_id, len(message_ids))
+
+    async def send_media_group(self, chat_id, media, **kwargs):
+        return await self._send("send_media_group", chat_id, len(media))
+
+
+def create_clients(users=False):
+    """Sim bots sharing one synthetic source channel and the destinations,
+    or with ``users`` the SIM_USERS simulated user sessions."""
+    source = SimChannel(SIM_SOURCE_ID, SIM_MESSAGES)
+    destinations = [SIM_DESTINATION_ID - i for i in range(SIM_DESTINATIONS)]
+    if users:
+        names = [(f"simuser_{i}", None) for i in range(1, SIM_USERS + 1)]
+    else:
+        names = [(f"simbot_{i}", f"sim:{i}") for i in range(1, max(1, SIM_BOTS) + 1)]
+    return [
+        SimClient(
+            name=name,
+            channels=[source],
+            destinations=destinations,
+            bot_token=bot_token,
+            latency=SIM_LATENCY_MS / 1000,
+            flood_rate=SIM_FLOOD_RATE,
+            flood_seconds=SIM_FLOOD_SECONDS,
+            rate=SIM_RATE,
+            seed=SIM_SEED + i + (100 if users else 0),
+        )
+        for i, (name, bot_token) in enumerate(names, 1)
+    ]
+
+
+async def run_simulation(bot, bots, users=()):
+    """Index the synthetic source channel, then clone it to the destinations.
+
+    The plugins are imported here, after ``__main__.bot``/``bots``/``user``/
+    ``users`` have been set to the simulated clients. With simulated
+    ``users`` the channel is indexed by the first of them, so the clone
+    sends through the user sessions, with their rate and pacing. With
+    SIM_RESUME an interrupted simulated clone job left in the database is
+    resumed instead.
+    """
+    from clonebot.db.clone_sql import clear_channels, clear_sent_media, delete_files
+    from clonebot.plugins.clone import start_forwarding_process
+    from clonebot.plugins.index import index_handler
+    from clonebot.utils.jobs import job_manager
+
+    status = SimMessage(bot, OWNER_ID)
+    if SIM_RESUME:
+        await job_manager.load()
+        jobs = job_manager.resumable()
+        for job in jobs:
+            started = time.monotonic()
+            await start_forwarding_process(
+                bot, status, job, resume=True, user_id=OWNER_ID
+            )
+            log_clone(bots + list(users), time.monotonic() - started)
+        if jobs:
+            return
+
+    await delete_files()
+    await clear_channels()
+    await clear_sent_media()
+
+    started = time.monotonic()
+    worker = "user" if users else "bot"
+    await index_handler(
+        bot, None, str(SIM_SOURCE_ID), worker, status, "empty", 1, SIM_MESSAGES
+    )
+    elapsed = time.monotonic() - started
+    LOGGER.info(
+        "Simulated index of %s messages took %.1f s (%.0f msgs/s): %s",
+        SIM_MESSAGES,
+        elapsed,
+        SIM_MESSAGES / elapsed if elapsed else 0,
+        bot.last_text,
+    )
+
+    destinations = sorted(bot.destinations, reverse=True)
+    per_channel = -(-SIM_MESSAGES // len(destinations))
+    job = await job_manager.create(
+        [
+            {
+                "channel_id": str(chat_id),
+                "channel_number": i,
+                "pending_files": per_channel,
+                "processed_files": 0,
+                "status": "pending",
+            }
+            for i, chat_id in enumerate(destinations, 1)
+        ]
+    )
+
+    started = time.monotonic()
+    await start_forwarding_process(bot, status, job, user_id=OWNER_ID)
+    log_clone(bots + list(users), time.monotonic() - started)
+
+
+def log_clone(clients, elapsed):
+    sent = Counter()
+    for client in clients:
+        sent.update(client.sent)
+    LOGGER.info(
+        "Simulated clone took %.1f s, sent %s: %s",
+        elapsed,
+        dict(sent),
+        clients[0].last_text,
+    )
+    for client in clients:
+        LOGGER.info(
+            "%s: %s calls, %s FloodWaits, sent %s",
+            client.name,
+            sum(client.calls.values()),
+            client.floods,
+            dict(client.sent),
+        )
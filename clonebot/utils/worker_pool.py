@@ -0,0 +1,135 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+
+from pyrogram.errors import (
+    ChannelInvalid,
+    ChannelPrivate,
+    PeerIdInvalid,
+    UserNotParticipant,
+)
+
+from clonebot import CLONE_POOL_BENCH, CLONE_POOL_MAX_ERRORS, LOGGER
+from clonebot.utils.rate_limit import get_flood_controller
+
+ACCESS_ERRORS = (ChannelInvalid, PeerIdInvalid, ChannelPrivate, UserNotParticipant)
+
+
+class PoolMember:
+    """One client of a WorkerPool and its health counters."""
+
+    def __init__(self, client):
+        self.client = client
+        self.controller = get_flood_controller(client)
+        self.in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.errors = 0
+        self.benched_until = 0.0
+        self.no_access = set()
+
+    @property
+    def name(self):
+        return getattr(self.client, "name", str(self.client))
+
+    @property
+    def ready_in(self):
+        """Seconds until this client may send again (0 when it is ready)."""
+        return max(
+            0.0, self.controller.resume_in, self.benched_until - time.monotonic()
+        )
+
+    @property
+    def load(self):
+        """Seconds until this client's next send, counting sends already handed out."""
+        bucket = self.controller.bucket
+        return bucket.wait_time(self.in_flight + 1)
+
+
+class WorkerPool:
+    """Clients that can make the same sends, e.g. several bots that are
+    admins of the same chats.
+
+    ``acquire(route)`` hands out the client that can send soonest and is not
+    waiting out a FloodWait, so every client gets a share in proportion to
+    its current rate and a flooded client's share moves to the others until
+    its wait is over. Each client keeps its own FloodController, hence its
+    own rate limit. A client that fails ``max_errors`` sends in a row is
+    benched for ``bench_seconds``; one that has no access to a route (source
+    chat, destination chat) is not offered for that route again.
+    """
+
+    def __init__(
+        self, clients, max_errors=CLONE_POOL_MAX_ERRORS, bench_seconds=CLONE_POOL_BENCH
+    ):
+        self.members = [PoolMember(client) for client in clients if client]
+        self.max_errors = max_errors
+        self.bench_seconds = bench_seconds
+        self.access_errors = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    def candidates(self, route):
+        return [member for member in self.members if route not in member.no_access]
+
+    async def acquire(self, route):
+        """Wait for a ready client for ``route``.
+
+        Returns None when no client can reach it; ``access_errors[route]``
+        then holds the error the last client got.
+        """
+        while True:
+            members = self.candidates(route)
+            if not members:
+                return None
+            ready = [member for member in members if member.ready_in <= 0]
+            if not ready:
+                await asyncio.sleep(min(member.ready_in for member in members))
+                continue
+            member = min(ready, key=lambda member: (member.load, member.in_flight))
+            member.in_flight += 1
+            try:
+                await member.controller.acquire()
+            except BaseException:
+                member.in_flight -= 1
+                raise
+            return member
+
+    def release(self, member, ok):
+        member.in_flight -= 1
+        if ok:
+            member.sent += 1
+            member.errors = 0
+            member.controller.on_success()
+            return
+        member.failed += 1
+        member.errors += 1
+        if member.errors >= self.max_errors:
+            member.errors = 0
+            member.benched_until = time.monotonic() + self.bench_seconds
+            LOGGER.warning(
+                "%s failed %s sends in a row, benched for %s sec",
+                member.name,
+                self.max_errors,
+                self.bench_seconds,
+            )
+
+    def on_flood(self, member, seconds):
+        member.in_flight -= 1
+        member.controller.on_flood(seconds)
+
+    def block(self, member, route, error):
+        """Stop offering ``member`` for ``route``."""
+        member.no_access.add(route)
+        self.access_errors[route] = error
+        LOGGER.warning("%s cannot reach %s -> %s", member.name, *route)
+
+    def on_no_access(self, member, route, error):
+        """Block ``member`` for ``route`` after a failed send; True if another client can take it."""
+        member.in_flight -= 1
+        self.block(member, route, error)
+        return bool(self.candidates(route))
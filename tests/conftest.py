@@ -0,0 +1,74 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+
+import pytest
+from pyrogram.file_id import FileId, FileType, ThumbnailSource
+
+from clonebot.db.clone_sql import clone_db
+from clonebot.db.connection import close_databases
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Run a coroutine function against a fresh clone.db in ``tmp_path``."""
+    monkeypatch.setattr(clone_db, "path", str(tmp_path / "clone.db"))
+
+    def run(func):
+        async def main():
+            try:
+                return await func()
+            finally:
+                await close_databases()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def file_id():
+    """``file_id(media_id, file_type=DOCUMENT, access_hash=-55)``: a
+    Pyrogram file id, as the user session sees it."""
+
+    def file_id(media_id, file_type=FileType.DOCUMENT, access_hash=-55):
+        extra = {}
+        if file_type == FileType.PHOTO:
+            extra = dict(
+                volume_id=0,
+                thumbnail_source=ThumbnailSource.THUMBNAIL,
+                thumbnail_file_type=FileType.PHOTO,
+                thumbnail_size="y",
+                local_id=0,
+            )
+        return FileId(
+            file_type=file_type,
+            dc_id=4,
+            media_id=media_id,
+            access_hash=access_hash,
+            file_reference=b"\x01" * 29,
+            **extra,
+        ).encode()
+
+    return file_id
+
+
+@pytest.fixture
+def file_row():
+    """``file_row(message_id, file_id=None, file_type="messages")``: a row
+    of source channel -1001 for save_data_batch(); a messages row when no
+    file id is given."""
+
+    def file_row(message_id, file_id=None, file_type="messages", from_channel="-1001"):
+        return {
+            "file_name": f"file_{message_id}",
+            "file_id": file_id or f"{from_channel}_{message_id}",
+            "from_channel": from_channel,
+            "file_type": file_type,
+            "message_id": message_id,
+            "worker": "bot",
+        }
+
+    return file_row
@@ -0,0 +1,53 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+from types import SimpleNamespace
+
+from clonebot.utils.clone_engine import CloneEngine, CloneItem
+from clonebot.utils.pacing import PacingScheduler, VirtualClock, parse_policy
+
+
+async def items(chat_id, count):
+    for seq in range(count):
+        yield CloneItem(
+            seq=seq,
+            chat_id=chat_id,
+            channel_id=str(chat_id),
+            worker="user",
+            records=(SimpleNamespace(from_channel="-1001"),),
+            captions=(None,),
+        )
+
+
+def test_jobs_sending_with_one_client_share_its_pauses():
+    pacer = PacingScheduler(parse_policy("4:50"), clock=VirtualClock())
+    pauses = []
+
+    async def send(item, client):
+        return True
+
+    def engine(name):
+        async def on_pause(seconds):
+            pauses.append((name, seconds))
+
+        return CloneEngine(
+            send,
+            chat_rate=0,
+            pacers={"user": lambda client: pacer},
+            on_pause=on_pause,
+        )
+
+    async def main():
+        # two jobs, 4 sends each: only the shared count reaches a pause
+        await asyncio.gather(
+            engine("a").run(items(-1002, 4)), engine("b").run(items(-1003, 4))
+        )
+
+    asyncio.run(main())
+    assert pacer.sends == 8
+    assert pacer.paused == 50
+    # the pause is reported to both jobs, and they stop watching afterwards
+    assert sorted(pauses) == [("a", 50), ("b", 50)]
+    assert pacer.watchers == [(None, None)]
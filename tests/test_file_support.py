@@ -0,0 +1,25 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from pyrogram.file_id import FileType
+
+from clonebot.utils.file_support import get_media_id, unpack_new_file_id
+
+
+def test_media_id_of_pyrogram_file_ids(file_id):
+    assert get_media_id(file_id(1234)) == 1234
+    assert get_media_id(file_id(1235, FileType.VIDEO)) == 1235
+    assert get_media_id(file_id(1236, FileType.PHOTO)) == 1236
+
+
+def test_media_id_of_stored_bot_file_ids(file_id):
+    stored_photo, _ = unpack_new_file_id(file_id(1236, FileType.PHOTO))
+    stored_document, _ = unpack_new_file_id(file_id(1234))
+    assert get_media_id(stored_photo) == 1236
+    assert get_media_id(stored_document) == 1234
+
+
+def test_media_id_of_other_values():
+    assert get_media_id("-1001_5") is None
+    assert get_media_id("") is None
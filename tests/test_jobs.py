@@ -0,0 +1,62 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from clonebot.db.clone_sql import (
+    commit_clone_progress,
+    count_documents,
+    count_unclaimed_files,
+    iter_pending_files,
+    save_channels,
+    save_data_batch,
+)
+from clonebot.utils.jobs import DONE, RUNNING, JobManager
+
+
+CHANNELS = [{"channel_id": "-1002", "channel_number": 1, "pending_files": 1}]
+
+
+def test_files_indexed_after_an_adopted_job_finished_can_be_cloned(run, file_row):
+    async def scenario():
+        # channels saved by a version without jobs
+        await save_data_batch([file_row(1)])
+        assert await save_channels(CHANNELS)
+
+        jobs = JobManager()
+        await jobs.load()
+        (adopted,) = jobs.resumable()
+        assert adopted.end_rowid is None
+        assert await count_unclaimed_files() == 0
+
+        await adopted.set_state(RUNNING)
+        records = [record async for record in iter_pending_files()]
+        assert await commit_clone_progress(records, {"-1002": 1}) == 1
+        await adopted.finish()
+        assert adopted.state == DONE
+
+        await save_data_batch([file_row(2)])
+        # /clone: new files are found and a job is created for them
+        assert await count_unclaimed_files() == 1
+        job = await jobs.create(CHANNELS)
+        assert job is not None
+        assert await count_documents(job.start_rowid, job.end_rowid) == 1
+
+    run(scenario)
+
+
+def test_a_job_is_claimed_once_until_released(run, file_row):
+    async def scenario():
+        await save_data_batch([file_row(1)])
+        jobs = JobManager()
+        job = await jobs.create(CHANNELS)
+
+        # a double /clone or /reclone: the second start is refused
+        assert job.claim()
+        assert not job.claim()
+        assert jobs.live() == [job]
+
+        job.release()
+        assert jobs.live() == []
+        assert job.claim()
+
+    run(scenario)
@@ -0,0 +1,55 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from clonebot.db.clone_sql import get_clone_cursor, iter_pending_chunks, save_data_batch
+from clonebot.utils.journal import ProgressJournal
+
+CHAT_ID = -1002
+
+
+class Plan:
+    """The part of ChannelPlan the journal uses, without channels."""
+
+    def record(self, channel_id, count):
+        pass
+
+    def take_progress(self):
+        return {}
+
+    def restore_progress(self, progress):
+        pass
+
+
+async def read_all(journal):
+    chunks = [chunk async for chunk in iter_pending_chunks(cursor_id=CHAT_ID)]
+    for chunk in chunks:
+        journal.read(CHAT_ID, chunk)
+    return [record for chunk in chunks for record in chunk]
+
+
+def test_cursor_stops_below_rows_still_in_flight(run, file_row):
+    async def scenario():
+        await save_data_batch([file_row(message_id) for message_id in range(1, 7)])
+        journal = ProgressJournal(Plan())
+
+        records = await read_all(journal)
+        # rows 1, 2 and 4 are done, row 3 is still being sent
+        await journal.record([records[0], records[1], records[3]], "-1002")
+        assert await journal.flush()
+        assert await get_clone_cursor(CHAT_ID) == records[1].rowid
+
+        # after a restart the clone goes on with row 3, in source order
+        journal = ProgressJournal(Plan())
+        records = await read_all(journal)
+        assert [record.message_id for record in records] == [3, 5, 6]
+        await journal.record(records, "-1002")
+        assert await journal.flush()
+        assert await get_clone_cursor(CHAT_ID) == records[-1].rowid
+
+        # a full pass is over: the next one starts at the beginning
+        journal.rewind()
+        assert await journal.flush()
+        assert await get_clone_cursor(CHAT_ID) == 0
+
+    run(scenario)
@@ -0,0 +1,52 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from pyrogram.file_id import FileType
+
+from clonebot.db.clone_sql import (
+    FILE_COLUMNS,
+    MIGRATIONS,
+    clone_db,
+    count_documents,
+    iter_pending_files,
+)
+from clonebot.db.connection import Database
+from clonebot.utils.file_support import unpack_new_file_id
+
+
+def test_split_file_ids_merges_rows_of_the_same_file(run, file_id, file_row):
+    def bot_id(media_id, access_hash):
+        return unpack_new_file_id(file_id(media_id, FileType.PHOTO, access_hash))[0]
+
+    rows = [
+        file_row(1, file_id(7, access_hash=1), "document"),
+        # the same media under another access_hash
+        file_row(2, file_id(7, access_hash=2), "document"),
+        # one photo stored by two bots, without file reference
+        file_row(3, bot_id(8, 1), "photo"),
+        file_row(4, bot_id(8, 2), "photo"),
+        file_row(5),
+    ]
+
+    async def scenario():
+        # a database of schema version 4, file ids stored as text
+        old = Database(clone_db.path, migrations=MIGRATIONS[:4])
+        async with old.transaction() as db:
+            await db.executemany(
+                f"""INSERT INTO Files ({", ".join(FILE_COLUMNS)})
+                    VALUES ({", ".join("?" * len(FILE_COLUMNS))})""",
+                [tuple(row.get(column) for column in FILE_COLUMNS) for row in rows],
+            )
+        await old.close()
+
+        assert await count_documents() == 3
+        records = [record async for record in iter_pending_files()]
+        assert [record.message_id for record in records] == [1, 3, 5]
+        assert [record.file_id for record in records] == [
+            rows[0]["file_id"],
+            rows[2]["file_id"],
+            "-1001_5",
+        ]
+
+    run(scenario)
@@ -0,0 +1,65 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import random
+
+from clonebot.utils.pacing import PacingScheduler, VirtualClock, parse_policy
+
+
+def replay(policy, sends, seed=0):
+    """Run ``sends`` sends through a PacingScheduler on a VirtualClock;
+    returns the clock and the (send number, seconds) of every pause."""
+    clock = VirtualClock()
+    pauses = []
+    pacer = None
+
+    async def on_pause(seconds):
+        pauses.append((pacer.sends, seconds))
+
+    async def main():
+        nonlocal pacer
+        pacer = PacingScheduler(
+            policy, clock=clock, rng=random.Random(seed), on_pause=on_pause
+        )
+        for _ in range(sends):
+            await pacer.before_send()
+            await pacer.after_send()
+        return pacer
+
+    pacer = asyncio.run(main())
+    assert pacer.sends == sends
+    assert pacer.paused == sum(seconds for _, seconds in pauses)
+    return clock, pauses
+
+
+def test_tiers_due_together_pause_once_for_the_longest():
+    # every 2 sends pause 5 s, every 4 sends 50 s: the 4th send makes both
+    # due, which gives one 50 s pause and restarts both counts
+    clock, pauses = replay(parse_policy("2:5,4:50"), 16)
+    assert pauses == [(2, 5), (4, 50), (6, 5), (8, 50), (10, 5), (12, 50), (14, 5)]
+    assert clock.now == 3 * 50 + 4 * 5
+
+
+def test_hours_of_schedule_replay_on_a_virtual_clock():
+    policy = parse_policy("1500-2000:1000-1200,250-300:250-500", "3-8")
+    clock, pauses = replay(policy, 20_000, seed=1)
+    # well over a day of sending and pausing
+    assert clock.now > 36 * 3600
+
+    # a long pause restarts the short tier too, so short gaps can be shorter
+    sends = [send for send, _ in pauses]
+    gaps = [b - a for a, b in zip([0] + sends, sends)]
+    assert all(0 < gap <= 300 for gap in gaps)
+    assert all(250 <= seconds <= 1200 for _, seconds in pauses)
+    long_pauses = [send for send, seconds in pauses if seconds >= 1000]
+    long_gaps = [b - a for a, b in zip([0] + long_pauses, long_pauses)]
+    assert len(long_pauses) >= 10
+    assert all(1500 <= gap <= 2000 for gap in long_gaps)
+
+
+def test_policy_without_tiers_only_delays():
+    clock, pauses = replay(parse_policy("", "2"), 10)
+    assert pauses == []
+    assert clock.now == 20
@@ -0,0 +1,43 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+import asyncio
+import time
+
+from clonebot.db.clone_sql import (
+    commit_clone_progress,
+    iter_pending_files,
+    save_data_batch,
+)
+from clonebot.utils import retry
+from clonebot.utils.retry import RetryWorker
+
+
+def test_rows_that_cannot_be_written_back_do_not_spin(run, file_row, monkeypatch):
+    updates = []
+
+    async def update_failed_file(*args):
+        updates.append(args)
+        return False
+
+    async def send(row, client):
+        return False
+
+    monkeypatch.setattr(retry, "update_failed_file", update_failed_file)
+    monkeypatch.setattr(retry, "ERROR_DELAY", 0.1)
+
+    async def scenario():
+        await save_data_batch([file_row(1)])
+        records = [record async for record in iter_pending_files()]
+        failed = [(records[0], None, "-1002", None, "SendFailed", time.time())]
+        await commit_clone_progress(records, {}, failed)
+
+        worker = RetryWorker(send, pools={})
+        worker.start()
+        await asyncio.sleep(0.35)
+        await worker.stop()
+
+    run(scenario)
+    # one pass per ERROR_DELAY, not one per event loop turn
+    assert 2 <= len(updates) <= 5
@@ -0,0 +1,52 @@
+# Copyright (C) 2024 @jithumon
+#
+# This file is part of clonebot.
+
+from pyrogram.file_id import FileType
+
+from clonebot.db.clone_sql import iter_pending_files, save_data_batch
+from clonebot.utils.file_support import unpack_new_file_id
+from clonebot.utils.sent_index import SentIndex
+
+CHAT_ID = -1002
+
+
+def copy_of(record, message_id):
+    """The same media, posted again as another source message."""
+    return record._replace(from_channel="-1003", message_id=message_id)
+
+
+def test_rows_are_claimed_once_and_saved_right_away(run, file_id, file_row):
+    async def scenario():
+        await save_data_batch(
+            [
+                # stored by the bot, in the short form
+                file_row(1, unpack_new_file_id(file_id(11, FileType.PHOTO))[0], "photo"),
+                file_row(2, file_id(12), "document"),
+                file_row(3),
+            ]
+        )
+        records = [record async for record in iter_pending_files()]
+        photo, document, text = records
+        index = SentIndex()
+
+        # the same media twice in one chunk: only the first row is claimed
+        assert await index.claim(CHAT_ID, [photo, copy_of(photo, 7), text]) == [
+            photo,
+            text,
+        ]
+        assert await index.claim(CHAT_ID, records) == [document]
+        index.release(CHAT_ID, [document])
+        assert await index.claim(CHAT_ID, [document]) == [document]
+        index.release(CHAT_ID, [document])
+
+        # saved at once: a restarted index finds the rows in the database
+        assert await index.save(CHAT_ID, [photo, text])
+        assert index.claimed == {}
+        index = SentIndex()
+        assert await index.claim(CHAT_ID, records) == [document]
+        assert await index.claim(CHAT_ID, [copy_of(photo, 7)]) == []
+        assert await index.claim(CHAT_ID, [copy_of(text, 8)]) == [copy_of(text, 8)]
+        assert await index.claim(CHAT_ID - 1, [photo, text]) == [photo, text]
+
+    run(scenario)